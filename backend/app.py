@@ -1,4 +1,5 @@
 import os
+import gc
 from flask import Flask
 from flask_cors import CORS
 from flask_jwt_extended import JWTManager
@@ -8,7 +9,13 @@ from config import get_config
 from app.extensions import db
 from app.utils.response import APIResponse
 from app.api import register_blueprints
-from init_db import init_db_if_needed
+from app.utils.source_cache import source_cache
+from app.utils.sentence_cache import sentence_cache
+from app.utils.job_queue import job_queue
+from app.api.assignments import sweep_expired_uploads
+from app.utils.profiling import metrics
+from app.utils.text_analyzer import text_analyzer
+from init_db import init_db_if_needed, MIGRATIONS_DIR
 
 def create_app(config=None):
     app = Flask(__name__)
@@ -26,7 +33,23 @@ def create_app(config=None):
     CORS(app)
     JWTManager(app)
     db.init_app(app)
-    Migrate(app, db)
+    Migrate(app, db, directory=MIGRATIONS_DIR)
+    
+    # Size the shared preprocessed-text cache used by plagiarism checks
+    source_cache.resize(app.config.get('SOURCE_CACHE_SIZE', 256))
+    
+    # Size the per-sentence analysis cache and point it at the SQLite file shared by workers
+    sentence_cache.configure(
+        maxsize=app.config.get('SENTENCE_CACHE_SIZE', 20000),
+        path=app.config.get('SENTENCE_CACHE_PATH'),
+        disk_maxsize=app.config.get('SENTENCE_CACHE_DISK_SIZE', 500000)
+    )
+    
+    # Add up the profiling metrics of all workers in a shared SQLite file
+    metrics.configure(path=app.config.get('METRICS_PATH'))
+    
+    # Compile the grammar and style rules, with any custom rule packs on top of the default one
+    text_analyzer.use_rule_packs(app.config.get('ANALYSIS_RULE_PACKS') or [])
     
     # Initialize database if needed
     with app.app_context():
@@ -35,6 +58,24 @@ def create_app(config=None):
     # Register blueprints
     register_blueprints(app)
     
+    # Load the NLTK models once per process; with a preloading server (gunicorn --preload)
+    # this runs before fork, so workers share the models copy-on-write
+    text_analyzer.warm_up(download=app.config.get('NLTK_DOWNLOAD', True))
+    print(f"Text analyzer warmed up in {text_analyzer.warmup_seconds:.2f}s")
+    
+    # Keep the loaded models out of later garbage collections, which would touch their pages
+    gc.freeze()
+    
+    # Attach the background job queue; each serving process starts its own workers
+    job_queue.init_app(app)
+    
+    # Sweep abandoned resumable uploads when the job workers start, then hourly
+    job_queue.schedule(3600, sweep_expired_uploads)
+    
+    # Close the connections opened at startup, so forked workers don't share them
+    with app.app_context():
+        db.engine.dispose()
+    
     # Global error handlers
     @app.errorhandler(404)
     def not_found(error):
@@ -48,4 +89,5 @@ def create_app(config=None):
 
 if __name__ == "__main__":
     app = create_app()
+    job_queue.start()
     app.run(host="0.0.0.0", port=5000)
\ No newline at end of file
@@ -9,6 +9,8 @@ def register_blueprints(app):
     from app.api.assignments import assignments_bp
     from app.api.feedback import feedback_bp
     from app.api.plagiarism import plagiarism_bp
+    from app.api.jobs import jobs_bp
+    from app.api.metrics import metrics_bp
     
     # Create main API blueprint
     api_bp = Blueprint('api', __name__, url_prefix='/api/')
@@ -19,6 +21,8 @@ def register_blueprints(app):
     api_bp.register_blueprint(assignments_bp)
     api_bp.register_blueprint(feedback_bp)
     api_bp.register_blueprint(plagiarism_bp)
+    api_bp.register_blueprint(jobs_bp)
+    api_bp.register_blueprint(metrics_bp)
     
     # Register main API blueprint with app
     app.register_blueprint(api_bp) 
\ No newline at end of file
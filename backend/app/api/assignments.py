@@ -1,10 +1,19 @@
-from flask import Blueprint, request, g
-from datetime import datetime
+import os
+import time
+import uuid
+import shutil
+from flask import Blueprint, request, g, current_app
+from datetime import datetime, timedelta
+from sqlalchemy.exc import IntegrityError
+from werkzeug.utils import secure_filename
 from app.extensions import db
 from app.models.assignment import Assignment
+from app.models.upload_session import UploadSession, UploadPart
 from app.utils.response import APIResponse
 from app.utils.auth import login_required, role_required
 from app.utils.file_handler import FileHandler
+from app.utils.corpus_index import CorpusIndex
+from app.utils.plagiarism_detector import PlagiarismDetector
 
 assignments_bp = Blueprint('assignments', __name__, url_prefix='/assignments')
 
@@ -46,6 +55,12 @@ def create_assignment():
     # Save the file
     file_info = FileHandler.save_file(file, subfolder="assignments")
     
+    assignment = _create_assignment(file_info, title, description, deadline)
+    
+    return APIResponse.success(assignment.to_dict(), "Assignment created successfully", 201)
+
+def _create_assignment(file_info, title, description, deadline):
+    """Create the Assignment row for a stored file and index it for plagiarism checks"""
     # Create new assignment
     assignment = Assignment(
         title=title,
@@ -54,6 +69,7 @@ def create_assignment():
         file_name=file_info['original_filename'],
         file_type=file_info['file_type'],
         file_size=file_info['file_size'],
+        content_hash=file_info['content_hash'],
         deadline=deadline,
         user_id=g.current_user.id
     )
@@ -62,8 +78,273 @@ def create_assignment():
     db.session.add(assignment)
     db.session.commit()
     
+    # Add the submission to the plagiarism corpus index
+    detector = PlagiarismDetector.from_config()
+    document, _ = detector.preprocess_file(file_info['file_path'])
+    if document:
+        CorpusIndex.add_assignment(assignment.id, document, detector)
+        db.session.commit()
+    
+    return assignment
+
+@assignments_bp.route('/uploads', methods=['POST'])
+@login_required
+def create_upload():
+    """
+    Start a resumable upload
+    
+    The client then PUTs each part to /uploads/<upload_id>/parts/<part_number>
+    and calls /uploads/<upload_id>/complete to create the assignment.
+    """
+    data = request.get_json(silent=True) or {}
+    
+    file_name = secure_filename(data.get('file_name') or '')
+    if not file_name:
+        return APIResponse.error("file_name is required", 400)
+    
+    # Check if file type is allowed
+    if not FileHandler.is_allowed_file(file_name):
+        return APIResponse.error("File type not allowed", 400)
+    
+    # Validate title
+    title = data.get('title', '')
+    if not title:
+        return APIResponse.error("Title is required", 400)
+    
+    try:
+        file_size = int(data.get('file_size', 0))
+    except (TypeError, ValueError):
+        return APIResponse.error("file_size must be an integer", 400)
+    if file_size <= 0:
+        return APIResponse.error("file_size must be positive", 400)
+    if file_size > current_app.config.get('UPLOAD_MAX_FILE_SIZE', 1024 * 1024 * 1024):
+        return APIResponse.error("File is too large", 413)
+    
+    # Parse deadline if provided
+    deadline = None
+    if data.get('deadline'):
+        try:
+            deadline = datetime.fromisoformat(data['deadline'])
+        except ValueError:
+            return APIResponse.error("Invalid deadline format. Use ISO format (YYYY-MM-DDTHH:MM:SS)", 400)
+    
+    part_size = current_app.config.get('UPLOAD_PART_SIZE', 8 * 1024 * 1024)
+    upload = UploadSession(
+        id=str(uuid.uuid4()),
+        file_name=file_name,
+        file_type=FileHandler.get_file_extension(file_name),
+        file_size=file_size,
+        part_size=part_size,
+        total_parts=(file_size + part_size - 1) // part_size,
+        title=title,
+        description=data.get('description', ''),
+        deadline=deadline,
+        expires_at=datetime.utcnow() + timedelta(hours=current_app.config.get('UPLOAD_SESSION_HOURS', 24)),
+        user_id=g.current_user.id
+    )
+    db.session.add(upload)
+    db.session.commit()
+    
+    return APIResponse.success(upload.to_dict(), "Upload started", 201)
+
+@assignments_bp.route('/uploads/<upload_id>', methods=['GET'])
+@login_required
+def get_upload(upload_id):
+    """Get the state of a resumable upload, including the parts received so far"""
+    upload, error = _get_upload_session(upload_id)
+    if error:
+        return error
+    
+    return APIResponse.success(upload.to_dict())
+
+@assignments_bp.route('/uploads/<upload_id>/parts/<int:part_number>', methods=['PUT'])
+@login_required
+def upload_part(upload_id, part_number):
+    """
+    Upload one part of a resumable upload as the raw request body
+    
+    The X-Checksum-SHA256 header must hold the hex SHA-256 of the part.
+    Re-uploading a part replaces it.
+    """
+    upload, error = _get_upload_session(upload_id)
+    if error:
+        return error
+    if upload.status != 'open':
+        return _upload_closed(upload)
+    
+    if not 1 <= part_number <= upload.total_parts:
+        return APIResponse.error(f"Part number must be between 1 and {upload.total_parts}", 400)
+    
+    checksum = (request.headers.get('X-Checksum-SHA256') or '').lower()
+    if not checksum:
+        return APIResponse.error("X-Checksum-SHA256 header is required", 400)
+    
+    # Stream the part to disk, hashing it on the way
+    parts_dir = _upload_parts_dir(upload.id)
+    os.makedirs(parts_dir, exist_ok=True)
+    part_path = os.path.join(parts_dir, f"{part_number:06d}.part")
+    temp_path = f"{part_path}.{uuid.uuid4().hex[:8]}"
+    digest, size = FileHandler.write_stream(request.stream, temp_path)
+    
+    if digest != checksum:
+        os.remove(temp_path)
+        return APIResponse.error("Part checksum mismatch", 400)
+    if size != upload.expected_part_size(part_number):
+        os.remove(temp_path)
+        return APIResponse.error(f"Part {part_number} must be {upload.expected_part_size(part_number)} bytes", 400)
+    
+    os.replace(temp_path, part_path)
+    
+    part = UploadPart.query.filter_by(session_id=upload.id, part_number=part_number).first()
+    if part is None:
+        part = UploadPart(session_id=upload.id, part_number=part_number)
+        db.session.add(part)
+    part.size = size
+    part.checksum = digest
+    
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # The same part was recorded concurrently; its file has the same checksum
+        db.session.rollback()
+    
+    return APIResponse.success({'part_number': part_number, 'size': size, 'checksum': digest}, "Part uploaded")
+
+@assignments_bp.route('/uploads/<upload_id>/complete', methods=['POST'])
+@login_required
+def complete_upload(upload_id):
+    """
+    Assemble the parts of a resumable upload and create the assignment
+    
+    An optional "sha256" field in the JSON body is checked against the
+    assembled file.
+    """
+    upload, error = _get_upload_session(upload_id)
+    if error:
+        return error
+    
+    if upload.status != 'open':
+        return _upload_closed(upload)
+    
+    received = {part.part_number for part in upload.parts}
+    missing = [number for number in range(1, upload.total_parts + 1) if number not in received]
+    if missing:
+        return APIResponse.error("Upload is incomplete", 400, {'missing_parts': missing})
+    
+    # Claim the upload atomically, so concurrent calls don't assemble the same parts twice
+    claimed = UploadSession.query.filter_by(id=upload.id, status='open').update(
+        {'status': 'finalizing'}, synchronize_session=False
+    )
+    db.session.commit()
+    if not claimed:
+        return _upload_closed(UploadSession.query.get(upload_id))
+    
+    parts_dir = _upload_parts_dir(upload.id)
+    try:
+        # Assemble the parts in order, hashing the whole file on the way
+        upload_path = os.path.join(current_app.config['UPLOAD_FOLDER'], 'assignments')
+        os.makedirs(upload_path, exist_ok=True)
+        temp_path = os.path.join(upload_path, f".upload_{uuid.uuid4().hex}")
+        content_hash, size = FileHandler.concatenate_files(
+            [os.path.join(parts_dir, f"{number:06d}.part") for number in range(1, upload.total_parts + 1)],
+            temp_path
+        )
+        
+        expected_hash = ((request.get_json(silent=True) or {}).get('sha256') or '').lower()
+        if size != upload.file_size or (expected_hash and expected_hash != content_hash):
+            os.remove(temp_path)
+            _reopen_upload(upload_id)
+            return APIResponse.error("Assembled file does not match the declared size or checksum", 400)
+        
+        file_info = FileHandler.store_file(temp_path, content_hash, upload.file_name, subfolder="assignments")
+    except Exception:
+        _reopen_upload(upload_id)
+        raise
+    
+    # The completed session is kept until the sweep removes it, so later calls get a 409
+    shutil.rmtree(parts_dir, ignore_errors=True)
+    UploadPart.query.filter_by(session_id=upload.id).delete(synchronize_session=False)
+    upload.status = 'completed'
+    assignment = _create_assignment(file_info, upload.title, upload.description, upload.deadline)
+    
     return APIResponse.success(assignment.to_dict(), "Assignment created successfully", 201)
 
+@assignments_bp.route('/uploads/<upload_id>', methods=['DELETE'])
+@login_required
+def abort_upload(upload_id):
+    """Abort a resumable upload and delete its parts"""
+    upload, error = _get_upload_session(upload_id)
+    if error:
+        return error
+    if upload.status == 'finalizing':
+        return _upload_closed(upload)
+    
+    _discard_upload(upload)
+    db.session.commit()
+    
+    return APIResponse.success(None, "Upload aborted")
+
+def _get_upload_session(upload_id):
+    """Load an upload session of the current user, discarding it if expired"""
+    upload = UploadSession.query.get(upload_id)
+    if not upload or upload.user_id != g.current_user.id:
+        return None, APIResponse.error("Upload not found", 404)
+    
+    if upload.expires_at < datetime.utcnow():
+        _discard_upload(upload)
+        db.session.commit()
+        return None, APIResponse.error("Upload expired", 410)
+    
+    return upload, None
+
+def _upload_closed(upload):
+    """409 response for an upload that is being or has been completed"""
+    if upload is not None and upload.status == 'completed':
+        return APIResponse.error("Upload already completed", 409)
+    return APIResponse.error("Upload is already being completed", 409)
+
+def _reopen_upload(upload_id):
+    """Let a failed completion be retried"""
+    db.session.rollback()
+    UploadSession.query.filter_by(id=upload_id, status='finalizing').update(
+        {'status': 'open'}, synchronize_session=False
+    )
+    db.session.commit()
+
+def _upload_parts_dir(upload_id):
+    """Directory holding the received parts of an upload"""
+    return os.path.join(current_app.config['UPLOAD_FOLDER'], 'parts', upload_id)
+
+def _discard_upload(upload):
+    """Delete an upload session and its part files (the caller commits)"""
+    shutil.rmtree(_upload_parts_dir(upload.id), ignore_errors=True)
+    db.session.delete(upload)
+
+def sweep_expired_uploads():
+    """
+    Delete expired upload sessions with their part files, and part directories without a session
+    
+    Uploads abandoned by their users are otherwise never cleaned up.
+    """
+    expired = [upload_id for upload_id, in db.session.query(UploadSession.id).filter(UploadSession.expires_at < datetime.utcnow())]
+    if expired:
+        UploadPart.query.filter(UploadPart.session_id.in_(expired)).delete(synchronize_session=False)
+        UploadSession.query.filter(UploadSession.id.in_(expired)).delete(synchronize_session=False)
+        db.session.commit()
+    for upload_id in expired:
+        shutil.rmtree(_upload_parts_dir(upload_id), ignore_errors=True)
+    
+    # Directories left behind by a failed delete; recent ones may belong to a session being created
+    parts_root = os.path.join(current_app.config['UPLOAD_FOLDER'], 'parts')
+    if not os.path.isdir(parts_root):
+        return
+    known = {upload_id for upload_id, in db.session.query(UploadSession.id)}
+    stale_before = time.time() - current_app.config.get('UPLOAD_SESSION_HOURS', 24) * 3600
+    for upload_id in os.listdir(parts_root):
+        path = os.path.join(parts_root, upload_id)
+        if upload_id not in known and os.path.getmtime(path) < stale_before:
+            shutil.rmtree(path, ignore_errors=True)
+
 @assignments_bp.route('', methods=['GET'])
 @login_required
 def get_assignments():
@@ -119,7 +400,7 @@ def download_assignment_file(assignment_id):
         return APIResponse.error("Access denied", 403)
     
     # Get the file
-    file = FileHandler.get_file(assignment.file_path)
+    file = FileHandler.get_file(assignment.file_path, download_name=assignment.file_name, etag=assignment.content_hash)
     
     if not file:
         return APIResponse.error("File not found", 404)
@@ -186,11 +467,17 @@ def delete_assignment(assignment_id):
     if assignment.user_id != g.current_user.id and not g.current_user.has_role('admin'):
         return APIResponse.error("Access denied", 403)
     
-    # Delete the file
-    FileHandler.delete_file(assignment.file_path)
+    # Release the file; it is removed from disk once the deletion is committed
+    released_path = FileHandler.release_file(assignment.file_path)
+    
+    # Remove the submission from the plagiarism corpus index
+    CorpusIndex.remove_assignment(assignment.id)
     
     # Delete from database (cascade will delete related reports/feedback)
     db.session.delete(assignment)
     db.session.commit()
     
+    if released_path:
+        FileHandler.remove_released_file(released_path)
+    
     return APIResponse.success(None, "Assignment deleted")
\ No newline at end of file
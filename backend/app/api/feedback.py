@@ -1,13 +1,19 @@
 import os
+import json
+import time
 from datetime import datetime
-from flask import Blueprint, request, g, current_app
+from flask import Blueprint, Response, request, g, current_app, stream_with_context
 from app.extensions import db
 from app.models.assignment import Assignment
 from app.models.feedback import Feedback
 from app.utils.response import APIResponse
 from app.utils.auth import login_required, role_required
-from app.utils.text_analyzer import TextAnalyzer
+from app.utils.assignment_filter import select_assignments
+from app.utils.text_analyzer import text_analyzer
 from app.utils.file_handler import FileHandler
+from app.utils.plagiarism_detector import PlagiarismDetector
+from app.utils.job_queue import job_queue, async_requested
+from app.utils.profiling import profiled, stage, response_timings, timings_requested
 
 feedback_bp = Blueprint('feedback', __name__, url_prefix='/feedback')
 
@@ -23,58 +29,334 @@ def analyze_assignment(assignment_id):
         not g.current_user.has_role('instructor')):
         return APIResponse.error("Access denied", 403)
     
+    # Queue the analysis if the client opted in to async mode
+    if async_requested():
+        job = job_queue.enqueue('feedback-analysis', assignment.id, g.current_user.id)
+        return APIResponse.success(job.to_dict(), "Assignment analysis queued", 202)
+    
+    with profiled('feedback-analysis') as profile:
+        feedback, error, code = run_feedback_analysis(assignment)
+    
+    if error:
+        return APIResponse.error(error, code)
+    
+    return APIResponse.success(feedback.to_dict(), "Assignment analysis completed", timings=response_timings(profile))
+
+@feedback_bp.route('/analyze/<int:assignment_id>/stream', methods=['POST'])
+@login_required
+def analyze_assignment_stream(assignment_id):
+    """Analyze assignment, streaming findings as NDJSON while the file is processed"""
+    assignment = Assignment.query.get_or_404(assignment_id)
+    
+    # Check if user has access to this assignment
+    if (assignment.user_id != g.current_user.id and 
+        not g.current_user.has_role('admin') and 
+        not g.current_user.has_role('instructor')):
+        return APIResponse.error("Access denied", 403)
+    
+    file_path = os.path.join(current_app.config['UPLOAD_FOLDER'], assignment.file_path)
+    
+    if not os.path.exists(file_path):
+        return APIResponse.error("Assignment file not found", 404)
+    
+    existing_feedback = Feedback.query.filter_by(assignment_id=assignment.id).first()
+    previous = _previous_units(assignment, existing_feedback)
+    detector = PlagiarismDetector.from_config()
+    include_timings = timings_requested()
+    
+    def generate():
+        yield _ndjson({'event': 'started', 'assignment_id': assignment.id})
+        
+        with profiled('feedback-stream') as profile:
+            try:
+                # Pages and paragraphs are analyzed as they are extracted
+                segments = (segment for _, segment in detector.iter_segments(file_path))
+                for kind, data in text_analyzer.iter_analysis(segments, previous):
+                    if kind != 'result':
+                        yield _ndjson({'event': kind, 'data': data})
+                        continue
+                
+                    result, units = data
+                    if not result['success']:
+                        yield _ndjson({'event': 'error', 'error': f"Unable to extract text from {assignment.file_type} file"})
+                        return
+                
+                    # Document-level suggestions are only known once the whole text is counted
+                    for suggestion in result['improvement_suggestions']:
+                        if suggestion['position'] is None:
+                            yield _ndjson({'event': 'improvement_suggestion', 'data': suggestion})
+                
+                    with stage('db_commit'):
+                        feedback = _save_feedback(assignment, result, existing_feedback, units)
+                        db.session.commit()
+                
+                    completed = {
+                        'feedback_id': feedback.id,
+                        'clarity_score': result['clarity_score'],
+                        'readability_score': result['readability_score'],
+                        'readability_metrics': result['readability_metrics'],
+                        'structure_feedback': result['structure_feedback'],
+                        'grammar_issue_count': len(result['grammar_issues']),
+                        'improvement_suggestion_count': len(result['improvement_suggestions']),
+                        'rewrite_suggestion_count': len(result['rewrite_suggestions'])
+                    }
+                    if include_timings:
+                        completed['timings'] = profile.to_dict()
+                    yield _ndjson({'event': 'completed', 'data': completed})
+            except Exception as e:
+                # Headers are already sent, so report the failure in the stream
+                db.session.rollback()
+                print(f"Streaming analysis failed: {str(e)}")
+                yield _ndjson({'event': 'error', 'error': 'Analysis failed'})
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype='application/x-ndjson',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}  # Don't let nginx hold back lines
+    )
+
+def _ndjson(event):
+    """Encode one event as a line of newline-delimited JSON"""
+    return json.dumps(event) + '\n'
+
+def run_feedback_analysis(assignment):
+    """
+    Analyze an assignment file and store the feedback
+    
+    Args:
+        assignment: The Assignment to analyze
+        
+    Returns:
+        Tuple of (Feedback, error message, error status code)
+    """
     # Get file path
     upload_folder = current_app.config['UPLOAD_FOLDER']
     file_path = os.path.join(upload_folder, assignment.file_path)
     
     if not os.path.exists(file_path):
-        return APIResponse.error("Assignment file not found", 404)
-    
-    # Initialize text analyzer
-    analyzer = TextAnalyzer()
+        return None, "Assignment file not found", 404
     
-    # Extract text from file
-    try:
-        # This would use the text extraction function from PlagiarismDetector
-        # For now, we'll simulate with a simple text read
-        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-            text = f.read()
-    except:
-        # If reading fails, give feedback about the file type
-        return APIResponse.error(f"Unable to extract text from {assignment.file_type} file", 400)
+    existing_feedback = Feedback.query.filter_by(assignment_id=assignment.id).first()
     
-    # Analyze text
-    result = analyzer.analyze_text(text)
+    # Identical files get identical feedback, so reuse the analysis of another copy
+    twin = _find_existing_analysis(assignment)
     
-    if not result['success']:
-        return APIResponse.error(result.get('error', 'Failed to analyze text'), 400)
+    if twin:
+        result, units = _feedback_result(twin), twin.analysis_units
+    else:
+        # Extract text from file (served from the extracted-text cache when the file was seen before)
+        text = PlagiarismDetector.from_config().extract_text_from_file(file_path)
+        if not text:
+            # If extraction fails, give feedback about the file type
+            return None, f"Unable to extract text from {assignment.file_type} file", 400
+        
+        # Analyze text, re-analyzing only the parts that changed since the previous version
+        result, units = text_analyzer.analyze_revision(text, _previous_units(assignment, existing_feedback))
+        
+        if not result['success']:
+            return None, result.get('error', 'Failed to analyze text'), 400
     
     # Create or update feedback
-    existing_feedback = Feedback.query.filter_by(assignment_id=assignment.id).first()
+    with stage('db_commit'):
+        feedback = _save_feedback(assignment, result, existing_feedback, units)
+        
+        db.session.commit()
     
+    return feedback, None, None
+
+def _save_feedback(assignment, result, existing_feedback=None, units=None):
+    """Add or update the Feedback of an assignment from an analysis result (the caller commits)"""
     if existing_feedback:
         existing_feedback.grammar_issues = result['grammar_issues']
         existing_feedback.clarity_score = result['clarity_score']
         existing_feedback.structure_feedback = result['structure_feedback']
         existing_feedback.readability_score = result['readability_score']
+        existing_feedback.readability_metrics = result.get('readability_metrics')
         existing_feedback.improvement_suggestions = result['improvement_suggestions']
         existing_feedback.rewrite_suggestions = result['rewrite_suggestions']
-        feedback = existing_feedback
-    else:
-        feedback = Feedback(
-            assignment_id=assignment.id,
-            grammar_issues=result['grammar_issues'],
-            clarity_score=result['clarity_score'],
-            structure_feedback=result['structure_feedback'],
-            readability_score=result['readability_score'],
-            improvement_suggestions=result['improvement_suggestions'],
-            rewrite_suggestions=result['rewrite_suggestions']
-        )
-        db.session.add(feedback)
+        if units is not None:
+            # Units are keyed by content, so ones stored earlier stay valid when none are given
+            existing_feedback.analysis_units = units
+        return existing_feedback
     
-    db.session.commit()
+    feedback = Feedback(
+        assignment_id=assignment.id,
+        grammar_issues=result['grammar_issues'],
+        clarity_score=result['clarity_score'],
+        structure_feedback=result['structure_feedback'],
+        readability_score=result['readability_score'],
+        readability_metrics=result.get('readability_metrics'),
+        improvement_suggestions=result['improvement_suggestions'],
+        rewrite_suggestions=result['rewrite_suggestions'],
+        analysis_units=units
+    )
+    db.session.add(feedback)
+    return feedback
+
+def _find_existing_analysis(assignment):
+    """
+    Return the Feedback of another assignment with the same file content, if any
+    
+    Only feedback holding analysis results made by the current analyzer
+    version and rules is reused; rows with instructor feedback only, or from
+    older rules, are analyzed again.
+    """
+    if not assignment.content_hash:
+        return None
+    
+    candidates = Feedback.query.join(Assignment, Feedback.assignment_id == Assignment.id).filter(
+        Assignment.content_hash == assignment.content_hash,
+        Assignment.id != assignment.id,
+        Feedback.clarity_score.isnot(None)
+    ).order_by(Feedback.updated_at.desc())
+    
+    for feedback in candidates:
+        if text_analyzer.is_current(feedback.analysis_units):
+            return feedback
+    return None
+
+def _previous_units(assignment, existing_feedback):
+    """Return the stored analysis units to reuse: the assignment's own, else its previous version's"""
+    if existing_feedback and existing_feedback.analysis_units:
+        return existing_feedback.analysis_units
+    return _find_previous_units(assignment)
+
+def _find_previous_units(assignment):
+    """Return the stored analysis units of the student's previous upload of the same assignment, if any"""
+    previous = Feedback.query.join(Assignment, Feedback.assignment_id == Assignment.id).filter(
+        Assignment.user_id == assignment.user_id,
+        Assignment.title == assignment.title,
+        Assignment.id != assignment.id,
+        Assignment.created_at <= assignment.created_at
+    ).order_by(Assignment.created_at.desc(), Assignment.id.desc()).first()
+    
+    return previous.analysis_units if previous else None
+
+def _feedback_result(feedback):
+    """Return stored feedback in the form of an analysis result"""
+    return {
+        'success': True,
+        'grammar_issues': feedback.grammar_issues,
+        'clarity_score': feedback.clarity_score,
+        'structure_feedback': feedback.structure_feedback,
+        'readability_score': feedback.readability_score,
+        'readability_metrics': feedback.readability_metrics,
+        'improvement_suggestions': feedback.improvement_suggestions,
+        'rewrite_suggestions': feedback.rewrite_suggestions
+    }
+
+def _run_analysis_job(job):
+    """Run a queued feedback-analysis job"""
+    assignment = Assignment.query.get(job.assignment_id)
+    if not assignment:
+        raise ValueError("Assignment not found")
+    
+    feedback, error, _ = run_feedback_analysis(assignment)
+    if error:
+        raise ValueError(error)
+    
+    return feedback.id
+
+job_queue.register('feedback-analysis', _run_analysis_job)
+
+@feedback_bp.route('/analyze-batch', methods=['POST'])
+@login_required
+@role_required('instructor')
+def analyze_batch():
+    """Analyze many assignments at once and store all their feedback (instructor only)"""
+    data = request.get_json(silent=True) or {}
     
-    return APIResponse.success(feedback.to_dict(), "Assignment analysis completed")
+    # Select the batch by explicit ids or by title/deadline filter
+    assignments, error = select_assignments(data)
+    if error:
+        return APIResponse.error(error, 400)
+    
+    if not assignments:
+        return APIResponse.error("No assignments matched", 404)
+    
+    with profiled('feedback-batch') as profile:
+        result = run_batch_analysis(assignments)
+    
+    return APIResponse.success(result, "Batch analysis completed", timings=response_timings(profile))
+
+def run_batch_analysis(assignments):
+    """
+    Analyze many assignments, tagging their texts together, and store all feedback in one commit
+    
+    Returns:
+        Dict with the stored feedback, failures and throughput
+    """
+    started = time.perf_counter()
+    upload_folder = current_app.config['UPLOAD_FOLDER']
+    detector = PlagiarismDetector.from_config()
+    
+    results = {}
+    failed = []
+    texts = []
+    text_keys = {}  # content hash (or assignment id) -> index in texts
+    pending = []  # (assignment, index in texts)
+    
+    for assignment in assignments:
+        file_path = os.path.join(upload_folder, assignment.file_path)
+        if not os.path.exists(file_path):
+            failed.append({'assignment_id': assignment.id, 'error': "Assignment file not found"})
+            continue
+        
+        twin = _find_existing_analysis(assignment)
+        if twin:
+            results[assignment.id] = _feedback_result(twin)
+            continue
+        
+        # Copies of the same file within the batch are analyzed once
+        key = assignment.content_hash or f"assignment:{assignment.id}"
+        if key not in text_keys:
+            text = detector.extract_text_from_file(file_path)
+            if not text:
+                failed.append({'assignment_id': assignment.id, 'error': f"Unable to extract text from {assignment.file_type} file"})
+                continue
+            text_keys[key] = len(texts)
+            texts.append(text)
+        pending.append((assignment, text_keys[key]))
+    
+    # Tag every document's sentences together, fanned out over worker processes if configured
+    analyzed = text_analyzer.analyze_many(texts, workers=current_app.config.get('ANALYSIS_WORKERS', 1))
+    
+    for assignment, index in pending:
+        result = analyzed[index]
+        if result['success']:
+            results[assignment.id] = result
+        else:
+            failed.append({'assignment_id': assignment.id, 'error': result.get('error', 'Failed to analyze text')})
+    
+    # Write all feedback in one transaction
+    with stage('db_commit'):
+        existing = {
+            feedback.assignment_id: feedback
+            for feedback in Feedback.query.filter(Feedback.assignment_id.in_(list(results)))
+        } if results else {}
+        feedbacks = [
+            _save_feedback(assignment, results[assignment.id], existing.get(assignment.id))
+            for assignment in assignments if assignment.id in results
+        ]
+        db.session.commit()
+    
+    seconds = time.perf_counter() - started
+    
+    return {
+        'feedback': [feedback.to_dict() for feedback in feedbacks],
+        'failed': failed,
+        'analyzed': len(feedbacks),
+        'texts_analyzed': len(texts),
+        'seconds': round(seconds, 3),
+        'documents_per_second': round(len(feedbacks) / seconds, 2) if seconds > 0 else None
+    }
+
+@feedback_bp.route('/analyzer-stats', methods=['GET'])
+@login_required
+@role_required('admin')
+def get_analyzer_stats():
+    """Get warm-up and cold-start timings of the text analyzer in this worker (admin only)"""
+    return APIResponse.success(text_analyzer.stats())
 
 @feedback_bp.route('/<int:assignment_id>', methods=['GET'])
 @login_required
@@ -0,0 +1,31 @@
+from flask import Blueprint, g
+from app.models.job import Job
+from app.utils.response import APIResponse
+from app.utils.auth import login_required, role_required
+from app.utils.job_queue import job_queue
+
+jobs_bp = Blueprint('jobs', __name__, url_prefix='/jobs')
+
+@jobs_bp.route('/stats', methods=['GET'])
+@login_required
+@role_required('admin')
+def get_job_stats():
+    """Get job queue depth and wait times (admin only)"""
+    return APIResponse.success(job_queue.stats())
+
+@jobs_bp.route('/<job_id>', methods=['GET'])
+@login_required
+def get_job(job_id):
+    """Get the status and result of a queued job"""
+    job = Job.query.get_or_404(job_id)
+    
+    # Check if user started this job or is instructor/admin
+    if (job.user_id != g.current_user.id and 
+        not g.current_user.has_role('admin') and 
+        not g.current_user.has_role('instructor')):
+        return APIResponse.error("Access denied", 403)
+    
+    # Only instructors and admins see which stored assignments a plagiarism check matched
+    return APIResponse.success(job.to_dict(
+        show_matched_assignments=g.current_user.has_role('admin') or g.current_user.has_role('instructor')
+    ))
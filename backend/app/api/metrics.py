@@ -0,0 +1,12 @@
+from flask import Blueprint, Response
+from app.utils.auth import login_required, role_required
+from app.utils.profiling import metrics
+
+metrics_bp = Blueprint('metrics', __name__, url_prefix='/metrics')
+
+@metrics_bp.route('', methods=['GET'])
+@login_required
+@role_required('admin')
+def get_metrics():
+    """Get stage time histograms and item counters of all workers in Prometheus text format (admin only)"""
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
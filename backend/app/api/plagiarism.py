@@ -5,7 +5,13 @@ from app.models.assignment import Assignment
 from app.models.plagiarism_report import PlagiarismReport
 from app.utils.response import APIResponse
 from app.utils.auth import login_required, role_required
+from app.utils.assignment_filter import select_assignments
 from app.utils.plagiarism_detector import PlagiarismDetector
+from app.utils.corpus_index import CorpusIndex
+from app.utils.job_queue import job_queue, async_requested
+from app.utils.cohort_analyzer import CohortAnalyzer
+from app.utils.text_cache import extracted_text_cache
+from app.utils.profiling import profiled, stage, response_timings
 
 plagiarism_bp = Blueprint('plagiarism', __name__, url_prefix='/plagiarism')
 
@@ -21,52 +27,155 @@ def check_plagiarism(assignment_id):
         not g.current_user.has_role('instructor')):
         return APIResponse.error("Access denied", 403)
     
+    options = request.get_json(silent=True) or {}
+    
+    error = _comparison_sources_error(options.get('comparison_sources'))
+    if error:
+        return APIResponse.error(error, 400)
+    
+    max_candidates, error = _number_option(
+        options, 'max_candidates', int, 1, current_app.config.get('CORPUS_MAX_CANDIDATES', 50)
+    )
+    if error:
+        return APIResponse.error(error, 400)
+    if max_candidates is not None:
+        options = {**options, 'max_candidates': max_candidates}
+    
+    # Queue the check if the client opted in to async mode
+    if async_requested():
+        job = job_queue.enqueue('plagiarism-check', assignment.id, g.current_user.id, options)
+        return APIResponse.success(job.to_dict(), "Plagiarism check queued", 202)
+    
+    with profiled('plagiarism-check') as profile:
+        report, error, code = run_plagiarism_check(assignment, options)
+    
+    if error:
+        return APIResponse.error(error, code)
+    
+    return APIResponse.success(
+        report.to_dict(show_matched_assignments=_can_see_other_submissions()),
+        "Plagiarism check completed",
+        timings=response_timings(profile)
+    )
+
+def _can_see_other_submissions():
+    """Instructors and admins see which stored assignments a report matched"""
+    return g.current_user.has_role('admin') or g.current_user.has_role('instructor')
+
+def _number_option(options, name, cast, minimum, maximum):
+    """
+    Read an optional numeric request option and check its range
+    
+    Returns:
+        Tuple of (value or None if not given, error message)
+    """
+    value = options.get(name)
+    if value is None:
+        return None, None
+    
+    try:
+        value = cast(value)
+    except (TypeError, ValueError):
+        return None, f"{name} must be {'an integer' if cast is int else 'a number'}"
+    if not minimum <= value <= maximum:
+        return None, f"{name} must be between {minimum} and {maximum}"
+    return value, None
+
+def _comparison_sources_error(sources):
+    """Check that comparison_sources maps source names to texts; returns an error message or None"""
+    if sources is None:
+        return None
+    if not isinstance(sources, dict):
+        return "comparison_sources must be an object mapping source names to texts"
+    for name, source_text in sources.items():
+        if not isinstance(source_text, str):
+            return f"comparison_sources[{name!r}] must be a string"
+        if name.startswith(CorpusIndex.SOURCE_PREFIX):
+            return f"comparison_sources names can't start with {CorpusIndex.SOURCE_PREFIX!r}"
+    return None
+
+def run_plagiarism_check(assignment, options):
+    """
+    Check an assignment for plagiarism and store the report
+    
+    Args:
+        assignment: The Assignment to check
+        options: Request options (comparison_sources, use_corpus, max_candidates)
+        
+    Returns:
+        Tuple of (PlagiarismReport, error message, error status code)
+    """
     # Get file path
     upload_folder = current_app.config['UPLOAD_FOLDER']
     file_path = os.path.join(upload_folder, assignment.file_path)
     
     if not os.path.exists(file_path):
-        return APIResponse.error("Assignment file not found", 404)
+        return None, "Assignment file not found", 404
     
     # Initialize plagiarism detector
-    detector = PlagiarismDetector()
-    
-    # For demonstration, we'll use sample sources
-    # In a real implementation, this would come from a database of sources
-    comparison_sources = {}
+    detector = PlagiarismDetector.from_config()
     
     # Optional: Get comparison sources from request
-    if request.json and 'comparison_sources' in request.json:
-        comparison_sources = request.json['comparison_sources']
+    comparison_sources = dict(options.get('comparison_sources') or {})
+    
+    # Compare against other stored submissions found through the corpus index
+    text, page_starts = detector.preprocess_file(file_path)
+    corpus_matches = []
+    if text and options.get('use_corpus', True):
+        with stage('corpus_lookup'):
+            corpus_sources, corpus_matches = CorpusIndex.get_candidate_sources(
+                text,
+                exclude_assignment_id=assignment.id,
+                limit=options.get('max_candidates'),
+                detector=detector
+            )
+        comparison_sources.update(corpus_sources)
     
     # Check for plagiarism
-    result = detector.check_plagiarism(file_path, comparison_sources)
+    result = detector.check_plagiarism(file_path, comparison_sources, text=text, page_starts=page_starts)
     
     if not result['success']:
-        return APIResponse.error(result.get('error', 'Failed to check plagiarism'), 400)
+        return None, result.get('error', 'Failed to check plagiarism'), 400
+    
+    result['corpus_matches'] = corpus_matches
     
     # Create or update plagiarism report
-    existing_report = PlagiarismReport.query.filter_by(assignment_id=assignment.id).first()
-    
-    if existing_report:
-        existing_report.similarity_score = result['similarity_score']
-        existing_report.flagged_sections = result['flagged_sections']
-        existing_report.sources = result['sources']
-        existing_report.report_data = result
-        report = existing_report
-    else:
-        report = PlagiarismReport(
-            assignment_id=assignment.id,
-            similarity_score=result['similarity_score'],
-            flagged_sections=result['flagged_sections'],
-            sources=result['sources'],
-            report_data=result
-        )
-        db.session.add(report)
+    with stage('db_commit'):
+        existing_report = PlagiarismReport.query.filter_by(assignment_id=assignment.id).first()
+        
+        if existing_report:
+            existing_report.similarity_score = result['similarity_score']
+            existing_report.flagged_sections = result['flagged_sections']
+            existing_report.sources = result['sources']
+            existing_report.report_data = result
+            report = existing_report
+        else:
+            report = PlagiarismReport(
+                assignment_id=assignment.id,
+                similarity_score=result['similarity_score'],
+                flagged_sections=result['flagged_sections'],
+                sources=result['sources'],
+                report_data=result
+            )
+            db.session.add(report)
+        
+        db.session.commit()
+    
+    return report, None, None
+
+def _run_plagiarism_job(job):
+    """Run a queued plagiarism-check job"""
+    assignment = Assignment.query.get(job.assignment_id)
+    if not assignment:
+        raise ValueError("Assignment not found")
     
-    db.session.commit()
+    report, error, _ = run_plagiarism_check(assignment, job.payload or {})
+    if error:
+        raise ValueError(error)
     
-    return APIResponse.success(report.to_dict(), "Plagiarism check completed")
+    return report.id
+
+job_queue.register('plagiarism-check', _run_plagiarism_job)
 
 @plagiarism_bp.route('/report/<int:assignment_id>', methods=['GET'])
 @login_required
@@ -86,4 +195,44 @@ def get_plagiarism_report(assignment_id):
     if not report:
         return APIResponse.error("No plagiarism report available for this assignment", 404)
     
-    return APIResponse.success(report.to_dict()) 
\ No newline at end of file
+    return APIResponse.success(report.to_dict(show_matched_assignments=_can_see_other_submissions()))
+
+@plagiarism_bp.route('/cohort', methods=['POST'])
+@login_required
+@role_required('instructor')
+def check_cohort():
+    """Find pairs of assignments in a cohort that share suspicious overlaps (instructor only)"""
+    data = request.get_json(silent=True) or {}
+    
+    # Select the cohort by explicit ids or by title/deadline filter
+    assignments, error = select_assignments(data)
+    if error:
+        return APIResponse.error(error, 400)
+    
+    limit, error = _number_option(data, 'limit', int, 1, current_app.config.get('COHORT_MAX_PAIRS', 200))
+    if error:
+        return APIResponse.error(error, 400)
+    min_similarity, error = _number_option(data, 'min_similarity', float, 0, 1)
+    if error:
+        return APIResponse.error(error, 400)
+    
+    if len(assignments) < 2:
+        return APIResponse.error("At least two assignments are needed for a cohort check", 400)
+    
+    with profiled('plagiarism-cohort') as profile:
+        result = CohortAnalyzer(PlagiarismDetector.from_config()).analyze(
+            assignments,
+            limit=20 if limit is None else limit,
+            min_similarity=0.2 if min_similarity is None else min_similarity
+        )
+    
+    return APIResponse.success(result, "Cohort check completed", timings=response_timings(profile))
+
+@plagiarism_bp.route('/cache-stats', methods=['GET'])
+@login_required
+@role_required('admin')
+def get_cache_stats():
+    """Get preprocessed-text and extracted-text cache counters (admin only)"""
+    stats = PlagiarismDetector().cache_stats()
+    stats['extracted_texts'] = extracted_text_cache.stats()
+    return APIResponse.success(stats)
@@ -2,4 +2,10 @@
 from app.models.user import User, Role, UserRole
 from app.models.assignment import Assignment
 from app.models.feedback import Feedback
-from app.models.plagiarism_report import PlagiarismReport 
\ No newline at end of file
+from app.models.plagiarism_report import PlagiarismReport 
+from app.models.corpus_fingerprint import CorpusFingerprint
+from app.models.document_signature import DocumentSignature, LshBucket
+from app.models.job import Job
+from app.models.extracted_text import ExtractedText
+from app.models.file_blob import FileBlob
+from app.models.upload_session import UploadSession, UploadPart
@@ -11,6 +11,7 @@ class Assignment(db.Model):
     file_name = db.Column(db.String(255), nullable=False)  # Original filename
     file_type = db.Column(db.String(50), nullable=False)   # File extension/MIME type
     file_size = db.Column(db.Integer, nullable=False)      # File size in bytes
+    content_hash = db.Column(db.String(64), index=True)    # SHA-256 of the file bytes
     deadline = db.Column(db.DateTime)                      # Assignment deadline
     is_submitted = db.Column(db.Boolean, default=False)    # Whether formally submitted
     submitted_at = db.Column(db.DateTime)                  # When submitted
@@ -38,6 +39,7 @@ class Assignment(db.Model):
             'file_name': self.file_name,
             'file_type': self.file_type,
             'file_size': self.file_size,
+            'content_hash': self.content_hash,
             'deadline': self.deadline.isoformat() if self.deadline else None,
             'is_submitted': self.is_submitted,
             'submitted_at': self.submitted_at.isoformat() if self.submitted_at else None,
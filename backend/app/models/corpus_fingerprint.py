@@ -0,0 +1,14 @@
+from app.extensions import db
+
+class CorpusFingerprint(db.Model):
+    __tablename__ = 'corpus_fingerprints'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    fingerprint = db.Column(db.BigInteger, nullable=False, index=True)  # Winnowed k-gram hash
+    position = db.Column(db.Integer, nullable=False)  # Token position of the k-gram in the normalized text
+    
+    # Foreign Keys
+    assignment_id = db.Column(db.Integer, db.ForeignKey('assignments.id', ondelete='CASCADE'), nullable=False, index=True)
+    
+    def __repr__(self):
+        return f'<CorpusFingerprint {self.fingerprint} for Assignment {self.assignment_id}>'
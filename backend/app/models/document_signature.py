@@ -0,0 +1,29 @@
+from datetime import datetime
+from app.extensions import db
+
+class DocumentSignature(db.Model):
+    __tablename__ = 'document_signatures'
+
+    id = db.Column(db.Integer, primary_key=True)
+    signature = db.Column(db.LargeBinary, nullable=False)  # MinHash values packed as little-endian uint32
+    num_perm = db.Column(db.Integer, nullable=False)  # Number of MinHash permutations in the signature
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    # Foreign Keys
+    assignment_id = db.Column(db.Integer, db.ForeignKey('assignments.id', ondelete='CASCADE'), nullable=False, unique=True)
+
+    def __repr__(self):
+        return f'<DocumentSignature for Assignment {self.assignment_id}>'
+
+class LshBucket(db.Model):
+    __tablename__ = 'lsh_buckets'
+
+    id = db.Column(db.Integer, primary_key=True)
+    band = db.Column(db.Integer, nullable=False)  # Band index within the signature
+    bucket = db.Column(db.BigInteger, nullable=False, index=True)  # Hash of the band rows (unique across bands)
+
+    # Foreign Keys
+    assignment_id = db.Column(db.Integer, db.ForeignKey('assignments.id', ondelete='CASCADE'), nullable=False, index=True)
+
+    def __repr__(self):
+        return f'<LshBucket band {self.band} for Assignment {self.assignment_id}>'
@@ -0,0 +1,17 @@
+from datetime import datetime
+from app.extensions import db
+
+class ExtractedText(db.Model):
+    __tablename__ = 'extracted_texts'
+
+    id = db.Column(db.Integer, primary_key=True)
+    content_hash = db.Column(db.String(64), nullable=False, unique=True)  # SHA-256 of the file bytes
+    extractor_version = db.Column(db.Integer, nullable=False)  # Extraction code version that produced the text
+    text = db.Column(db.Text(length=2**32 - 1), nullable=False)  # LONGTEXT on MySQL
+    page_starts = db.Column(db.JSON)  # Character offset where each page starts (None without pages)
+    char_count = db.Column(db.Integer, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    last_used_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<ExtractedText {self.content_hash[:12]} ({self.char_count} chars)>'
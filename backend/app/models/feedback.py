@@ -11,10 +11,12 @@ class Feedback(db.Model):
     clarity_score = db.Column(db.Float)  # Score from 0-10 for clarity
     structure_feedback = db.Column(db.Text)  # Feedback on document structure
     readability_score = db.Column(db.Float)  # Readability score
+    readability_metrics = db.Column(db.JSON)  # Flesch, Flesch-Kincaid, Coleman-Liau, ARI and SMOG
     
     # AI suggestions
     improvement_suggestions = db.Column(db.JSON)  # Content improvement suggestions
     rewrite_suggestions = db.Column(db.JSON)  # Suggested rewrites for specific sections
+    analysis_units = db.Column(db.JSON)  # Per-unit analysis results reused when a revision is analyzed
     
     # Instructor feedback
     instructor_comments = db.Column(db.Text)  # Comments from instructor
@@ -42,6 +44,7 @@ class Feedback(db.Model):
             'clarity_score': self.clarity_score,
             'structure_feedback': self.structure_feedback,
             'readability_score': self.readability_score,
+            'readability_metrics': self.readability_metrics,
             'improvement_suggestions': self.improvement_suggestions,
             'rewrite_suggestions': self.rewrite_suggestions,
             'instructor_comments': self.instructor_comments,
@@ -0,0 +1,15 @@
+from datetime import datetime
+from app.extensions import db
+
+class FileBlob(db.Model):
+    __tablename__ = 'file_blobs'
+
+    id = db.Column(db.Integer, primary_key=True)
+    content_hash = db.Column(db.String(64), nullable=False, index=True)  # SHA-256 of the file bytes
+    file_path = db.Column(db.String(255), nullable=False, unique=True)  # Path relative to the upload folder
+    file_size = db.Column(db.BigInteger, nullable=False)  # File size in bytes
+    ref_count = db.Column(db.Integer, nullable=False, default=1)  # Number of assignments using this file
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<FileBlob {self.file_path} refs={self.ref_count}>'
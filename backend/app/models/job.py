@@ -0,0 +1,66 @@
+from datetime import datetime
+from app.extensions import db
+
+class Job(db.Model):
+    __tablename__ = 'jobs'
+
+    id = db.Column(db.String(36), primary_key=True)  # UUID
+    job_type = db.Column(db.String(50), nullable=False)  # feedback-analysis, plagiarism-check
+    status = db.Column(db.String(20), default='queued', index=True)  # queued, running, completed, failed
+    payload = db.Column(db.JSON)  # Request options needed to run the job
+    result_id = db.Column(db.Integer)  # ID of the Feedback / PlagiarismReport produced
+    error = db.Column(db.Text)  # Error message if the job failed
+    attempts = db.Column(db.Integer, default=0)  # Number of times the job was started
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+    worker = db.Column(db.String(255))  # host:pid of the process running the job
+    heartbeat_at = db.Column(db.DateTime)  # Last time that process reported the job still running
+
+    # Foreign Keys
+    assignment_id = db.Column(db.Integer, db.ForeignKey('assignments.id', ondelete='CASCADE'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+
+    def __repr__(self):
+        return f'<Job {self.id} {self.job_type} {self.status}>'
+
+    def get_result(self):
+        """Load the Feedback / PlagiarismReport produced by a completed job"""
+        if self.status != 'completed' or self.result_id is None:
+            return None
+
+        # Import here to avoid circular imports
+        from app.models.feedback import Feedback
+        from app.models.plagiarism_report import PlagiarismReport
+
+        model = {'feedback-analysis': Feedback, 'plagiarism-check': PlagiarismReport}.get(self.job_type)
+        return model.query.get(self.result_id) if model else None
+
+    def to_dict(self, show_matched_assignments=False):
+        """Convert job to dictionary (see PlagiarismReport.to_dict for show_matched_assignments)"""
+        result = self.get_result()
+        wait_time = None
+        if self.started_at:
+            wait_time = (self.started_at - self.created_at).total_seconds()
+
+        return {
+            'id': self.id,
+            'job_type': self.job_type,
+            'status': self.status,
+            'error': self.error,
+            'attempts': self.attempts,
+            'created_at': self.created_at.isoformat(),
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+            'wait_time': wait_time,
+            'assignment_id': self.assignment_id,
+            'result': self._result_dict(result, show_matched_assignments)
+        }
+
+    def _result_dict(self, result, show_matched_assignments):
+        """Dictionary of the job result, None until completed"""
+        if result is None:
+            return None
+        if self.job_type == 'plagiarism-check':
+            return result.to_dict(show_matched_assignments=show_matched_assignments)
+        return result.to_dict()
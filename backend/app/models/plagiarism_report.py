@@ -21,13 +21,27 @@ class PlagiarismReport(db.Model):
     def __repr__(self):
         return f'<PlagiarismReport for Assignment {self.assignment_id}, Score: {self.similarity_score}%>'
     
-    def to_dict(self):
-        """Convert plagiarism report to dictionary"""
+    def to_dict(self, show_matched_assignments=False):
+        """
+        Convert plagiarism report to dictionary
+        
+        Stored submissions the check was compared against are listed in
+        corpus_matches. Their assignment ids and titles belong to other
+        students and are only included with show_matched_assignments.
+        """
+        corpus_matches = (self.report_data or {}).get('corpus_matches', [])
+        if not show_matched_assignments:
+            corpus_matches = [
+                {key: value for key, value in match.items() if key not in ('assignment_id', 'title')}
+                for match in corpus_matches
+            ]
+        
         return {
             'id': self.id,
             'similarity_score': self.similarity_score,
             'flagged_sections': self.flagged_sections,
             'sources': self.sources,
+            'corpus_matches': corpus_matches,
             'generated_at': self.generated_at.isoformat(),
             'updated_at': self.updated_at.isoformat(),
             'assignment_id': self.assignment_id
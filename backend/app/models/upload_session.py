@@ -0,0 +1,68 @@
+from datetime import datetime
+from app.extensions import db
+
+class UploadSession(db.Model):
+    __tablename__ = 'upload_sessions'
+
+    id = db.Column(db.String(36), primary_key=True)  # UUID
+    file_name = db.Column(db.String(255), nullable=False)  # Original filename
+    file_type = db.Column(db.String(50), nullable=False)  # File extension
+    file_size = db.Column(db.BigInteger, nullable=False)  # Declared total size in bytes
+    part_size = db.Column(db.Integer, nullable=False)  # Size of every part except the last
+    total_parts = db.Column(db.Integer, nullable=False)
+    title = db.Column(db.String(255), nullable=False)
+    description = db.Column(db.Text)
+    deadline = db.Column(db.DateTime)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    expires_at = db.Column(db.DateTime, nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='open', server_default='open')  # open, finalizing, completed
+
+    # Foreign Keys
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+
+    # Relationships
+    parts = db.relationship('UploadPart', back_populates='upload_session', cascade="all, delete-orphan", order_by='UploadPart.part_number')
+
+    def __repr__(self):
+        return f'<UploadSession {self.id} {self.file_name}>'
+
+    def expected_part_size(self, part_number):
+        """Size in bytes of a part (the last part holds the remainder)"""
+        if part_number < self.total_parts:
+            return self.part_size
+        return self.file_size - self.part_size * (self.total_parts - 1)
+
+    def to_dict(self):
+        """Convert upload session to dictionary"""
+        return {
+            'id': self.id,
+            'file_name': self.file_name,
+            'file_type': self.file_type,
+            'file_size': self.file_size,
+            'part_size': self.part_size,
+            'total_parts': self.total_parts,
+            'received_parts': [part.part_number for part in self.parts],
+            'title': self.title,
+            'status': self.status,
+            'created_at': self.created_at.isoformat(),
+            'expires_at': self.expires_at.isoformat()
+        }
+
+class UploadPart(db.Model):
+    __tablename__ = 'upload_parts'
+    __table_args__ = (db.UniqueConstraint('session_id', 'part_number'),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    part_number = db.Column(db.Integer, nullable=False)  # 1-based position in the file
+    size = db.Column(db.Integer, nullable=False)  # Bytes received
+    checksum = db.Column(db.String(64), nullable=False)  # SHA-256 of the part
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    # Foreign Keys
+    session_id = db.Column(db.String(36), db.ForeignKey('upload_sessions.id', ondelete='CASCADE'), nullable=False)
+
+    # Relationships
+    upload_session = db.relationship('UploadSession', back_populates='parts')
+
+    def __repr__(self):
+        return f'<UploadPart {self.part_number} of {self.session_id}>'
@@ -0,0 +1,47 @@
+from datetime import datetime
+from flask import current_app
+from app.extensions import db
+from app.models.assignment import Assignment
+
+def select_assignments(data):
+    """
+    Load a group of assignments selected by a request body
+
+    The group is given by explicit assignment_ids, or by a title (substring)
+    and/or deadline (ISO date or datetime, matched by day) filter. Either way
+    it may hold at most SELECTION_MAX_ASSIGNMENTS assignments.
+
+    Returns:
+        Tuple of (list of assignments, error message); the list is None on invalid input
+    """
+    max_assignments = current_app.config.get('SELECTION_MAX_ASSIGNMENTS', 500)
+    query = Assignment.query
+
+    if data.get('assignment_ids'):
+        assignment_ids = data['assignment_ids']
+        if not isinstance(assignment_ids, list) or not all(
+            isinstance(assignment_id, int) and not isinstance(assignment_id, bool) for assignment_id in assignment_ids
+        ):
+            return None, "assignment_ids must be a list of integers"
+        if len(set(assignment_ids)) > max_assignments:
+            return None, f"At most {max_assignments} assignments can be selected at once"
+        return query.filter(Assignment.id.in_(assignment_ids)).all(), None
+
+    if not (data.get('title') or data.get('deadline')):
+        return None, "Provide assignment_ids or a title/deadline filter"
+
+    if data.get('title'):
+        if not isinstance(data['title'], str):
+            return None, "title must be a string"
+        query = query.filter(Assignment.title.ilike(f"%{data['title']}%"))
+    if data.get('deadline'):
+        try:
+            deadline = datetime.fromisoformat(data['deadline'])
+        except (TypeError, ValueError):
+            return None, "Invalid deadline format. Use ISO format (YYYY-MM-DDTHH:MM:SS)"
+        query = query.filter(db.func.date(Assignment.deadline) == deadline.date())
+
+    assignments = query.order_by(Assignment.id).limit(max_assignments + 1).all()
+    if len(assignments) > max_assignments:
+        return None, f"The filter matches more than {max_assignments} assignments; narrow it or pass assignment_ids"
+    return assignments, None
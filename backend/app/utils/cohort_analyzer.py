@@ -0,0 +1,199 @@
+import os
+import numpy as np
+from scipy import sparse
+from flask import current_app
+from app.extensions import db
+from app.models.corpus_fingerprint import CorpusFingerprint
+from app.utils.corpus_index import CorpusIndex
+from app.utils.plagiarism_detector import PlagiarismDetector
+from app.utils.profiling import timed, count
+
+class CohortAnalyzer:
+    """Pairwise collusion detection across a set of assignments using shared fingerprints"""
+
+    def __init__(self, detector=None, max_spans=10, snippet_length=300):
+        self.detector = detector or PlagiarismDetector()
+        self.max_spans = max_spans  # Overlapping spans reported per pair
+        self.snippet_length = snippet_length  # Maximum characters of text shown per span
+
+    @timed('fingerprint_lookup')
+    def load_fingerprints(self, assignments):
+        """
+        Load the fingerprints of every assignment from the corpus index
+
+        Assignments that were never indexed are extracted and indexed once.
+
+        Returns:
+            Dict of assignment_id -> list of (fingerprint, position) tuples
+        """
+        ids = [assignment.id for assignment in assignments]
+        prints = {assignment_id: [] for assignment_id in ids}
+
+        rows = db.session.query(
+            CorpusFingerprint.assignment_id, CorpusFingerprint.fingerprint, CorpusFingerprint.position
+        ).filter(CorpusFingerprint.assignment_id.in_(ids))
+        for assignment_id, fingerprint, position in rows:
+            prints[assignment_id].append((fingerprint, position))
+
+        missing = [assignment for assignment in assignments if not prints[assignment.id]]
+        for assignment in missing:
+            document = self._extract(assignment)
+            if document:
+                CorpusIndex.add_assignment(assignment.id, document, self.detector)
+                prints[assignment.id] = CorpusIndex.fingerprint_text(document, self.detector)
+        if missing:
+            db.session.commit()
+
+        return prints
+
+    @timed('similarity')
+    def similarity_matrix(self, prints):
+        """
+        Compute shared fingerprint counts for all pairs as one sparse matrix product
+
+        Returns:
+            Tuple of (assignment ids, sparse upper-triangular shared-count matrix, fingerprint counts)
+        """
+        ids = list(prints)
+        count('comparisons', len(ids) * (len(ids) - 1) // 2)
+        vocabulary = {}
+        rows, cols = [], []
+
+        for row, assignment_id in enumerate(ids):
+            for fingerprint in {fingerprint for fingerprint, _ in prints[assignment_id]}:
+                rows.append(row)
+                cols.append(vocabulary.setdefault(fingerprint, len(vocabulary)))
+
+        incidence = sparse.csr_matrix(
+            (np.ones(len(rows), dtype=np.int32), (rows, cols)),
+            shape=(len(ids), len(vocabulary))
+        )
+        sizes = np.asarray(incidence.sum(axis=1)).ravel()
+        shared = sparse.triu(incidence @ incidence.T, k=1).tocoo()
+
+        return ids, shared, sizes
+
+    def top_pairs(self, prints, limit=20, min_similarity=0.2):
+        """
+        Find the most suspicious pairs of assignments
+
+        Args:
+            prints: Dict of assignment_id -> list of (fingerprint, position) tuples
+            limit: Maximum number of pairs to return
+            min_similarity: Minimum containment (shared / smaller fingerprint set)
+
+        Returns:
+            List of pair dicts, most similar first
+        """
+        ids, shared, sizes = self.similarity_matrix(prints)
+        if not shared.nnz:
+            return []
+
+        size_a, size_b = sizes[shared.row], sizes[shared.col]
+        containment = shared.data / np.maximum(np.minimum(size_a, size_b), 1)
+        jaccard = shared.data / np.maximum(size_a + size_b - shared.data, 1)
+
+        keep = np.flatnonzero(containment >= min_similarity)
+        order = keep[np.lexsort((-jaccard[keep], -containment[keep]))][:limit]
+
+        return [
+            {
+                'assignment_id': ids[shared.row[i]],
+                'other_assignment_id': ids[shared.col[i]],
+                'shared_fingerprints': int(shared.data[i]),
+                'containment': float(containment[i]),
+                'jaccard': float(jaccard[i])
+            }
+            for i in order
+        ]
+
+    @timed('span_alignment')
+    def overlapping_spans(self, prints_a, prints_b, words_a, words_b):
+        """
+        Merge shared fingerprints of two documents into aligned token spans
+
+        Returns:
+            List of span dicts with token ranges and the overlapping text
+        """
+        k = self.detector.winnower.k
+        gap = self.detector.winnower.window + k
+
+        first_b = {}
+        for fingerprint, position in prints_b:
+            first_b.setdefault(fingerprint, position)
+
+        matches = sorted((position, first_b[fingerprint]) for fingerprint, position in prints_a if fingerprint in first_b)
+
+        spans = []
+        for position_a, position_b in matches:
+            last = spans[-1] if spans else None
+            if (last and position_a - last['end'] <= gap and
+                    0 <= position_b - last['other_end'] + k <= gap + k):
+                last['end'] = max(last['end'], position_a + k)
+                last['other_end'] = max(last['other_end'], position_b + k)
+            else:
+                spans.append({
+                    'start': position_a,
+                    'end': position_a + k,
+                    'other_start': position_b,
+                    'other_end': position_b + k
+                })
+
+        spans.sort(key=lambda span: span['end'] - span['start'], reverse=True)
+
+        return [
+            {
+                'start_token': span['start'],
+                'end_token': span['end'],
+                'other_start_token': span['other_start'],
+                'other_end_token': span['other_end'],
+                'text': ' '.join(words_a[span['start']:span['end']])[:self.snippet_length],
+                'other_text': ' '.join(words_b[span['other_start']:span['other_end']])[:self.snippet_length]
+            }
+            for span in spans[:self.max_spans]
+        ]
+
+    def analyze(self, assignments, limit=20, min_similarity=0.2):
+        """
+        Compute the top suspicious pairs of a cohort with their overlapping spans
+
+        Args:
+            assignments: Assignments to compare against each other
+            limit: Maximum number of pairs to return
+            min_similarity: Minimum containment for a pair to be reported
+
+        Returns:
+            Dict with the compared assignment count and the top pairs
+        """
+        prints = self.load_fingerprints(assignments)
+        pairs = self.top_pairs(prints, limit, min_similarity)
+
+        # Only documents in the reported pairs are re-read to show the overlapping text
+        by_id = {assignment.id: assignment for assignment in assignments}
+        words = {}
+        for pair in pairs:
+            for assignment_id in (pair['assignment_id'], pair['other_assignment_id']):
+                if assignment_id not in words:
+                    document = self._extract(by_id[assignment_id])
+                    words[assignment_id] = document.words if document else []
+
+            pair['title'] = by_id[pair['assignment_id']].title
+            pair['other_title'] = by_id[pair['other_assignment_id']].title
+            pair['user_id'] = by_id[pair['assignment_id']].user_id
+            pair['other_user_id'] = by_id[pair['other_assignment_id']].user_id
+            pair['spans'] = self.overlapping_spans(
+                prints[pair['assignment_id']],
+                prints[pair['other_assignment_id']],
+                words[pair['assignment_id']],
+                words[pair['other_assignment_id']]
+            )
+
+        return {
+            'assignments_compared': len(prints),
+            'pairs': pairs
+        }
+
+    def _extract(self, assignment):
+        """Extract and preprocess the text of an assignment file"""
+        file_path = os.path.join(current_app.config['UPLOAD_FOLDER'], assignment.file_path)
+        return self.detector.preprocess_file(file_path)[0]
@@ -0,0 +1,195 @@
+import os
+from collections import Counter
+from flask import current_app
+from sqlalchemy import func
+from app.extensions import db
+from app.models.assignment import Assignment
+from app.models.corpus_fingerprint import CorpusFingerprint
+from app.models.document_signature import DocumentSignature, LshBucket
+from app.utils.plagiarism_detector import PlagiarismDetector
+
+class CorpusIndex:
+    """Persistent inverted index of winnowed fingerprints over all stored assignments"""
+
+    LOOKUP_BATCH_SIZE = 500  # Fingerprints per IN (...) lookup query
+    SOURCE_PREFIX = 'corpus:'  # Prefix of corpus source names; reserved, clients can't use it
+
+    @staticmethod
+    def fingerprint_text(text, detector=None):
+        """Return the winnowed (hash, position) fingerprints of a text or PreprocessedText"""
+        detector = detector or PlagiarismDetector()
+        return detector.winnower.fingerprint(detector.preprocess(text).words)
+
+    @staticmethod
+    def add_assignment(assignment_id, text, detector=None):
+        """Index the text of an assignment, replacing any previous entries"""
+        detector = detector or PlagiarismDetector()
+        CorpusIndex.remove_assignment(assignment_id)
+
+        fingerprints = CorpusIndex.fingerprint_text(text, detector)
+        db.session.bulk_insert_mappings(CorpusFingerprint, [
+            {'fingerprint': fingerprint, 'position': position, 'assignment_id': assignment_id}
+            for fingerprint, position in fingerprints
+        ])
+
+        # Store the MinHash signature and its LSH bands for near-duplicate lookups;
+        # documents without shingles have none and are never near-duplicates
+        signature = detector.minhash_signature(text)
+        if not signature:
+            return len(fingerprints)
+
+        db.session.add(DocumentSignature(
+            assignment_id=assignment_id,
+            signature=detector.minhasher.to_bytes(signature),
+            num_perm=detector.minhasher.num_perm
+        ))
+        db.session.bulk_insert_mappings(LshBucket, [
+            {'band': band, 'bucket': bucket, 'assignment_id': assignment_id}
+            for band, bucket in detector.minhasher.band_hashes(signature)
+        ])
+
+        return len(fingerprints)
+
+    @staticmethod
+    def remove_assignment(assignment_id):
+        """Remove all index entries of an assignment"""
+        LshBucket.query.filter_by(assignment_id=assignment_id).delete(synchronize_session=False)
+        DocumentSignature.query.filter_by(assignment_id=assignment_id).delete(synchronize_session=False)
+        return CorpusFingerprint.query.filter_by(assignment_id=assignment_id).delete(synchronize_session=False)
+
+    @staticmethod
+    def get_signature(assignment_id, minhasher):
+        """Return the stored MinHash signature of an assignment, or None if missing or outdated"""
+        stored = DocumentSignature.query.filter_by(assignment_id=assignment_id).first()
+        if not stored or stored.num_perm != minhasher.num_perm:
+            return None
+        return minhasher.from_bytes(stored.signature)
+
+    @staticmethod
+    def find_near_duplicates(signature, minhasher, exclude_assignment_id=None, min_similarity=0.5):
+        """
+        Find stored assignments sharing at least one LSH bucket with a signature
+
+        Returns:
+            List of (assignment_id, estimated_similarity) tuples, most similar first
+        """
+        if not signature:
+            return []
+
+        buckets = [bucket for _, bucket in minhasher.band_hashes(signature)]
+        query = db.session.query(LshBucket.assignment_id).filter(LshBucket.bucket.in_(buckets))
+
+        if exclude_assignment_id is not None:
+            query = query.filter(LshBucket.assignment_id != exclude_assignment_id)
+
+        hits = {assignment_id for assignment_id, in query.distinct()}
+        if not hits:
+            return []
+
+        # Verify the bucket hits against their full signatures
+        near_duplicates = []
+        for stored in DocumentSignature.query.filter(DocumentSignature.assignment_id.in_(hits)):
+            if stored.num_perm != minhasher.num_perm:
+                continue
+
+            similarity = minhasher.estimate_similarity(signature, minhasher.from_bytes(stored.signature))
+            if similarity >= min_similarity:
+                near_duplicates.append((stored.assignment_id, similarity))
+
+        return sorted(near_duplicates, key=lambda match: (-match[1], match[0]))
+
+    @staticmethod
+    def find_candidates(text, exclude_assignment_id=None, limit=None, min_shared=None, detector=None):
+        """
+        Find stored assignments that share the most fingerprints with a text
+
+        Args:
+            text: The text to look up
+            exclude_assignment_id: Assignment to leave out (usually the one being checked)
+            limit: Maximum number of candidates to return
+            min_shared: Minimum number of shared fingerprints for a candidate
+            detector: PlagiarismDetector used for normalization and fingerprinting
+
+        Returns:
+            List of (assignment_id, shared_fingerprints) tuples, best match first
+        """
+        if limit is None:
+            limit = current_app.config.get('CORPUS_CANDIDATE_LIMIT', 10)
+        if min_shared is None:
+            min_shared = current_app.config.get('CORPUS_MIN_SHARED_FINGERPRINTS', 5)
+
+        hashes = list({fingerprint for fingerprint, _ in CorpusIndex.fingerprint_text(text, detector)})
+        shared = Counter()
+
+        # Hashes are distinct, so per-batch distinct counts can simply be summed
+        for i in range(0, len(hashes), CorpusIndex.LOOKUP_BATCH_SIZE):
+            batch = hashes[i:i + CorpusIndex.LOOKUP_BATCH_SIZE]
+            query = db.session.query(
+                CorpusFingerprint.assignment_id,
+                func.count(func.distinct(CorpusFingerprint.fingerprint))
+            ).filter(CorpusFingerprint.fingerprint.in_(batch))
+
+            if exclude_assignment_id is not None:
+                query = query.filter(CorpusFingerprint.assignment_id != exclude_assignment_id)
+
+            for assignment_id, count in query.group_by(CorpusFingerprint.assignment_id):
+                shared[assignment_id] += count
+
+        return [(assignment_id, count) for assignment_id, count in shared.most_common(limit) if count >= min_shared]
+
+    @staticmethod
+    def get_candidate_sources(text, exclude_assignment_id=None, limit=None, detector=None):
+        """
+        Load the preprocessed texts of the best matching stored assignments as comparison sources
+        
+        Near-duplicates found through the LSH buckets come first, followed by the
+        assignments sharing the most fingerprints, up to limit candidates in total.
+
+        Returns:
+            Tuple of (comparison_sources dict, list of match details)
+        """
+        detector = detector or PlagiarismDetector()
+        if limit is None:
+            limit = current_app.config.get('CORPUS_CANDIDATE_LIMIT', 10)
+
+        signature = None
+        if exclude_assignment_id is not None:
+            signature = CorpusIndex.get_signature(exclude_assignment_id, detector.minhasher)
+
+        candidates = {}
+        for assignment_id, estimate in detector.find_near_duplicates(text, exclude_assignment_id, signature=signature):
+            candidates[assignment_id] = {'estimated_similarity': estimate}
+
+        for assignment_id, shared in CorpusIndex.find_candidates(text, exclude_assignment_id, limit, detector=detector):
+            candidates.setdefault(assignment_id, {})['shared_fingerprints'] = shared
+
+        candidate_ids = list(candidates)[:limit]
+        if not candidate_ids:
+            return {}, []
+
+        assignments = {a.id: a for a in Assignment.query.filter(Assignment.id.in_(candidate_ids))}
+        upload_folder = current_app.config['UPLOAD_FOLDER']
+
+        sources = {}
+        matches = []
+        for assignment_id in candidate_ids:
+            assignment = assignments.get(assignment_id)
+            if not assignment:
+                continue
+
+            source, _ = detector.preprocess_file(os.path.join(upload_folder, assignment.file_path))
+            if not source:
+                continue
+
+            # Named by rank: the assignment behind a source is only listed in the match details
+            source_name = f"{CorpusIndex.SOURCE_PREFIX}submission-{len(matches) + 1}"
+            sources[source_name] = source
+            matches.append({
+                'source': source_name,
+                'assignment_id': assignment.id,
+                'title': assignment.title,
+                'estimated_similarity': candidates[assignment_id].get('estimated_similarity'),
+                'shared_fingerprints': candidates[assignment_id].get('shared_fingerprints', 0)
+            })
+
+        return sources, matches
@@ -1,12 +1,19 @@
 import os
 import uuid
+import hashlib
+import mimetypes
 from datetime import datetime
+from sqlalchemy.exc import IntegrityError
 from werkzeug.utils import secure_filename
-from flask import current_app, send_file
+from flask import current_app, request, send_file
+from app.extensions import db
+from app.models.file_blob import FileBlob
 
 class FileHandler:
     """Utility class for file operations"""
 
+    BLOCK_SIZE = 1024 * 1024  # Bytes copied at a time when saving uploads
+
     @staticmethod
     def get_file_extension(filename):
         """Extract file extension from a filename"""
@@ -35,56 +42,236 @@ class FileHandler:
         
     @staticmethod
     def save_file(file, subfolder=""):
-        """Save an uploaded file to the upload folder"""
+        """
+        Save an uploaded file to the upload folder
+        
+        The upload is hashed while it streams to disk and stored once per
+        content hash; identical uploads share the stored file.
+        """
         # Secure the original filename
         original_filename = secure_filename(file.filename)
         
-        # Generate a unique filename
-        unique_filename = FileHandler.generate_unique_filename(original_filename)
-        
         # Determine the upload path
         upload_folder = current_app.config['UPLOAD_FOLDER']
-        if subfolder:
-            upload_path = os.path.join(upload_folder, subfolder)
-            os.makedirs(upload_path, exist_ok=True)
-        else:
-            upload_path = upload_folder
-            
-        # Save the file
-        file_path = os.path.join(upload_path, unique_filename)
-        file.save(file_path)
+        upload_path = os.path.join(upload_folder, subfolder) if subfolder else upload_folder
+        os.makedirs(upload_path, exist_ok=True)
+        
+        # Stream the file to a temporary name, hashing it on the way
+        temp_path = os.path.join(upload_path, f".upload_{uuid.uuid4().hex}")
+        content_hash, _ = FileHandler.write_stream(file.stream, temp_path)
+        
+        return FileHandler.store_file(temp_path, content_hash, original_filename, subfolder)
+    
+    @staticmethod
+    def write_stream(stream, file_path):
+        """
+        Copy a binary stream to a file in fixed-size blocks, hashing it on the way
+        
+        Returns:
+            Tuple of (SHA-256 hex digest, size in bytes)
+        """
+        digest = hashlib.sha256()
+        size = 0
+        with open(file_path, 'wb') as out:
+            for block in iter(lambda: stream.read(FileHandler.BLOCK_SIZE), b''):
+                digest.update(block)
+                out.write(block)
+                size += len(block)
+        return digest.hexdigest(), size
+    
+    @staticmethod
+    def concatenate_files(part_paths, file_path):
+        """
+        Concatenate files in order into file_path, hashing the result on the way
+        
+        Returns:
+            Tuple of (SHA-256 hex digest, size in bytes)
+        """
+        digest = hashlib.sha256()
+        size = 0
+        with open(file_path, 'wb') as out:
+            for part_path in part_paths:
+                with open(part_path, 'rb') as part:
+                    for block in iter(lambda: part.read(FileHandler.BLOCK_SIZE), b''):
+                        digest.update(block)
+                        out.write(block)
+                        size += len(block)
+        return digest.hexdigest(), size
+    
+    @staticmethod
+    def store_file(temp_path, content_hash, original_filename, subfolder=""):
+        """
+        Store a fully written upload and describe it like save_file does
         
-        # Calculate relative path
-        relative_path = os.path.join(subfolder, unique_filename) if subfolder else unique_filename
+        Returns:
+            Dict of file metadata (paths, size, type and content hash)
+        """
+        file_type = FileHandler.get_file_extension(original_filename)
+        relative_path = FileHandler.store_blob(temp_path, content_hash, file_type, subfolder)
+        file_path = os.path.join(current_app.config['UPLOAD_FOLDER'], relative_path)
         
         return {
             'original_filename': original_filename,
-            'saved_filename': unique_filename,
+            'saved_filename': os.path.basename(relative_path),
             'file_path': file_path,
             'relative_path': relative_path,
             'file_size': os.path.getsize(file_path),
-            'file_type': FileHandler.get_file_extension(original_filename)
+            'file_type': file_type,
+            'content_hash': content_hash
         }
+    
+    @staticmethod
+    def store_blob(temp_path, content_hash, file_type, subfolder=""):
+        """
+        Move a fully written file into content-addressed storage
+        
+        The file is kept under its content hash. If the same bytes are already
+        stored, the new copy is dropped and the stored file gets one more
+        reference. The caller commits the session.
+        
+        Returns:
+            Path of the stored file relative to the upload folder
+        """
+        saved_filename = f"{content_hash}{file_type}"
+        relative_path = os.path.join(subfolder, content_hash[:2], saved_filename) if subfolder else os.path.join(content_hash[:2], saved_filename)
+        file_path = os.path.join(current_app.config['UPLOAD_FOLDER'], relative_path)
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        
+        referenced = FileBlob.query.filter_by(file_path=relative_path).update(
+            {'ref_count': FileBlob.ref_count + 1}, synchronize_session=False
+        )
+        if referenced and os.path.exists(file_path):
+            os.remove(temp_path)
+            return relative_path
+        
+        os.replace(temp_path, file_path)
+        if not referenced:
+            try:
+                with db.session.begin_nested():
+                    db.session.add(FileBlob(
+                        content_hash=content_hash,
+                        file_path=relative_path,
+                        file_size=os.path.getsize(file_path),
+                        ref_count=1
+                    ))
+            except IntegrityError:
+                # The same bytes were stored concurrently by another upload
+                FileBlob.query.filter_by(file_path=relative_path).update(
+                    {'ref_count': FileBlob.ref_count + 1}, synchronize_session=False
+                )
+        
+        return relative_path
         
     @staticmethod
-    def get_file(relative_path):
-        """Retrieve a file by its relative path"""
+    def get_file(relative_path, download_name=None, etag=None):
+        """
+        Retrieve a file by its relative path
+        
+        Responses are conditional: If-None-Match is answered with 304 and Range
+        requests with partial content. With DOWNLOAD_OFFLOAD set to
+        "x-accel-redirect" or "x-sendfile" the reverse proxy sends the bytes
+        after the access check.
+        
+        Args:
+            relative_path: Path of the file relative to the upload folder
+            download_name: Filename shown to the client
+            etag: Strong ETag (e.g. the content hash); derived from the file if omitted
+        """
         upload_folder = current_app.config['UPLOAD_FOLDER']
         file_path = os.path.join(upload_folder, relative_path)
         
         if not os.path.exists(file_path):
             return None
-            
-        return send_file(file_path)
+        
+        # X-Sendfile is handled by send_file itself through USE_X_SENDFILE
+        if current_app.config.get('DOWNLOAD_OFFLOAD') == 'x-accel-redirect':
+            response = FileHandler._accel_redirect(relative_path, file_path, download_name, etag)
+        else:
+            response = send_file(
+                file_path,
+                download_name=download_name,
+                etag=etag if etag else True,
+                conditional=True,
+                max_age=0
+            )
+        
+        # Downloads need authentication, so shared caches must not keep them
+        response.cache_control.private = True
+        return response
+    
+    @staticmethod
+    def _accel_redirect(relative_path, file_path, download_name, etag):
+        """Build an empty response that makes nginx serve the file from its internal location"""
+        download_name = download_name or os.path.basename(file_path)
+        response = current_app.response_class(
+            mimetype=mimetypes.guess_type(download_name)[0] or 'application/octet-stream'
+        )
+        response.headers.set('Content-Disposition', 'inline', filename=download_name)
+        response.set_etag(etag or FileHandler._file_etag(file_path))
+        response.last_modified = datetime.utcfromtimestamp(os.path.getmtime(file_path))
+        response.cache_control.no_cache = True
+        
+        # Answer If-None-Match here; nginx handles Range on the internal location
+        response.make_conditional(request)
+        if response.status_code == 200:
+            prefix = current_app.config.get('DOWNLOAD_ACCEL_PREFIX', '/protected-uploads/')
+            response.headers['X-Accel-Redirect'] = prefix.rstrip('/') + '/' + relative_path.replace(os.sep, '/')
+        return response
+    
+    @staticmethod
+    def _file_etag(file_path):
+        """ETag of a file without a stored content hash (mtime and size)"""
+        stat = os.stat(file_path)
+        return f"{int(stat.st_mtime)}-{stat.st_size}"
         
     @staticmethod
-    def delete_file(relative_path):
-        """Delete a file by its relative path"""
+    def release_file(relative_path):
+        """
+        Drop one reference to a stored file
+        
+        A shared file only loses one reference. The caller commits the session
+        and then removes the file with remove_released_file, so a failed commit
+        never leaves a row pointing at a deleted file. The blob row is kept,
+        unreferenced, until the file is removed.
+        
+        Returns:
+            Relative path to remove once committed, or None if the file is still referenced
+        """
+        blob = FileBlob.query.filter_by(file_path=relative_path).first()
+        if blob is not None:
+            FileBlob.query.filter_by(id=blob.id).update(
+                {'ref_count': FileBlob.ref_count - 1}, synchronize_session=False
+            )
+            unreferenced = FileBlob.query.filter(FileBlob.id == blob.id, FileBlob.ref_count <= 0).count()
+            if not unreferenced:
+                return None
+        
+        return relative_path
+    
+    @staticmethod
+    def remove_released_file(relative_path):
+        """
+        Delete a file released by a committed transaction from disk (commits)
+        
+        The blob row is deleted, if still unreferenced, in the transaction
+        that removes the file. An upload of the same bytes updates that row
+        in store_blob, so it either referenced it first and the file is kept,
+        or waits for this transaction and then stores its own copy again.
+        """
+        blob = FileBlob.query.filter_by(file_path=relative_path).first()
+        if blob is not None:
+            deleted = FileBlob.query.filter(FileBlob.id == blob.id, FileBlob.ref_count <= 0).delete(synchronize_session=False)
+            if not deleted:
+                db.session.commit()
+                return False
+        
         upload_folder = current_app.config['UPLOAD_FOLDER']
         file_path = os.path.join(upload_folder, relative_path)
         
+        removed = False
         if os.path.exists(file_path):
             os.remove(file_path)
-            return True
-            
-        return False 
\ No newline at end of file
+            removed = True
+        
+        db.session.commit()
+        return removed
\ No newline at end of file
@@ -0,0 +1,83 @@
+import zlib
+from collections import deque
+
+class Winnower:
+    """Utility class for k-gram winnowing fingerprints over normalized tokens"""
+
+    HASH_BASE = 1000003
+    HASH_MOD = (1 << 61) - 1  # Mersenne prime, keeps hashes within a signed 64-bit column
+
+    def __init__(self, k=5, window=4):
+        self.k = k  # Tokens per k-gram
+        self.window = window  # Number of consecutive k-gram hashes per winnowing window
+        self._high = pow(self.HASH_BASE, k - 1, self.HASH_MOD)
+
+    @staticmethod
+    def hash_token(token):
+        """Stable hash of a single token (identical across processes and restarts)"""
+        return zlib.crc32(token.encode('utf-8'))
+
+    def kgram_hashes(self, tokens, token_hashes=None):
+        """Rolling hash of every k-gram in the token list (position i covers tokens i..i+k-1)"""
+        k = self.k
+        if len(tokens) < k:
+            return []
+
+        base, mod, high = self.HASH_BASE, self.HASH_MOD, self._high
+        if token_hashes is None:
+            token_hashes = [self.hash_token(token) for token in tokens]
+
+        h = 0
+        for i in range(k):
+            h = (h * base + token_hashes[i]) % mod
+        hashes = [h]
+
+        for i in range(k, len(token_hashes)):
+            h = ((h - token_hashes[i - k] * high) * base + token_hashes[i]) % mod
+            hashes.append(h)
+
+        return hashes
+
+    def winnow(self, hashes):
+        """
+        Select fingerprints from a sequence of k-gram hashes
+
+        Picks the rightmost minimal hash of every window, recording it once per
+        position. Any run of at least window + k - 1 shared tokens is guaranteed
+        to produce a shared fingerprint.
+
+        Args:
+            hashes: List of k-gram hashes in token order
+
+        Returns:
+            List of (hash, position) tuples in position order
+        """
+        if not hashes:
+            return []
+
+        w = self.window
+        if len(hashes) <= w:
+            position = min(range(len(hashes)), key=lambda i: (hashes[i], -i))
+            return [(hashes[position], position)]
+
+        fingerprints = []
+        candidates = deque()  # Indexes with strictly increasing hashes
+        last_position = -1
+
+        for i, h in enumerate(hashes):
+            while candidates and hashes[candidates[-1]] >= h:
+                candidates.pop()
+            candidates.append(i)
+
+            if candidates[0] <= i - w:
+                candidates.popleft()
+
+            if i >= w - 1 and candidates[0] != last_position:
+                last_position = candidates[0]
+                fingerprints.append((hashes[last_position], last_position))
+
+        return fingerprints
+
+    def fingerprint(self, tokens, token_hashes=None):
+        """Winnowed fingerprints of a token list as (hash, position) tuples"""
+        return self.winnow(self.kgram_hashes(tokens, token_hashes))
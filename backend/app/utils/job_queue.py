@@ -0,0 +1,259 @@
+import os
+import uuid
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from flask import request
+from sqlalchemy import func
+from app.extensions import db
+from app.models.job import Job
+from app.utils.profiling import profiled
+
+class JobQueue:
+    """Bounded background worker pool for analysis jobs, persisted in the jobs table"""
+
+    def __init__(self):
+        self.app = None
+        self.max_workers = 0
+        self._executor = None
+        self._pid = None  # Process the worker pool was started in
+        self.worker_id = None  # host:pid recorded on the jobs this process runs
+        self._running = set()  # IDs of the jobs run by this process's threads
+        self._start_lock = threading.Lock()
+        self._handlers = {}
+        self._periodic = []  # (interval in seconds, task) of the maintenance tasks
+
+    def register(self, job_type, handler):
+        """
+        Register the function that runs jobs of a type
+
+        The handler is called as handler(job) inside an app context and must
+        return the ID of the result row (or raise on failure).
+        """
+        self._handlers[job_type] = handler
+
+    def schedule(self, interval, task):
+        """
+        Run a maintenance task when the pool starts and every interval seconds
+
+        The task is called as task() on the worker pool inside an app context.
+        Tasks are not persisted: every process serving requests runs its own
+        schedule, so they must be safe to run concurrently.
+        """
+        if (interval, task) not in self._periodic:
+            self._periodic.append((interval, task))
+
+    def init_app(self, app):
+        """
+        Attach the queue to the app
+
+        The worker pool is started by the process serving requests (start),
+        not here: a preloading server (gunicorn --preload) creates the app in
+        its master process, and threads started there don't survive the fork
+        into the workers.
+        """
+        self.app = app
+        self.max_workers = app.config.get('JOB_WORKERS', 2)
+
+    def start(self):
+        """
+        Start the worker pool of this process and resume jobs left over from a previous run
+
+        Does nothing if this process already started it.
+        """
+        with self._start_lock:
+            if self._pid == os.getpid():
+                return
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='job-worker')
+            self._pid = os.getpid()
+            self.worker_id = f"{socket.gethostname()}:{self._pid}"
+            self._running = set()
+
+        with self.app.app_context():
+            # Jobs left "running" by a restart or crash are queued again
+            self._requeue_orphans()
+            pending = [job.id for job in Job.query.filter_by(status='queued').order_by(Job.created_at)]
+
+        for job_id in pending:
+            self._executor.submit(self._run, job_id)
+
+        self._schedule_heartbeat()
+
+        for interval, task in self._periodic:
+            self._run_periodic(interval, task)
+
+    def enqueue(self, job_type, assignment_id, user_id, payload=None):
+        """Persist a new job and hand it to the worker pool"""
+        if job_type not in self._handlers:
+            raise ValueError(f"Unknown job type: {job_type}")
+
+        job = Job(
+            id=str(uuid.uuid4()),
+            job_type=job_type,
+            assignment_id=assignment_id,
+            user_id=user_id,
+            payload=payload or {}
+        )
+        db.session.add(job)
+        db.session.commit()
+
+        # Processes not started by the server hooks (see gunicorn.conf.py) start their pool on first use
+        self.start()
+        self._executor.submit(self._run, job.id)
+        return job
+
+    def _run(self, job_id):
+        """Claim and run a single job in a worker thread"""
+        # Registered before claiming, so the heartbeat never takes a job being claimed for an orphan
+        with self._start_lock:
+            self._running.add(job_id)
+
+        with self.app.app_context():
+            # Claim atomically so a job is never run twice by several processes
+            now = datetime.utcnow()
+            claimed = Job.query.filter_by(id=job_id, status='queued').update({
+                'status': 'running',
+                'started_at': now,
+                'worker': self.worker_id,
+                'heartbeat_at': now,
+                'attempts': Job.attempts + 1
+            }, synchronize_session=False)
+            db.session.commit()
+
+            if not claimed:
+                with self._start_lock:
+                    self._running.discard(job_id)
+                return
+
+            job = Job.query.get(job_id)
+            try:
+                # Queued work is profiled like requests, under the job type
+                with profiled(job.job_type):
+                    result_id = self._handlers[job.job_type](job)
+                job.result_id = result_id
+                job.status = 'completed'
+            except Exception as e:
+                db.session.rollback()
+                job = Job.query.get(job_id)
+                job.status = 'failed'
+                job.error = str(e)
+                print(f"Job {job_id} failed: {str(e)}")
+            finally:
+                with self._start_lock:
+                    self._running.discard(job_id)
+
+            job.finished_at = datetime.utcnow()
+            db.session.commit()
+
+    def _requeue_orphans(self):
+        """
+        Queue again the running jobs whose worker process is gone (commits)
+
+        A job is orphaned when its process no longer exists on this host (or
+        is an earlier process that had this pid), or when its heartbeat is
+        older than JOB_STALE_SECONDS (a process on another host, or a hung one).
+
+        Returns:
+            IDs of the re-queued jobs
+        """
+        host = socket.gethostname()
+        stale_before = datetime.utcnow() - timedelta(seconds=self.app.config.get('JOB_STALE_SECONDS', 120))
+
+        orphaned = []
+        for job in Job.query.filter_by(status='running'):
+            worker_host, _, worker_pid = (job.worker or '').rpartition(':')
+            if job.worker == self.worker_id:
+                with self._start_lock:
+                    gone = job.id not in self._running
+            elif worker_host == host and worker_pid.isdigit():
+                gone = not self._process_alive(int(worker_pid))
+            else:
+                gone = (job.heartbeat_at or job.started_at or job.created_at) < stale_before
+            if gone:
+                orphaned.append(job.id)
+
+        if orphaned:
+            Job.query.filter(Job.id.in_(orphaned), Job.status == 'running').update(
+                {'status': 'queued', 'worker': None}, synchronize_session=False
+            )
+        db.session.commit()
+        return orphaned
+
+    @staticmethod
+    def _process_alive(pid):
+        """Check whether a process exists on this host"""
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except OSError:
+            # Owned by another user, or not probeable on this platform: assume it is alive
+            return True
+        return True
+
+    def _schedule_heartbeat(self):
+        """Run the next heartbeat in JOB_HEARTBEAT_SECONDS"""
+        timer = threading.Timer(self.app.config.get('JOB_HEARTBEAT_SECONDS', 30), self._heartbeat)
+        timer.daemon = True
+        timer.start()
+
+    def _heartbeat(self):
+        """Mark this process's running jobs alive and take over orphaned ones"""
+        with self.app.app_context():
+            try:
+                Job.query.filter_by(worker=self.worker_id, status='running').update(
+                    {'heartbeat_at': datetime.utcnow()}, synchronize_session=False
+                )
+                orphaned = self._requeue_orphans()
+            except Exception as e:
+                db.session.rollback()
+                orphaned = []
+                print(f"Job heartbeat failed: {str(e)}")
+
+        for job_id in orphaned:
+            self._executor.submit(self._run, job_id)
+        self._schedule_heartbeat()
+
+    def _run_periodic(self, interval, task):
+        """Hand a maintenance task to the worker pool and schedule its next run"""
+        self._executor.submit(self._run_task, task)
+        timer = threading.Timer(interval, self._run_periodic, (interval, task))
+        timer.daemon = True
+        timer.start()
+
+    def _run_task(self, task):
+        """Run a maintenance task in a worker thread"""
+        with self.app.app_context():
+            try:
+                task()
+            except Exception as e:
+                db.session.rollback()
+                print(f"Maintenance task {task.__name__} failed: {str(e)}")
+
+    def stats(self):
+        """Queue depth and wait times for operators"""
+        now = datetime.utcnow()
+        counts = dict(db.session.query(Job.status, func.count(Job.id)).group_by(Job.status).all())
+
+        oldest_queued = db.session.query(func.min(Job.created_at)).filter(Job.status == 'queued').scalar()
+        recent = Job.query.filter(Job.started_at.isnot(None)).order_by(Job.started_at.desc()).limit(100).all()
+        waits = [(job.started_at - job.created_at).total_seconds() for job in recent]
+
+        return {
+            'workers': self.max_workers,
+            'queued': counts.get('queued', 0),
+            'running': counts.get('running', 0),
+            'completed': counts.get('completed', 0),
+            'failed': counts.get('failed', 0),
+            'oldest_queued_wait': (now - oldest_queued).total_seconds() if oldest_queued else 0,
+            'average_wait': sum(waits) / len(waits) if waits else 0,
+            'max_wait': max(waits) if waits else 0
+        }
+
+def async_requested():
+    """Check whether the client opted in to asynchronous processing (?async=true)"""
+    return request.args.get('async', '').lower() in ('1', 'true', 'yes')
+
+# Shared queue, attached by create_app and started in each serving process
+job_queue = JobQueue()
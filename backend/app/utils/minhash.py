@@ -0,0 +1,111 @@
+import hashlib
+import random
+import sys
+from array import array
+import numpy as np
+
+class MinHasher:
+    """Utility class for MinHash signatures and locality-sensitive hashing bands"""
+
+    MAX_HASH = (1 << 32) - 1  # Signature values are stored as unsigned 32-bit integers
+    MERSENNE_PRIME = (1 << 61) - 1
+    BLOCK_SIZE = 4096  # Shingles hashed at a time, bounding the (num_perm, block) work arrays
+
+    def __init__(self, num_perm=128, bands=32, seed=1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+
+        # Fixed seed so signatures stay comparable across processes and restarts
+        rng = random.Random(seed)
+        self.permutations = [
+            (rng.randrange(1, self.MERSENNE_PRIME), rng.randrange(0, self.MERSENNE_PRIME))
+            for _ in range(num_perm)
+        ]
+        self._a = np.array([a for a, _ in self.permutations], dtype=np.uint64)[:, None]
+        self._b = np.array([b for _, b in self.permutations], dtype=np.uint64)[:, None]
+
+    def signature(self, shingles):
+        """
+        Compute the MinHash signature of a set of shingle hashes
+
+        Args:
+            shingles: Iterable of integer shingle hashes
+
+        Returns:
+            array('I') of num_perm minimum hash values, empty when there are no
+            shingles (a document shorter than one k-gram has no signature)
+        """
+        shingles = np.fromiter(set(shingles), dtype=np.uint64)
+        if not len(shingles):
+            return array('I')
+
+        # ((a * x + b) mod p) & MAX_HASH for every permutation and shingle, a block of shingles at a time
+        minimums = np.full(self.num_perm, self.MAX_HASH, dtype=np.uint64)
+        for start in range(0, len(shingles), self.BLOCK_SIZE):
+            values = self._reduce(self._mulmod(self._a, shingles[None, start:start + self.BLOCK_SIZE]) + self._b)
+            minimums = np.minimum(minimums, (values & np.uint64(self.MAX_HASH)).min(axis=1))
+        return array('I', minimums.astype(np.uint32).tolist())
+
+    @classmethod
+    def _mulmod(cls, a, x):
+        """
+        a * x mod the Mersenne prime, for 61-bit operands, without overflowing 64 bits
+
+        The operands are split into 32-bit halves and the partial products
+        folded with 2^61 = 1 (mod p); the result is reduced below 2^62.
+        """
+        low32, low29 = np.uint64(0xFFFFFFFF), np.uint64((1 << 29) - 1)
+        a_high, a_low = a >> np.uint64(32), a & low32
+        x_high, x_low = x >> np.uint64(32), x & low32
+
+        high = (a_high * x_high) << np.uint64(3)  # * 2^64 = * 8
+        middle = a_high * x_low + a_low * x_high  # * 2^32
+        middle = (middle >> np.uint64(29)) + ((middle & low29) << np.uint64(32))
+        low = a_low * x_low
+        low = (low >> np.uint64(61)) + (low & np.uint64(cls.MERSENNE_PRIME))
+        return cls._reduce(high + middle + low)
+
+    @classmethod
+    def _reduce(cls, values):
+        """Reduce values below 2^63 modulo the Mersenne prime"""
+        prime = np.uint64(cls.MERSENNE_PRIME)
+        values = (values >> np.uint64(61)) + (values & prime)
+        values = (values >> np.uint64(61)) + (values & prime)
+        return np.where(values >= prime, values - prime, values)
+
+    def band_hashes(self, signature):
+        """Hash each band of a signature into a bucket id (unique across bands)"""
+        buckets = []
+        for band in range(self.bands):
+            rows = signature[band * self.rows:(band + 1) * self.rows]
+            digest = hashlib.blake2b(band.to_bytes(2, 'little') + self.to_bytes(rows), digest_size=8).digest()
+            buckets.append((band, int.from_bytes(digest, 'little', signed=True)))
+        return buckets
+
+    @staticmethod
+    def estimate_similarity(signature1, signature2):
+        """Estimate Jaccard similarity as the fraction of matching signature values"""
+        if len(signature1) != len(signature2) or not signature1:
+            return 0.0
+        return sum(1 for x, y in zip(signature1, signature2) if x == y) / len(signature1)
+
+    @staticmethod
+    def to_bytes(signature):
+        """Pack a signature as little-endian 32-bit integers"""
+        packed = array('I', signature)
+        if sys.byteorder != 'little':
+            packed.byteswap()
+        return packed.tobytes()
+
+    @staticmethod
+    def from_bytes(data):
+        """Unpack a signature stored with to_bytes"""
+        signature = array('I')
+        signature.frombytes(data)
+        if sys.byteorder != 'little':
+            signature.byteswap()
+        return signature
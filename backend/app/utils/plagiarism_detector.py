@@ -1,57 +1,245 @@
 import os
+import bisect
 import difflib
 import re
+import time
+from array import array
+from concurrent.futures import TimeoutError as FutureTimeoutError
 from flask import current_app
 import PyPDF2
 import docx
+from app.utils.fingerprint import Winnower
+from app.utils.minhash import MinHasher
+from app.utils.source_cache import PreprocessedText, source_cache
+from app.utils.text_cache import ExtractedTextCache
+from app.utils.similarity import ChunkSets, SimilarityKernel, match_chunk_pairs
+from app.utils.worker_pool import get_process_pool, discard_process_pool
+from app.utils.profiling import stage, timed, timed_iter, count
+
+def extract_pdf_pages(file_path, start, end):
+    """
+    Extract the text of pages [start, end) of a PDF file
+    
+    Module-level so page ranges can be extracted in worker processes.
+    """
+    with open(file_path, 'rb') as file:
+        pdf_reader = PyPDF2.PdfReader(file)
+        return [pdf_reader.pages[number].extract_text() for number in range(start, end)]
 
 class PlagiarismDetector:
     """Utility class for plagiarism detection"""
     
-    def __init__(self):
+    def __init__(self, cache=None, workers=1, shard_size=64, extraction_workers=1, max_pages=None, time_budget=None, text_cache=None):
         self.threshold = 0.3  # Similarity threshold (0-1)
         self.min_chunk_size = 40  # Minimum size of text chunk to check
+        self.winnower = Winnower(k=5, window=4)  # Fingerprints used to find candidate regions
+        self.minhasher = MinHasher(num_perm=128, bands=32)  # Whole-document near-duplicate signatures
+        self.near_duplicate_threshold = 0.5  # Minimum estimated Jaccard similarity for a near-duplicate
+        self.cache = cache if cache is not None else source_cache  # Preprocessed texts shared across requests
+        self.kernel = SimilarityKernel()  # Token-level chunk similarity
+        self.workers = workers or 1  # Worker processes for chunk matching (1 = run in the calling thread)
+        self.shard_size = shard_size  # Candidate (chunk, source) pairs per worker task
+        self.extraction_workers = extraction_workers or 1  # Worker processes for PDF page extraction
+        self.pages_per_task = 8  # PDF pages extracted per worker task
+        self.max_pages = max_pages  # Pages extracted per PDF (None = all)
+        self.time_budget = time_budget  # Seconds allowed for extracting one file (None = unlimited)
+        self.text_cache = text_cache  # ExtractedTextCache of extracted file text (None = always extract)
+        self.truncated = False  # Whether the last extraction stopped at max_pages or time_budget
+    
+    @classmethod
+    def from_config(cls, **kwargs):
+        """Create a detector with the worker and extraction settings of the current app"""
+        # Import here to avoid circular imports
+        from app.utils.text_cache import extracted_text_cache
+        
+        config = current_app.config
+        kwargs.setdefault('text_cache', extracted_text_cache)
+        kwargs.setdefault('workers', config.get('PLAGIARISM_WORKERS', 1))
+        kwargs.setdefault('shard_size', config.get('PLAGIARISM_SHARD_SIZE', 64))
+        kwargs.setdefault('extraction_workers', config.get('EXTRACTION_WORKERS', 1))
+        kwargs.setdefault('max_pages', config.get('EXTRACTION_MAX_PAGES'))
+        kwargs.setdefault('time_budget', config.get('EXTRACTION_TIME_BUDGET'))
+        return cls(**kwargs)
     
     def extract_text_from_file(self, file_path):
         """Extract text from different file types"""
-        _, ext = os.path.splitext(file_path)
-        ext = ext.lower()
-        
         try:
-            if ext == '.pdf':
-                return self._extract_from_pdf(file_path)
-            elif ext in ['.docx']:
-                return self._extract_from_docx(file_path)
-            elif ext in ['.txt', '.rtf']:
-                return self._extract_from_txt(file_path)
-            else:
-                return ""
+            return ''.join(segment for _, segment in self.iter_segments(file_path))
         except Exception as e:
             print(f"Error extracting text: {str(e)}")
             return ""
     
-    def _extract_from_pdf(self, file_path):
-        """Extract text from PDF file"""
-        text = ""
+    def extract_text_with_pages(self, file_path):
+        """
+        Extract text and the character offset where each page starts
+        
+        Returns:
+            Tuple of (text, page_starts); page_starts is None for formats without pages
+        """
+        segments = []
+        page_starts = []
+        position = 0
+        
+        try:
+            for page, segment in self.iter_segments(file_path):
+                if page is not None and page > len(page_starts):
+                    page_starts.append(position)
+                segments.append(segment)
+                position += len(segment)
+        except Exception as e:
+            print(f"Error extracting text: {str(e)}")
+            return "", None
+            
+        return ''.join(segments), page_starts or None
+    
+    def iter_segments(self, file_path, content_hash=None):
+        """
+        Stream the text of a file as (page_number, segment) tuples
+        
+        Joining the segments gives the full text of the file. PDFs yield one
+        segment per page, DOCX files one per paragraph and text files fixed-size
+        blocks; page_number is None for formats without pages. Extraction stops
+        early once max_pages or time_budget is exhausted.
+        
+        With a text_cache, files are looked up by content hash first and a hit
+        replays the stored pages without parsing the file. Complete extractions
+        are stored once the stream has been fully consumed. Pass content_hash
+        if the SHA-256 of the file is already known.
+        """
+        self.truncated = False
+        if self.text_cache is None:
+            yield from timed_iter('extraction', self._iter_file(file_path))
+            return
+        
+        with stage('extraction'):
+            content_hash = content_hash or self.text_cache.file_digest(file_path)
+            cached = self.text_cache.get(content_hash)
+        if cached is not None:
+            count('extracted_text_cache_hits')
+            yield from self._iter_cached(*cached)
+            return
+        count('extracted_text_cache_misses')
+        
+        segments = []
+        page_starts = []
+        position = 0
+        for page, segment in timed_iter('extraction', self._iter_file(file_path)):
+            if page is not None and page > len(page_starts):
+                page_starts.append(position)
+            segments.append(segment)
+            position += len(segment)
+            yield page, segment
+        
+        # Budget-limited extractions may be completed by a later call, so don't keep them
+        if not self.truncated:
+            with stage('extraction'):
+                self.text_cache.put(content_hash, ''.join(segments), page_starts or None)
+    
+    def _iter_file(self, file_path):
+        """Parse a file into (page_number, segment) tuples"""
+        _, ext = os.path.splitext(file_path)
+        ext = ext.lower()
+        
+        if ext == '.pdf':
+            yield from self._iter_pdf_pages(file_path)
+        elif ext in ['.docx']:
+            yield from self._iter_docx_paragraphs(file_path)
+        elif ext in ['.txt', '.rtf']:
+            yield from self._iter_txt_blocks(file_path)
+    
+    def _iter_cached(self, text, page_starts):
+        """Replay a cached text as segments, one per page when it has pages"""
+        if not page_starts:
+            yield None, text
+            return
+        
+        for index, start in enumerate(page_starts):
+            end = page_starts[index + 1] if index + 1 < len(page_starts) else len(text)
+            yield index + 1, text[start:end]
+    
+    def _deadline(self):
+        """Monotonic time at which extraction must stop, or None without a time budget"""
+        return time.monotonic() + self.time_budget if self.time_budget else None
+    
+    def _iter_pdf_pages(self, file_path):
+        """Yield the text of every page of a PDF file"""
+        deadline = self._deadline()
+        
         with open(file_path, 'rb') as file:
             pdf_reader = PyPDF2.PdfReader(file)
-            for page_num in range(len(pdf_reader.pages)):
-                page = pdf_reader.pages[page_num]
-                text += page.extract_text() + "\n"
-        return text
+            page_count = len(pdf_reader.pages)
+            if self.max_pages and page_count > self.max_pages:
+                print(f"Text extraction limited to {self.max_pages} of {page_count} pages: {file_path}")
+                page_count = self.max_pages
+                self.truncated = True
+            
+            done = 0
+            if self.extraction_workers > 1 and page_count > self.pages_per_task:
+                done = yield from self._iter_pdf_pages_parallel(file_path, page_count, deadline)
+                
+            for number in range(done, page_count):
+                if deadline is not None and time.monotonic() > deadline:
+                    print(f"Text extraction stopped after {number} pages, time budget exceeded: {file_path}")
+                    self.truncated = True
+                    return
+                yield number + 1, pdf_reader.pages[number].extract_text() + "\n"
     
-    def _extract_from_docx(self, file_path):
-        """Extract text from DOCX file"""
+    def _iter_pdf_pages_parallel(self, file_path, page_count, deadline):
+        """
+        Extract page ranges across the process pool, yielding pages in order
+        
+        Returns:
+            Number of pages yielded; the caller extracts the remaining pages
+            serially if a worker failed
+        """
+        pool = get_process_pool(self.extraction_workers)
+        done = 0
+        futures = []
+        
+        try:
+            futures = [
+                pool.submit(extract_pdf_pages, file_path, start, min(start + self.pages_per_task, page_count))
+                for start in range(0, page_count, self.pages_per_task)
+            ]
+            for future in futures:
+                timeout = max(0, deadline - time.monotonic()) if deadline is not None else None
+                for page_text in future.result(timeout=timeout):
+                    done += 1
+                    yield done, page_text + "\n"
+            return done
+        except FutureTimeoutError:
+            print(f"Text extraction stopped after {done} pages, time budget exceeded: {file_path}")
+            self.truncated = True
+            return page_count
+        except Exception as e:
+            # A crashed worker breaks the pool; replace it and finish serially
+            print(f"Parallel text extraction failed, continuing serially: {str(e)}")
+            discard_process_pool(self.extraction_workers)
+            return done
+        finally:
+            for future in futures:
+                future.cancel()
+    
+    def _iter_docx_paragraphs(self, file_path):
+        """Yield the paragraphs of a DOCX file, separated by newlines"""
+        deadline = self._deadline()
         doc = docx.Document(file_path)
-        full_text = []
-        for para in doc.paragraphs:
-            full_text.append(para.text)
-        return '\n'.join(full_text)
+        
+        for index, para in enumerate(doc.paragraphs):
+            if deadline is not None and time.monotonic() > deadline:
+                print(f"Text extraction stopped after {index} paragraphs, time budget exceeded: {file_path}")
+                self.truncated = True
+                return
+            yield None, ("\n" if index else "") + para.text
     
-    def _extract_from_txt(self, file_path):
-        """Extract text from TXT file"""
+    def _iter_txt_blocks(self, file_path, block_size=1024 * 1024):
+        """Yield a TXT file in blocks of block_size characters"""
         with open(file_path, 'r', encoding='utf-8', errors='ignore') as file:
-            return file.read()
+            while True:
+                block = file.read(block_size)
+                if not block:
+                    return
+                yield None, block
     
     def normalize_text(self, text):
         """Normalize text for comparison (lowercase, remove extra spaces)"""
@@ -60,17 +248,252 @@ class PlagiarismDetector:
         text = re.sub(r'[^\w\s]', '', text)  # Remove punctuation
         return text.strip()
     
+    def normalize_text_with_offsets(self, text, base=0):
+        """
+        Normalize text exactly like normalize_text in a single pass, keeping an offset map
+        
+        Returns:
+            Tuple of (normalized_text, offsets) where offsets[i] is the index in
+            text of normalized character i, plus base
+        """
+        lowered = text.lower()
+        same_length = len(lowered) == len(text)
+        cursor = 0
+        
+        chars = []
+        offsets = array('I')
+        previous_space = False
+        
+        for index, char in enumerate(text):
+            # Some characters expand when lowercased; walk the lowered text alongside
+            if same_length:
+                lower_chars = lowered[index]
+            else:
+                width = len(char.lower())
+                lower_chars = lowered[cursor:cursor + width]
+                cursor += width
+                
+            # Runs of whitespace collapse to one space; punctuation breaks a run
+            if char.isspace():
+                if not previous_space:
+                    chars.append(' ')
+                    offsets.append(base + index)
+                previous_space = True
+                continue
+                
+            previous_space = False
+            for lower_char in lower_chars:
+                if lower_char.isalnum() or lower_char == '_':
+                    chars.append(lower_char)
+                    offsets.append(base + index)
+        
+        # Strip leading and trailing spaces
+        start, end = 0, len(chars)
+        while start < end and chars[start] == ' ':
+            start += 1
+        while end > start and chars[end - 1] == ' ':
+            end -= 1
+            
+        return ''.join(chars[start:end]), offsets[start:end]
+    
+    def get_chunk_spans(self, word_count, chunk_size=100, overlap=50):
+        """Return (start, end) word ranges of the overlapping chunks for a text"""
+        spans = []
+        
+        for i in range(0, word_count, chunk_size - overlap):
+            end = min(i + chunk_size, word_count)
+            if end - i >= self.min_chunk_size:
+                spans.append((i, end))
+                
+        return spans
+    
     def split_into_chunks(self, text, chunk_size=100, overlap=50):
         """Split text into overlapping chunks for comparison"""
         words = text.split()
-        chunks = []
+        return [' '.join(words[start:end]) for start, end in self.get_chunk_spans(len(words), chunk_size, overlap)]
+    
+    def _index_fingerprints(self, words, chunk_spans, token_hashes=None):
+        """Map each winnowed fingerprint to the chunks that fully contain its k-gram"""
+        index = {}
+        if not chunk_spans:
+            return index
         
-        for i in range(0, len(words), chunk_size - overlap):
-            chunk = ' '.join(words[i:i + chunk_size])
-            if len(chunk.split()) >= self.min_chunk_size:
-                chunks.append(chunk)
+        k = self.winnower.k
+        first = 0
+        for fingerprint, position in self.winnower.fingerprint(words, token_hashes):
+            # Chunk spans are sorted, so skip chunks that end before this k-gram
+            while first < len(chunk_spans) and chunk_spans[first][1] < position + k:
+                first += 1
+            
+            for chunk_index in range(first, len(chunk_spans)):
+                start, end = chunk_spans[chunk_index]
+                if start > position:
+                    break
+                index.setdefault(fingerprint, set()).add(chunk_index)
                 
-        return chunks
+        return index
+    
+    def preprocess(self, text):
+        """
+        Return the normalized text, chunks and fingerprints of a text (cached by content hash)
+        
+        An already preprocessed text (e.g. from preprocess_file) is returned as is.
+        """
+        if isinstance(text, PreprocessedText):
+            return text
+        key = self.cache.make_key(text, *self._cache_params())
+        return self.cache.get_or_create(key, lambda: self._preprocess_segments([text]))
+    
+    def preprocess_file(self, file_path):
+        """
+        Extract and preprocess a file as a stream, without building its full text
+        
+        Results are cached by the SHA-256 of the file bytes, so a file that was
+        already preprocessed (a corpus candidate of an earlier check) is neither
+        extracted nor preprocessed again. Otherwise pages are normalized and
+        tokenized as they are extracted.
+        
+        Returns:
+            Tuple of (PreprocessedText, page_starts); the PreprocessedText is None
+            if no text could be extracted
+        """
+        try:
+            with stage('extraction'):
+                content_hash = ExtractedTextCache.file_digest(file_path)
+        except OSError as e:
+            print(f"Error extracting text: {str(e)}")
+            return None, None
+        
+        key = ('file', content_hash, self.max_pages) + self._cache_params()
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        
+        page_starts = []
+        position = 0
+        
+        def segments():
+            nonlocal position
+            for page, segment in self.iter_segments(file_path, content_hash):
+                if page is not None and page > len(page_starts):
+                    page_starts.append(position)
+                position += len(segment)
+                yield segment
+        
+        try:
+            document = self._preprocess_segments(segments())
+        except Exception as e:
+            print(f"Error extracting text: {str(e)}")
+            return None, None
+            
+        if not position:
+            return None, None
+        
+        # Budget-limited extractions may be completed by a later call, so don't keep them
+        result = (document, page_starts or None)
+        if not self.truncated:
+            self.cache.put(key, result)
+        return result
+    
+    def _cache_params(self):
+        """Preprocessing parameters that are part of every cache key"""
+        return self.min_chunk_size, self.winnower.k, self.winnower.window
+    
+    @timed('preprocessing')
+    def _preprocess_segments(self, segments):
+        """
+        Build the PreprocessedText of a text given as a stream of segments, without the cache
+        
+        Every segment is normalized and tokenized as soon as it arrives. Text
+        after the last whitespace of a segment is held back, so words cut at a
+        segment boundary are joined with the next segment.
+        """
+        parts = []
+        offsets = array('I')
+        words = []
+        word_starts = array('I')
+        token_hashes = []
+        length = 0  # Length of the normalized text built so far
+        
+        def consume(text, base):
+            nonlocal length
+            normalized_text, text_offsets = self.normalize_text_with_offsets(text, base)
+            if not normalized_text:
+                return
+            if parts:
+                parts.append(' ')
+                offsets.append(base)
+                length += 1
+                
+            for match in re.finditer(r'\S+', normalized_text):
+                word = match.group()
+                words.append(word)
+                word_starts.append(length + match.start())
+                token_hashes.append(self.winnower.hash_token(word))
+                
+            parts.append(normalized_text)
+            offsets.extend(text_offsets)
+            length += len(normalized_text)
+        
+        pending = ''
+        base = 0  # Index in the original text where pending starts
+        for segment in segments:
+            pending += segment
+            cut = len(pending)
+            while cut and not pending[cut - 1].isspace():
+                cut -= 1
+            if cut:
+                consume(pending[:cut], base)
+                base += cut
+                pending = pending[cut:]
+        if pending:
+            consume(pending, base)
+        
+        count('tokens', len(words))
+        token_ids = self.kernel.token_ids(token_hashes)
+        chunk_spans = self.get_chunk_spans(len(words))
+        return PreprocessedText(
+            ''.join(parts),
+            offsets,
+            words,
+            word_starts,
+            token_ids,
+            chunk_spans,
+            ChunkSets.from_tokens(token_ids, chunk_spans),
+            self._index_fingerprints(words, chunk_spans, token_hashes)
+        )
+    
+    def cache_stats(self):
+        """Return hit/miss counters of the preprocessed-text cache"""
+        return self.cache.stats()
+    
+    def minhash_signature(self, text):
+        """Compute the MinHash signature of the k-gram shingles of the normalized text"""
+        document = self.preprocess(text)
+        return self.minhasher.signature(self.winnower.kgram_hashes(document.words, document.token_ids.tolist()))
+    
+    def find_near_duplicates(self, text, exclude_assignment_id=None, min_similarity=None, signature=None):
+        """
+        Find stored assignments that are near-duplicates of a text
+        
+        Args:
+            text: The text to look up
+            exclude_assignment_id: Assignment to leave out (usually the one being checked)
+            min_similarity: Minimum estimated Jaccard similarity (defaults to near_duplicate_threshold)
+            signature: Precomputed MinHash signature of the text
+            
+        Returns:
+            List of (assignment_id, estimated_similarity) tuples, most similar first
+        """
+        # Import here to avoid circular imports
+        from app.utils.corpus_index import CorpusIndex
+        
+        if signature is None:
+            signature = self.minhash_signature(text)
+        if min_similarity is None:
+            min_similarity = self.near_duplicate_threshold
+            
+        return CorpusIndex.find_near_duplicates(signature, self.minhasher, exclude_assignment_id, min_similarity)
     
     def calculate_similarity(self, text1, text2):
         """Calculate similarity between two texts using difflib"""
@@ -83,55 +506,109 @@ class PlagiarismDetector:
         
         return similarity_ratio
     
-    def find_similar_chunks(self, text, comparison_sources, min_similarity=0.8):
-        """Find chunks of text that are similar to comparison sources"""
-        # Normalize and chunk the text
-        normalized_text = self.normalize_text(text)
-        chunks = self.split_into_chunks(normalized_text)
+    def find_similar_chunks(self, text, comparison_sources, min_similarity=0.8, page_starts=None):
+        """
+        Find chunks of text that are similar to comparison sources
+        
+        Positions are character offsets into the original (not normalized)
+        texts, resolved through the offset map built during normalization.
+        With page_starts, every section also carries its 1-based page number.
+        
+        Winnowed k-gram fingerprints select candidate (chunk, source chunk)
+        pairs in roughly linear time. Candidates are scored in batch by the
+        Jaccard similarity of their token sets, and character alignment only
+        runs on pairs that pass, to report the matching spans. With workers > 1
+        the scoring is sharded across the shared process pool.
+        """
+        # Normalize, chunk and fingerprint the text and every source (cached)
+        document = self.preprocess(text)
+        sources = [(source_name, self.preprocess(source_text)) for source_name, source_text in comparison_sources.items()]
+        sources_by_name = dict(sources)
         
-        flagged_sections = []
+        # Collect the candidate source chunks of every (chunk, source) pair
+        items = self._candidate_pairs(document, sources)
+        count('comparisons', sum(len(candidates) for *_, candidates in items))
         
-        # For each chunk, compare against all sources
-        for i, chunk in enumerate(chunks):
-            for source_name, source_text in comparison_sources.items():
-                source_normalized = self.normalize_text(source_text)
-                source_chunks = self.split_into_chunks(source_normalized)
+        # Score the pairs serially or sharded across the process pool
+        with stage('similarity'):
+            if self.workers > 1 and len(items) > self.shard_size:
+                flagged_sections = self._match_parallel(items, min_similarity)
+            else:
+                flagged_sections = match_chunk_pairs(items, min_similarity, self.kernel.min_span_length)
+        
+        for section in flagged_sections:
+            # Map chunk positions back to the original texts
+            chunk_index = section['chunk_index']
+            source = sources_by_name[section['source']]
+            source_chunk_index = section['source_chunk_index']
+            
+            section['start_pos'], section['end_pos'] = document.original_chunk_span(chunk_index)
+            if page_starts:
+                section['page'] = bisect.bisect_right(page_starts, section['start_pos'])
                 
-                for source_chunk in source_chunks:
-                    similarity = self.calculate_similarity(chunk, source_chunk)
-                    
-                    if similarity >= min_similarity:
-                        # Calculate approximate position in original text
-                        start_pos = normalized_text.find(chunk)
-                        end_pos = start_pos + len(chunk) if start_pos != -1 else -1
-                        
-                        flagged_sections.append({
-                            'chunk_index': i,
-                            'text': chunk,
-                            'source': source_name,
-                            'similarity': similarity,
-                            'start_pos': start_pos,
-                            'end_pos': end_pos
-                        })
-                        
-                        # Break after finding a match for this chunk
-                        break
+            for span in section['matched_spans']:
+                span['start'] = document.original_offset(chunk_index, span['start'])
+                span['end'] = document.original_offset(chunk_index, span['end'], is_end=True)
+                span['source_start'] = source.original_offset(source_chunk_index, span['source_start'])
+                span['source_end'] = source.original_offset(source_chunk_index, span['source_end'], is_end=True)
         
         return flagged_sections
     
-    def check_plagiarism(self, file_path, comparison_sources=None):
+    @timed('candidate_selection')
+    def _candidate_pairs(self, document, sources):
+        """(chunk index, chunk, token set, source name, candidate source chunks) of every chunk with fingerprint hits"""
+        items = []
+        for i, chunk in enumerate(document.chunks):
+            fingerprints = document.chunk_prints.get(i)
+            if not fingerprints:
+                continue
+            query_set = document.chunk_sets.get(i)
+                
+            for source_name, source in sources:
+                candidates = set()
+                for fingerprint in fingerprints:
+                    candidates.update(source.fingerprint_index.get(fingerprint, ()))
+                if not candidates:
+                    continue
+                
+                items.append((i, chunk, query_set, source_name, [
+                    (c, source.chunks[c], source.chunk_sets.get(c)) for c in sorted(candidates)
+                ]))
+        return items
+    
+    def _match_parallel(self, items, min_similarity):
+        """Shard candidate pairs across the process pool and merge results in item order"""
+        pool = get_process_pool(self.workers)
+        shards = [items[i:i + self.shard_size] for i in range(0, len(items), self.shard_size)]
+        
+        try:
+            futures = [
+                pool.submit(match_chunk_pairs, shard, min_similarity, self.kernel.min_span_length)
+                for shard in shards
+            ]
+            return [section for future in futures for section in future.result()]
+        except Exception as e:
+            # A crashed worker breaks the pool; replace it and fall back to the serial path
+            print(f"Parallel plagiarism check failed, running serially: {str(e)}")
+            discard_process_pool(self.workers)
+            return match_chunk_pairs(items, min_similarity, self.kernel.min_span_length)
+    
+    def check_plagiarism(self, file_path, comparison_sources=None, text=None, page_starts=None):
         """
         Main method to check for plagiarism
         
         Args:
             file_path: Path to the file to check
-            comparison_sources: Dict of source_name -> source_text for comparison
+            comparison_sources: Dict of source_name -> source text (or PreprocessedText) for comparison
+            text: Already extracted text or PreprocessedText of the file (skips extraction if given)
+            page_starts: Character offsets where each page of text starts
             
         Returns:
             Dict containing plagiarism results
         """
-        # Extract text from file
-        text = self.extract_text_from_file(file_path)
+        # Stream the file through extraction and preprocessing
+        if text is None:
+            text, page_starts = self.preprocess_file(file_path)
         
         if not text:
             return {
@@ -146,10 +623,10 @@ class PlagiarismDetector:
             comparison_sources = {}
             
         # Find similar chunks
-        flagged_sections = self.find_similar_chunks(text, comparison_sources)
+        flagged_sections = self.find_similar_chunks(text, comparison_sources, page_starts=page_starts)
         
         # Calculate overall similarity score
-        total_chunks = len(self.split_into_chunks(self.normalize_text(text)))
+        total_chunks = len(self.preprocess(text).chunks)
         flagged_chunks = len(set(section['chunk_index'] for section in flagged_sections))
         
         similarity_score = (flagged_chunks / total_chunks) * 100 if total_chunks > 0 else 0
@@ -0,0 +1,318 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+from functools import wraps
+from contextlib import contextmanager
+from contextvars import ContextVar
+from flask import request
+
+# Requests sending this header get the timings of their analysis in the response
+TIMINGS_HEADER = 'X-Debug-Timings'
+
+_current_profile = ContextVar('profile', default=None)
+
+class Profile:
+    """
+    Stage timings and counters of one operation (a request or a job)
+
+    Stage times are exclusive: time spent in a stage nested in another one
+    (extraction pulled by preprocessing) only counts for the inner stage, so
+    the stages of an operation add up to at most its total time.
+    """
+
+    def __init__(self, operation):
+        self.operation = operation
+        self.started = time.perf_counter()
+        self.finished = None
+        self.stages = {}  # Stage name -> seconds
+        self.counters = {}  # Counter name -> count
+        self._stack = []  # [stage name, start time, seconds in nested stages] of the open stages
+
+    def enter(self, name):
+        self._stack.append([name, time.perf_counter(), 0.0])
+
+    def exit(self):
+        name, started, nested = self._stack.pop()
+        elapsed = time.perf_counter() - started
+        self.stages[name] = self.stages.get(name, 0.0) + elapsed - nested
+        if self._stack:
+            self._stack[-1][2] += elapsed
+
+    def count(self, name, value=1):
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    @property
+    def total_seconds(self):
+        return (self.finished or time.perf_counter()) - self.started
+
+    def to_dict(self):
+        """The timings block of an API response"""
+        return {
+            'operation': self.operation,
+            'total_seconds': round(self.total_seconds, 6),
+            'stages': {name: round(seconds, 6) for name, seconds in self.stages.items()},
+            'counters': dict(self.counters)
+        }
+
+@contextmanager
+def profiled(operation):
+    """
+    Profile the stages run in this context, then add them to the metrics
+
+    Nested calls (an analysis run by an endpoint that is already profiled)
+    join the outer profile.
+    """
+    profile = _current_profile.get()
+    if profile is not None:
+        yield profile
+        return
+
+    profile = Profile(operation)
+    token = _current_profile.set(profile)
+    try:
+        yield profile
+    finally:
+        _current_profile.reset(token)
+        profile.finished = time.perf_counter()
+        metrics.observe_profile(profile)
+
+@contextmanager
+def stage(name):
+    """Time a stage of the current profile (a no-op outside a profiled operation)"""
+    profile = _current_profile.get()
+    if profile is None:
+        yield
+        return
+
+    profile.enter(name)
+    try:
+        yield
+    finally:
+        profile.exit()
+
+def timed(name):
+    """Decorator timing every call of a function as a stage"""
+    def decorator(f):
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            with stage(name):
+                return f(*args, **kwargs)
+        return decorated
+    return decorator
+
+def timed_iter(name, iterable):
+    """Iterate, counting the time spent producing each item as a stage (for streamed extraction)"""
+    iterator = iter(iterable)
+    while True:
+        with stage(name):
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+        yield item
+
+def count(name, value=1):
+    """Add to a counter of the current profile"""
+    profile = _current_profile.get()
+    if profile is not None:
+        profile.count(name, value)
+
+def timings_requested():
+    """Check whether the client asked for timings (X-Debug-Timings: 1)"""
+    return request.headers.get(TIMINGS_HEADER, '').lower() in ('1', 'true', 'yes')
+
+def response_timings(profile):
+    """The timings block for the current request, or None unless the client asked for it"""
+    return profile.to_dict() if timings_requested() else None
+
+class MetricsRegistry:
+    """
+    Histograms of stage and operation times and totals of counters
+
+    Rendered in the Prometheus text exposition format. With a path, values
+    are added up in a SQLite file shared by all worker processes on the host,
+    so every scrape sees the totals of the whole server whichever worker
+    answers it; without one they are kept per process.
+    """
+
+    PREFIX = 'homework_assistant'
+    BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+    HELP = {
+        'operation_seconds': 'Duration of analysis operations (requests and jobs)',
+        'stage_seconds': 'Time spent in each stage of an analysis operation',
+        'operation_items_total': 'Items processed by analysis operations (tokens, sentences, comparisons, cache hits...)'
+    }
+
+    def __init__(self, buckets=None, path=None):
+        self.buckets = tuple(buckets or self.BUCKETS)
+        self.path = path  # SQLite file shared by the workers (None = this process only)
+        self._lock = threading.Lock()
+        self._local = threading.local()  # SQLite connection of each thread
+        self._values = {}  # (metric name, labels JSON, field) -> value, without a path
+        self.errors = 0
+
+    def configure(self, path=None):
+        """(Re)point the registry at a SQLite file shared by the workers, or keep values in memory"""
+        with self._lock:
+            self.path = path or None
+            self._local = threading.local()
+
+        if self.path:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+
+    def observe(self, name, value, **labels):
+        """Record a value (seconds) in a histogram"""
+        self._add(self._observation(name, value, labels))
+
+    def increment(self, name, value=1, **labels):
+        """Add to a counter"""
+        self._add([(name, self._label_key(labels), 'value', value)])
+
+    def observe_profile(self, profile):
+        """Record the total time, stage times and counters of a finished operation, in one write"""
+        updates = self._observation('operation_seconds', profile.total_seconds, {'operation': profile.operation})
+        for name, seconds in profile.stages.items():
+            updates += self._observation('stage_seconds', seconds, {'operation': profile.operation, 'stage': name})
+        for name, value in profile.counters.items():
+            updates.append(('operation_items_total', self._label_key({'operation': profile.operation, 'item': name}), 'value', value))
+        self._add(updates)
+
+    def _observation(self, name, value, labels):
+        """Updates recording one histogram value: its bucket, the sum and the count"""
+        key = self._label_key(labels)
+        updates = [(name, key, 'sum', value), (name, key, 'count', 1)]
+        for bound in self.buckets:
+            if value <= bound:
+                updates.append((name, key, f"le:{bound!r}", 1))
+                break
+        return updates
+
+    @staticmethod
+    def _label_key(labels):
+        return json.dumps(sorted(labels.items()))
+
+    def _add(self, updates):
+        """Add (metric name, labels, field, amount) updates to the stored values"""
+        if not self.path:
+            with self._lock:
+                for name, labels, field, amount in updates:
+                    key = (name, labels, field)
+                    self._values[key] = self._values.get(key, 0) + amount
+            return
+
+        try:
+            with self._connection() as connection:
+                connection.executemany(
+                    'INSERT INTO metric_values (name, labels, field, value) VALUES (?, ?, ?, ?) '
+                    'ON CONFLICT (name, labels, field) DO UPDATE SET value = value + excluded.value',
+                    updates
+                )
+        except sqlite3.Error as e:
+            self._failed(e)
+
+    def _connection(self):
+        """SQLite connection of the calling thread, creating the table on first use"""
+        # A connection inherited through fork must not be used by the child
+        pid, connection = getattr(self._local, 'connection', (None, None))
+        if connection is None or pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=5)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS metric_values ('
+                'name TEXT NOT NULL, labels TEXT NOT NULL, field TEXT NOT NULL, value REAL NOT NULL, '
+                'PRIMARY KEY (name, labels, field))'
+            )
+            connection.commit()
+            self._local.connection = (os.getpid(), connection)
+        return connection
+
+    def _failed(self, error):
+        """Keep serving without the shared metrics when SQLite fails (locked, full, corrupt)"""
+        with self._lock:
+            self.errors += 1
+        print(f"Metrics store unavailable: {str(error)}")
+
+    def _load(self):
+        """All stored values as (metric name, labels JSON, field) -> value"""
+        if not self.path:
+            with self._lock:
+                return dict(self._values)
+
+        try:
+            rows = self._connection().execute('SELECT name, labels, field, value FROM metric_values').fetchall()
+        except sqlite3.Error as e:
+            self._failed(e)
+            return {}
+        return {(name, labels, field): value for name, labels, field, value in rows}
+
+    def clear(self):
+        """Drop all values (of every worker, with a path)"""
+        with self._lock:
+            self._values.clear()
+        if self.path:
+            try:
+                with self._connection() as connection:
+                    connection.execute('DELETE FROM metric_values')
+            except sqlite3.Error as e:
+                self._failed(e)
+
+    def render(self):
+        """All metrics in the Prometheus text format"""
+        histograms = {}  # (name, labels JSON) -> {field: value}
+        counters = {}  # (name, labels JSON) -> total
+        for (name, labels, field), value in self._load().items():
+            if field == 'value':
+                counters[(name, labels)] = value
+            else:
+                histograms.setdefault((name, labels), {})[field] = value
+
+        lines = []
+        for name in sorted({name for name, _ in histograms}):
+            metric = f"{self.PREFIX}_{name}"
+            lines.append(f"# HELP {metric} {self.HELP.get(name, name)}")
+            lines.append(f"# TYPE {metric} histogram")
+            for (key_name, labels), fields in sorted(histograms.items()):
+                if key_name != name:
+                    continue
+                labels = json.loads(labels)
+                total = self._number(fields.get('count', 0))
+                cumulative = 0
+                for bound in self.buckets:
+                    cumulative += fields.get(f"le:{bound!r}", 0)
+                    lines.append(f"{metric}_bucket{self._labels(labels, le=repr(bound))} {self._number(cumulative)}")
+                lines.append(f"{metric}_bucket{self._labels(labels, le='+Inf')} {total}")
+                lines.append(f"{metric}_sum{self._labels(labels)} {float(fields.get('sum', 0))!r}")
+                lines.append(f"{metric}_count{self._labels(labels)} {total}")
+
+        for name in sorted({name for name, _ in counters}):
+            metric = f"{self.PREFIX}_{name}"
+            lines.append(f"# HELP {metric} {self.HELP.get(name, name)}")
+            lines.append(f"# TYPE {metric} counter")
+            for (key_name, labels), value in sorted(counters.items()):
+                if key_name == name:
+                    lines.append(f"{metric}{self._labels(json.loads(labels))} {self._number(value)}")
+
+        return '\n'.join(lines) + '\n'
+
+    @staticmethod
+    def _number(value):
+        """Counts read back from SQLite are floats; render whole numbers without a fraction"""
+        return int(value) if float(value).is_integer() else value
+
+    @staticmethod
+    def _labels(labels, **extra):
+        pairs = [tuple(pair) for pair in labels] + list(extra.items())
+        if not pairs:
+            return ''
+        return '{' + ','.join(f'{key}="{_escape_label(value)}"' for key, value in pairs) + '}'
+
+def _escape_label(value):
+    """Escape a label value (backslashes, quotes and newlines)"""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+# Metrics exposed by the admin metrics endpoint, shared by the workers once configured by create_app
+metrics = MetricsRegistry()
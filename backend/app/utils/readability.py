@@ -0,0 +1,141 @@
+import re
+from functools import lru_cache
+import numpy as np
+
+_VOWEL_GROUPS = re.compile(r'[aeiouy]+')
+_WORD = re.compile(r'[^\W_]')  # Tokens with a letter or digit are words; punctuation tokens are not
+
+# Common words the vowel-group heuristic miscounts
+SYLLABLE_EXCEPTIONS = {
+    'actually': 4, 'area': 3, 'asked': 1, 'available': 4, 'based': 1, 'being': 2, 'business': 2,
+    'called': 1, 'create': 2, 'created': 3, 'everything': 3, 'example': 3, 'experience': 4,
+    'helped': 1, 'idea': 3, 'likely': 2, 'little': 2, 'lives': 1, 'looked': 1, 'makes': 1,
+    'medium': 3, 'notes': 1, 'obvious': 3, 'people': 2, 'period': 3, 'piano': 3, 'poem': 2,
+    'possible': 3, 'previous': 3, 'quiet': 2, 'radio': 3, 'reality': 4, 'really': 3,
+    'science': 2, 'serious': 3, 'simple': 2, 'single': 2, 'society': 4, 'something': 2,
+    'sometimes': 2, 'stadium': 3, 'states': 1, 'table': 2, 'talked': 1, 'themselves': 2,
+    'theory': 3, 'times': 1, 'used': 1, 'usually': 4, 'variable': 4, 'various': 3, 'video': 3,
+    'walked': 1, 'worked': 1
+}
+
+# Per-sentence counts, summed per document; every metric is computed from these
+COUNT_FIELDS = (
+    'sentences',
+    'tokens',  # All tokens, punctuation included
+    'token_syllables',  # Syllables of all tokens (punctuation counts as one)
+    'words',  # Tokens with a letter or digit
+    'letters',  # Letters and digits in words
+    'syllables',  # Syllables in words
+    'polysyllables'  # Words of three or more syllables
+)
+
+METRICS = (
+    'flesch_reading_ease',
+    'flesch_kincaid_grade',
+    'coleman_liau_index',
+    'automated_readability_index',
+    'smog_index'
+)
+
+# Every metric is a linear function of the same ratios:
+# words/sentence, syllables/word, letters/word, sentences/word, sqrt(polysyllables * 30 / sentences)
+_COEFFICIENTS = np.array([
+    [-1.015, -84.6, 0.0, 0.0, 0.0],  # Flesch reading ease
+    [0.39, 11.8, 0.0, 0.0, 0.0],  # Flesch-Kincaid grade
+    [0.0, 0.0, 5.88, -29.6, 0.0],  # Coleman-Liau (per 100 words)
+    [0.5, 0.0, 4.71, 0.0, 0.0],  # Automated readability index
+    [0.0, 0.0, 0.0, 0.0, 1.043]  # SMOG
+])
+_INTERCEPTS = np.array([206.835, -15.59, -15.8, -21.43, 3.1291])
+
+@lru_cache(maxsize=50000)
+def _syllables(word):
+    """Syllables of a lowercase word (approximate): exceptions, else vowel groups"""
+    count = SYLLABLE_EXCEPTIONS.get(word)
+    if count is not None:
+        return count
+
+    if len(word) <= 3:
+        return 1
+
+    # Remove final e
+    if word.endswith('e'):
+        word = word[:-1]
+
+    # Count vowel groups
+    return max(1, len(_VOWEL_GROUPS.findall(word)))
+
+def count_syllables(word):
+    """Count syllables in a word (approximate, memoized)"""
+    return _syllables(word.lower())
+
+def sentence_counts(tokens):
+    """Counts (in COUNT_FIELDS order) of one tokenized sentence, in a single pass over its tokens"""
+    token_syllables = words = letters = syllables = polysyllables = 0
+    for token in tokens:
+        count = _syllables(token.lower())
+        token_syllables += count
+        if _WORD.search(token):
+            words += 1
+            letters += sum(1 for char in token if char.isalnum())
+            syllables += count
+            if count >= 3:
+                polysyllables += 1
+    return [1, len(tokens), token_syllables, words, letters, syllables, polysyllables]
+
+def total_counts(counts):
+    """Sum per-sentence (or per-document part) counts into one count vector"""
+    if not len(counts):
+        return np.zeros(len(COUNT_FIELDS), dtype=np.int64)
+    return np.asarray(counts, dtype=np.int64).sum(axis=0)
+
+def metrics_many(counts):
+    """
+    Compute every metric for many documents at once
+
+    Args:
+        counts: Array of shape (documents, len(COUNT_FIELDS))
+
+    Returns:
+        Array of shape (documents, len(METRICS)); NaN where a document has no words or sentences
+    """
+    counts = np.asarray(counts, dtype=np.float64).reshape(-1, len(COUNT_FIELDS))
+    sentences, words, letters, syllables, polysyllables = counts[:, [0, 3, 4, 5, 6]].T
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ratios = np.column_stack([
+            words / sentences,
+            syllables / words,
+            letters / words,
+            sentences / words,
+            np.sqrt(polysyllables * 30 / sentences)
+        ])
+        values = ratios @ _COEFFICIENTS.T + _INTERCEPTS
+
+    values[(words == 0) | (sentences == 0)] = np.nan
+    return values
+
+def metrics_dict(values):
+    """Return a dict of one row of metrics_many (None when undefined)"""
+    return {name: None if np.isnan(value) else round(float(value), 2) for name, value in zip(METRICS, values)}
+
+def metrics(counts):
+    """Return a dict of every metric for one document's counts (None when undefined)"""
+    return metrics_dict(metrics_many(counts)[0])
+
+def readability_score(counts):
+    """
+    The 0-10 readability score shown with feedback, from a document's counts
+
+    A Flesch-Kincaid grade over all tokens (punctuation included), mapped so
+    that a lower grade means higher readability.
+    """
+    sentence_count, token_count, token_syllables = int(counts[0]), int(counts[1]), int(counts[2])
+
+    if token_count == 0 or sentence_count == 0:
+        return 5  # Default middle score
+
+    fk_score = 0.39 * (token_count / sentence_count) + 11.8 * (token_syllables / token_count) - 15.59
+
+    # Convert to 0-10 scale, where lower grade level means higher readability
+    return max(0, min(10, 10 - (fk_score / 2)))
@@ -4,7 +4,7 @@ class APIResponse:
     """Standardized API response format for the application"""
     
     @staticmethod
-    def success(data=None, message="Success", code=200):
+    def success(data=None, message="Success", code=200, timings=None):
         """
         Construct a success response
         
@@ -12,6 +12,7 @@ class APIResponse:
             data: Response data
             message: Response message
             code: HTTP status code
+            timings: Stage timings and counters, added when the client asked for them
             
         Returns:
             Flask response object
@@ -21,6 +22,10 @@ class APIResponse:
             "message": message,
             "data": data
         }
+        
+        if timings is not None:
+            response["timings"] = timings
+            
         return jsonify(response), code
     
     @staticmethod
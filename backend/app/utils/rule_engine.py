@@ -0,0 +1,282 @@
+import os
+import json
+import hashlib
+import itertools
+from collections import Counter, deque
+
+# Built-in checks; custom packs are loaded on top of it (see RulePack.load)
+DEFAULT_RULE_PACK = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'rules', 'default.json')
+
+class TokenTest:
+    """
+    One element of a rule pattern: a word list and/or POS tags a token must match
+
+    Words are compared lowercase. A tag ending in '*' matches every tag
+    starting with the rest (VB* matches VB, VBD, VBN...).
+    """
+
+    def __init__(self, data):
+        words = data.get('words')
+        tags = data.get('tags')
+        if not words and not tags:
+            raise ValueError("Pattern elements need 'words' or 'tags'")
+
+        self.words = frozenset(word.lower() for word in words) if words else None
+        self.exact_tags = frozenset(tag for tag in tags or () if not tag.endswith('*'))
+        self.tag_prefixes = tuple(tag[:-1] for tag in tags or () if tag.endswith('*'))
+        self.any_tag = not tags
+
+    def test_tag(self, tag):
+        return self.any_tag or tag in self.exact_tags or tag.startswith(self.tag_prefixes)
+
+    def test(self, word, tag):
+        """Check a lowercase word and its tag"""
+        return (self.words is None or word in self.words) and self.test_tag(tag)
+
+class Rule:
+    """
+    A declarative grammar or style rule
+
+    kind: 'grammar' (grammar issue), 'suggestion' (improvement suggestion) or
+          'rewrite' (rewrite suggestion for the sentence)
+    match: 'sequence' - tokens matching 'pattern', in order
+           'count' - a sentence with at least 'min_count' matches of 'pattern'
+           'repeat' - the same word twice in a row ('alpha_only', 'scope':
+                      'sentence' or 'document' to also match across sentences)
+           'sentence' - a sentence of at least 'min_tokens' tokens
+           'density' - a document where tokens tagged 'tags' exceed 'max_ratio'
+    report: 'match' (the matched tokens) or 'sentence' (the sentence, once)
+    message: Text of the finding; '{token}' is replaced by the last matched token
+    """
+
+    KINDS = ('grammar', 'suggestion', 'rewrite')
+    MATCHES = ('sequence', 'count', 'repeat', 'sentence', 'density')
+
+    def __init__(self, data):
+        self.data = data
+        self.id = data.get('id')
+        self.kind = data.get('kind')
+        self.match = data.get('match')
+        self.message = data.get('message', '')
+        self.report = data.get('report', 'sentence' if self.kind == 'rewrite' else 'match')
+
+        if not self.id:
+            raise ValueError('Rules need an id')
+        if self.kind not in self.KINDS:
+            raise ValueError(f"Rule '{self.id}': unknown kind '{self.kind}'")
+        if self.match not in self.MATCHES:
+            raise ValueError(f"Rule '{self.id}': unknown match '{self.match}'")
+        if self.report not in ('match', 'sentence'):
+            raise ValueError(f"Rule '{self.id}': unknown report '{self.report}'")
+        if self.match == 'density' and self.kind != 'suggestion':
+            raise ValueError(f"Rule '{self.id}': density rules are document-level suggestions")
+
+        self.pattern = [TokenTest(element) for element in data.get('pattern', [])]
+        if self.match in ('sequence', 'count') and not self.pattern:
+            raise ValueError(f"Rule '{self.id}': '{self.match}' rules need a pattern")
+
+        self.min_count = data.get('min_count', 1)
+        self.min_tokens = data.get('min_tokens', 1)
+        self.alpha_only = data.get('alpha_only', True)
+        self.scope = data.get('scope', 'sentence')
+        self.density_test = TokenTest({'tags': data.get('tags')}) if self.match == 'density' else None
+        self.max_ratio = data.get('max_ratio', 0)
+
+    def format_message(self, token=''):
+        return self.message.replace('{token}', token)
+
+class RulePack:
+    """
+    Rules compiled for a single pass over each sentence
+
+    Word lists of every sequence and count pattern are compiled into one
+    Aho-Corasick automaton over lowercase tokens. Each automaton match is
+    checked against the tags (and tag-only elements) of its pattern, so one
+    walk over the tokens evaluates every pattern however many there are.
+    Patterns made only of tags are tried at tokens whose tag can start them.
+    """
+
+    MAX_ANCHOR_PHRASES = 100000  # Word combinations one pattern may add to the automaton
+
+    def __init__(self, rules):
+        self.rules = rules
+        # Identifies the rule definitions in cache keys, so changing a pack invalidates cached hits
+        self.digest = hashlib.sha256(json.dumps([rule.data for rule in rules], sort_keys=True).encode('utf-8')).hexdigest()
+        self.by_id = {rule.id: rule for rule in rules}
+
+        self.sentence_rules = [rule for rule in rules if rule.match == 'sentence']
+        self.repeat_rules = [rule for rule in rules if rule.match == 'repeat']
+        self.density_rules = [rule for rule in rules if rule.match == 'density']
+        self._compile([rule for rule in rules if rule.match in ('sequence', 'count')])
+
+    @classmethod
+    def load(cls, paths=()):
+        """
+        Load the default pack and any custom packs on top of it
+
+        A custom rule with the id of an earlier one replaces it in place
+        ("enabled": false removes it); new rules are added at the end.
+
+        Raises:
+            ValueError: If a pack is not valid
+        """
+        definitions = {}
+        for path in [DEFAULT_RULE_PACK, *paths]:
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    pack = json.load(f)
+            except (OSError, json.JSONDecodeError) as e:
+                raise ValueError(f"Could not load rule pack {path}: {str(e)}")
+
+            for data in pack.get('rules', []):
+                if data.get('enabled', True):
+                    definitions[data.get('id')] = data
+                else:
+                    definitions.pop(data.get('id'), None)
+
+        return cls([Rule(data) for data in definitions.values()])
+
+    def _compile(self, pattern_rules):
+        """Build the token automaton and the list of tag-only patterns"""
+        self._patterns = []  # (rule, elements)
+        self._tag_patterns = []  # Indexes of patterns without a word list
+        self._tag_starts = {}  # Tag -> indexes of the tag-only patterns a token with it can start
+        self._goto = [{}]
+        self._fail = [0]
+        self._outputs = [[]]  # State -> (pattern index, anchor offset, anchor length) ending there
+
+        for rule in pattern_rules:
+            index = len(self._patterns)
+            self._patterns.append((rule, rule.pattern))
+
+            # The longest run of elements with word lists anchors the pattern in the automaton
+            anchor_offset, anchor_length = 0, 0
+            run_start = None
+            for position, element in enumerate(rule.pattern + [None]):
+                if element is not None and element.words is not None:
+                    if run_start is None:
+                        run_start = position
+                elif run_start is not None:
+                    if position - run_start > anchor_length:
+                        anchor_offset, anchor_length = run_start, position - run_start
+                    run_start = None
+
+            if not anchor_length:
+                self._tag_patterns.append(index)
+                continue
+
+            anchor = rule.pattern[anchor_offset:anchor_offset + anchor_length]
+            phrases = 1
+            for element in anchor:
+                phrases *= len(element.words)
+            if phrases > self.MAX_ANCHOR_PHRASES:
+                raise ValueError(f"Rule '{rule.id}': word lists expand to {phrases} phrases")
+
+            for phrase in itertools.product(*(sorted(element.words) for element in anchor)):
+                state = 0
+                for word in phrase:
+                    following = self._goto[state].get(word)
+                    if following is None:
+                        following = len(self._goto)
+                        self._goto[state][word] = following
+                        self._goto.append({})
+                        self._fail.append(0)
+                        self._outputs.append([])
+                    state = following
+                self._outputs[state].append((index, anchor_offset, anchor_length))
+
+        # Failure links, breadth first; a state also reports the matches of its failure state
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for word, following in self._goto[state].items():
+                queue.append(following)
+                fallback = self._fail[state]
+                while fallback and word not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[following] = self._goto[fallback].get(word, 0)
+                self._outputs[following] = self._outputs[following] + self._outputs[self._fail[following]]
+
+    def match_sentence(self, tokens, tags):
+        """
+        Evaluate every rule over one tagged sentence
+
+        Pattern rules are matched in one walk of the automaton over the
+        tokens; repeats, lengths and densities come from the same tokens and
+        a tally of their tags, so the cost barely grows with the rule count.
+
+        Returns:
+            Dict with 'matches', a list of [rule id, first token, end token]
+            (document-scope repeats across sentences are found by
+            match_boundary), and 'counts', tokens counted by each density rule
+        """
+        lowered = [token.lower() for token in tokens]
+        length = len(tokens)
+        found = []  # (pattern index, first token) of every pattern match
+
+        goto, fail, outputs = self._goto, self._fail, self._outputs
+        state = 0
+        for i, word in enumerate(lowered):
+            while state and word not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(word, 0)
+            if outputs[state]:
+                for index, anchor_offset, anchor_length in outputs[state]:
+                    found.append((index, i - anchor_length + 1 - anchor_offset))
+
+        if self._tag_patterns:
+            for i, tag in enumerate(tags):
+                starting = self._tag_starts.get(tag)
+                if starting is None:
+                    starting = [index for index in self._tag_patterns if self._patterns[index][1][0].test_tag(tag)]
+                    self._tag_starts[tag] = starting
+                found.extend((index, i) for index in starting)
+
+        matches = []
+        pattern_counts = {}
+        for index, start in found:
+            rule, elements = self._patterns[index]
+            end = start + len(elements)
+            if start < 0 or end > length:
+                continue
+            if all(element.test(lowered[start + k], tags[start + k]) for k, element in enumerate(elements)):
+                if rule.match == 'count':
+                    pattern_counts[rule.id] = pattern_counts.get(rule.id, 0) + 1
+                else:
+                    matches.append([rule.id, start, end])
+
+        if self.repeat_rules:
+            for i in range(1, length):
+                if lowered[i] == lowered[i - 1]:
+                    matches.extend(
+                        [rule.id, i - 1, i + 1] for rule in self.repeat_rules
+                        if not rule.alpha_only or tokens[i].isalpha()
+                    )
+
+        for rule in self.sentence_rules:
+            if length >= rule.min_tokens:
+                matches.append([rule.id, 0, length])
+        for rule_id, count in pattern_counts.items():
+            if count >= self.by_id[rule_id].min_count:
+                matches.append([rule_id, 0, length])
+
+        density_counts = {}
+        if self.density_rules:
+            tag_counts = Counter(tags)
+            for rule in self.density_rules:
+                density_counts[rule.id] = sum(count for tag, count in tag_counts.items() if rule.density_test.test_tag(tag))
+
+        matches.sort(key=lambda match: (match[1], match[2]))
+        return {'matches': matches, 'counts': density_counts}
+
+    def match_boundary(self, previous_token, token):
+        """Ids of document-scope repeat rules matching the last token of a sentence and the first of the next"""
+        return [
+            rule.id for rule in self.repeat_rules
+            if rule.scope == 'document' and token.lower() == previous_token.lower()
+            and (not rule.alpha_only or token.isalpha())
+        ]
+
+    def rules_of_kind(self, kind):
+        """Rules of one kind, in pack order"""
+        return [rule for rule in self.rules if rule.kind == kind]
@@ -0,0 +1,206 @@
+import os
+import re
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+
+_SPACES = re.compile(r' {2,}')
+
+class SentenceCache:
+    """
+    Two-tier cache of per-sentence analysis results
+
+    An in-process LRU sits in front of an optional SQLite file shared by all
+    worker processes on the host. Entries are JSON-serializable dicts (tokens,
+    tags and rule hits of a sentence) keyed by the hash of the normalized
+    sentence and the analyzer version.
+    """
+
+    SQLITE_BATCH = 500  # Keys per SELECT ... IN query
+
+    def __init__(self, maxsize=20000, path=None, disk_maxsize=500000):
+        self.maxsize = maxsize  # Entries kept in memory (0 = cache disabled)
+        self.path = path  # SQLite file of the shared tier (None = memory only)
+        self.disk_maxsize = disk_maxsize  # Entries kept in the SQLite file
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()  # SQLite connection of each thread
+        self._disk_writes = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.disk_evictions = 0
+        self.disk_errors = 0
+
+    def configure(self, maxsize=None, path=None, disk_maxsize=None):
+        """Resize the memory tier and (re)point the shared tier at a SQLite file"""
+        with self._lock:
+            if maxsize is not None:
+                self.maxsize = maxsize
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+            if disk_maxsize is not None:
+                self.disk_maxsize = disk_maxsize
+            self.path = path or None
+            self._local = threading.local()
+
+        if self.path:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+
+    @staticmethod
+    def make_key(sentence, version):
+        """
+        Build a key from a sentence and the analyzer version
+
+        Runs of spaces are collapsed before hashing; they don't change how a
+        sentence is tokenized. Other whitespace (tabs, newlines) can, so it
+        is kept.
+        """
+        normalized = _SPACES.sub(' ', sentence.strip())
+        return hashlib.sha256(f"{version}\x00{normalized}".encode('utf-8', errors='surrogatepass')).hexdigest()
+
+    def get_many(self, keys):
+        """Return a dict of the cached entries among unique keys (memory first, then the shared tier)"""
+        found = {}
+        if not self.maxsize:
+            return found
+
+        missing = []
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    self._entries.move_to_end(key)
+                    found[key] = entry
+                else:
+                    missing.append(key)
+            self.hits += len(found)
+
+        if missing and self.path:
+            loaded = self._disk_get(missing)
+            if loaded:
+                found.update(loaded)
+                self._remember(loaded)
+            with self._lock:
+                self.disk_hits += len(loaded)
+                self.misses += len(missing) - len(loaded)
+        else:
+            with self._lock:
+                self.misses += len(missing)
+
+        return found
+
+    def put_many(self, entries):
+        """Store new entries in memory and in the shared tier"""
+        if not self.maxsize or not entries:
+            return
+
+        self._remember(entries)
+        if self.path:
+            self._disk_put(entries)
+
+    def _remember(self, entries):
+        """Add entries to the memory tier, evicting the least recently used ones"""
+        with self._lock:
+            for key, entry in entries.items():
+                self._entries[key] = entry
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def _connection(self):
+        """SQLite connection of the calling thread, creating the table on first use"""
+        # A connection inherited through fork (gunicorn --preload) must not be used by the child
+        pid, connection = getattr(self._local, 'connection', (None, None))
+        if connection is None or pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=5)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS sentences (key TEXT PRIMARY KEY, value TEXT NOT NULL, stored_at REAL NOT NULL)'
+            )
+            connection.execute('CREATE INDEX IF NOT EXISTS sentences_stored_at ON sentences (stored_at)')
+            connection.commit()
+            self._local.connection = (os.getpid(), connection)
+        return connection
+
+    def _disk_get(self, keys):
+        """Load entries from the shared tier; errors count as misses"""
+        loaded = {}
+        try:
+            connection = self._connection()
+            for start in range(0, len(keys), self.SQLITE_BATCH):
+                batch = keys[start:start + self.SQLITE_BATCH]
+                placeholders = ','.join('?' * len(batch))
+                for key, value in connection.execute(f'SELECT key, value FROM sentences WHERE key IN ({placeholders})', batch):
+                    loaded[key] = json.loads(value)
+        except sqlite3.Error as e:
+            self._disk_failed(e)
+        return loaded
+
+    def _disk_put(self, entries):
+        """Write entries to the shared tier, trimming the oldest rows now and then"""
+        try:
+            connection = self._connection()
+            now = time.time()
+            with connection:
+                connection.executemany(
+                    'INSERT OR REPLACE INTO sentences (key, value, stored_at) VALUES (?, ?, ?)',
+                    [(key, json.dumps(entry), now) for key, entry in entries.items()]
+                )
+
+            # Counting rows is a table scan, so only check the size every few thousand writes
+            self._disk_writes += len(entries)
+            if self._disk_writes >= max(1000, self.disk_maxsize // 100):
+                self._disk_writes = 0
+                self._disk_trim(connection)
+        except sqlite3.Error as e:
+            self._disk_failed(e)
+
+    def _disk_trim(self, connection):
+        """Delete the oldest rows beyond disk_maxsize"""
+        excess = connection.execute('SELECT COUNT(*) FROM sentences').fetchone()[0] - self.disk_maxsize
+        if excess > 0:
+            with connection:
+                connection.execute(
+                    'DELETE FROM sentences WHERE key IN (SELECT key FROM sentences ORDER BY stored_at LIMIT ?)', (excess,)
+                )
+            with self._lock:
+                self.disk_evictions += excess
+
+    def _disk_failed(self, error):
+        """Keep analyzing without the shared tier when SQLite fails (locked, full, corrupt)"""
+        with self._lock:
+            self.disk_errors += 1
+        print(f"Sentence cache unavailable: {str(error)}")
+
+    def clear(self):
+        """Drop the memory tier (the shared tier and counters are kept)"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Return hit/miss counters of both tiers and the memory tier size"""
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'path': self.path,
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'disk_evictions': self.disk_evictions,
+                'disk_errors': self.disk_errors,
+                'hit_ratio': (self.hits + self.disk_hits) / lookups if lookups else 0.0
+            }
+
+# Shared by the text analyzer of the process, configured by create_app
+sentence_cache = SentenceCache()
@@ -0,0 +1,137 @@
+import difflib
+import numpy as np
+
+class ChunkSets:
+    """Sorted unique token ids of every chunk of a text, packed into flat arrays"""
+
+    def __init__(self, sets):
+        self.sizes = np.array([len(chunk_set) for chunk_set in sets], dtype=np.int64)
+        self.offsets = np.zeros(len(sets), dtype=np.int64)
+        if len(sets) > 1:
+            self.offsets[1:] = np.cumsum(self.sizes)[:-1]
+        self.flat = np.concatenate(sets) if sets else np.empty(0, dtype=np.uint32)
+
+    @classmethod
+    def from_tokens(cls, token_ids, chunk_spans):
+        """Build the chunk sets of a token id array split into (start, end) chunk spans"""
+        return cls([np.unique(token_ids[start:end]) for start, end in chunk_spans])
+
+    def get(self, chunk_index):
+        """Return the sorted unique token ids of one chunk"""
+        start = self.offsets[chunk_index]
+        return self.flat[start:start + self.sizes[chunk_index]]
+
+class SimilarityKernel:
+    """Vectorized token-level similarity between one chunk and many source chunks"""
+
+    def __init__(self, min_span_length=20):
+        self.min_span_length = min_span_length  # Shortest character match reported as a span
+
+    @staticmethod
+    def token_ids(token_hashes):
+        """Pack token hashes into a uint32 array"""
+        return np.fromiter(token_hashes, dtype=np.uint32, count=len(token_hashes))
+
+    def batch_scores(self, query_set, chunk_sets, chunk_indexes, min_similarity):
+        """
+        Score one chunk against a batch of source chunks
+
+        Pairs whose set sizes alone cap the Jaccard score below min_similarity
+        are dropped before any intersection is computed.
+
+        Args:
+            query_set: Sorted unique token ids of the input chunk
+            chunk_sets: ChunkSets of the source
+            chunk_indexes: Source chunk indexes to score, in ascending order
+            min_similarity: Minimum Jaccard score of interest
+
+        Returns:
+            Tuple of (chunk_indexes, jaccard, containment) arrays for the pairs
+            that survived the size bound
+        """
+        chunk_indexes = np.asarray(chunk_indexes, dtype=np.int64)
+        query_size = len(query_set)
+        sizes = chunk_sets.sizes[chunk_indexes]
+
+        # Upper bound: |A & B| / |A | B| <= min(|A|, |B|) / max(|A|, |B|)
+        bound = np.minimum(query_size, sizes) / np.maximum(np.maximum(query_size, sizes), 1)
+        keep = bound >= min_similarity
+        chunk_indexes, sizes = chunk_indexes[keep], sizes[keep]
+
+        if not chunk_indexes.size or not query_size:
+            empty = np.empty(0, dtype=np.float64)
+            return chunk_indexes, empty, empty
+
+        # Gather the token ids of all surviving chunks into one array
+        total = int(sizes.sum())
+        owner = np.repeat(np.arange(len(chunk_indexes)), sizes)
+        positions = np.repeat(chunk_sets.offsets[chunk_indexes] - (np.cumsum(sizes) - sizes), sizes) + np.arange(total)
+        tokens = chunk_sets.flat[positions]
+
+        # Membership test against the sorted query set
+        found = np.searchsorted(query_set, tokens)
+        found[found == query_size] = 0
+        hits = query_set[found] == tokens
+
+        intersection = np.bincount(owner[hits], minlength=len(chunk_indexes))
+        jaccard = intersection / (query_size + sizes - intersection)
+        containment = intersection / np.minimum(query_size, sizes)
+
+        return chunk_indexes, jaccard, containment
+
+    def matching_spans(self, chunk, source_chunk):
+        """Character-level aligned spans between two chunks that passed the token filter"""
+        matcher = difflib.SequenceMatcher(None, chunk, source_chunk, autojunk=False)
+        return [
+            {
+                'start': block.a,
+                'end': block.a + block.size,
+                'source_start': block.b,
+                'source_end': block.b + block.size
+            }
+            for block in matcher.get_matching_blocks()
+            if block.size >= self.min_span_length
+        ]
+
+def match_chunk_pairs(items, min_similarity, min_span_length=20):
+    """
+    Score candidate chunk pairs and return the flagged matches
+
+    Module-level so it can run in a worker process; the serial path calls it
+    directly, so both produce identical results.
+
+    Args:
+        items: List of (chunk_index, chunk, query_set, source_name, candidates) tuples,
+               where candidates is a list of (source_chunk_index, source_chunk, source_set)
+               in source order
+        min_similarity: Minimum Jaccard score for a match
+        min_span_length: Shortest character match reported as a span
+
+    Returns:
+        List of flagged section dicts (without text positions), in item order
+    """
+    kernel = SimilarityKernel(min_span_length)
+    flagged_sections = []
+
+    for chunk_index, chunk, query_set, source_name, candidates in items:
+        candidate_sets = ChunkSets([source_set for _, _, source_set in candidates])
+        scored, jaccard, containment = kernel.batch_scores(
+            query_set, candidate_sets, range(len(candidates)), min_similarity
+        )
+        passed = np.flatnonzero(jaccard >= min_similarity)
+
+        # Report the first matching source chunk, as the candidates are in source order
+        if passed.size:
+            match = passed[0]
+            source_chunk = candidates[scored[match]][1]
+            flagged_sections.append({
+                'chunk_index': chunk_index,
+                'text': chunk,
+                'source': source_name,
+                'source_chunk_index': int(candidates[scored[match]][0]),
+                'similarity': float(jaccard[match]),
+                'containment': float(containment[match]),
+                'matched_spans': kernel.matching_spans(chunk, source_chunk)
+            })
+
+    return flagged_sections
@@ -0,0 +1,126 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from app.utils.profiling import count
+
+class PreprocessedText:
+    """Normalized text, chunks and fingerprints of a document, computed once"""
+
+    def __init__(self, normalized_text, offsets, words, word_starts, token_ids, chunk_spans, chunk_sets, fingerprint_index):
+        self.normalized_text = normalized_text
+        self.offsets = offsets  # Index in the original text of every normalized character
+        self.words = words  # Token array of the normalized text
+        self.word_starts = word_starts  # Index in the normalized text where every word starts
+        self.token_ids = token_ids  # uint32 token hashes, aligned with words
+        self.chunk_spans = chunk_spans  # (start, end) word ranges of each chunk
+        self.chunks = [' '.join(words[start:end]) for start, end in chunk_spans]
+        self.chunk_sets = chunk_sets  # ChunkSets of unique token ids per chunk
+        self.fingerprint_index = fingerprint_index  # Fingerprint -> set of chunk indexes
+
+        # Chunk index -> fingerprints contained in that chunk
+        self.chunk_prints = {}
+        for fingerprint, chunk_indexes in fingerprint_index.items():
+            for chunk_index in chunk_indexes:
+                self.chunk_prints.setdefault(chunk_index, []).append(fingerprint)
+
+    def original_chunk_span(self, chunk_index):
+        """Return the (start, end) character range of a chunk in the original text"""
+        start, end = self.chunk_spans[chunk_index]
+        last_char = self.word_starts[end - 1] + len(self.words[end - 1]) - 1
+        return self.offsets[self.word_starts[start]], self.offsets[last_char] + 1
+
+    def original_offset(self, chunk_index, offset, is_end=False):
+        """
+        Map a character offset inside a chunk string to the original text
+
+        Chunk strings join their words with single spaces, so the offset is
+        resolved through the word it falls in (a joining space maps to the end
+        of the preceding word). End offsets are exclusive.
+        """
+        if is_end:
+            offset -= 1
+
+        start, end = self.chunk_spans[chunk_index]
+        position = 0
+        for word_index in range(start, end):
+            length = len(self.words[word_index])
+            if offset <= position + length or word_index == end - 1:
+                within = max(0, min(offset - position, length - 1))
+                original = self.offsets[self.word_starts[word_index] + within]
+                return original + 1 if is_end else original
+            position += length + 1
+
+class SourceCache:
+    """Thread-safe LRU cache of PreprocessedText keyed by a content hash (of a text, or of a file with its page starts)"""
+
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(text, *params):
+        """Build a cache key from the SHA-256 of the text and the preprocessing parameters"""
+        return (hashlib.sha256(text.encode('utf-8', errors='surrogatepass')).hexdigest(),) + params
+
+    def get(self, key):
+        """Return the cached entry for key, or None on a miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            else:
+                self.misses += 1
+        count('source_cache_hits' if entry is not None else 'source_cache_misses')
+        return entry
+
+    def put(self, key, entry):
+        """Store an entry, evicting the least recently used ones"""
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_create(self, key, factory):
+        """Return the cached entry for key, building it with factory() on a miss"""
+        entry = self.get(key)
+        if entry is None:
+            # Built outside the lock so slow preprocessing doesn't block other threads
+            entry = factory()
+            self.put(key, entry)
+        return entry
+
+    def resize(self, maxsize):
+        """Change the maximum number of entries, evicting the oldest ones if needed"""
+        with self._lock:
+            self.maxsize = maxsize
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Drop all entries (counters are kept)"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Return hit/miss counters and current size"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_ratio': self.hits / lookups if lookups else 0.0
+            }
+
+# Shared by all detectors in the process, so sources are reused across requests
+source_cache = SourceCache()
@@ -1,26 +1,140 @@
 import re
 import os
+import hashlib
+import time
+import threading
 import nltk
-import textwrap
-from nltk.tokenize import sent_tokenize, word_tokenize
-from nltk.tag import pos_tag
-from nltk.corpus import stopwords
-from nltk.probability import FreqDist
+from nltk.tokenize import word_tokenize
+from nltk.tag.perceptron import PerceptronTagger
+from app.utils.text_document import TextDocument, tag_sentences
+from app.utils.sentence_cache import sentence_cache
+from app.utils.rule_engine import RulePack
+from app.utils import readability
+from app.utils.worker_pool import get_process_pool, discard_process_pool
+from app.utils.profiling import stage, timed, count
 
 class TextAnalyzer:
     """Utility class for text analysis and grammar checking"""
     
-    def __init__(self):
-        # Download necessary nltk resources
+    # NLTK data needed for analysis: download name -> resource path
+    REQUIRED_RESOURCES = {
+        'punkt': 'tokenizers/punkt/english.pickle',
+        'averaged_perceptron_tagger': 'taggers/averaged_perceptron_tagger/averaged_perceptron_tagger.pickle'
+    }
+    
+    # Version of stored per-unit and per-sentence results; bump when a stage's output changes
+    # (the rule pack digest is added, so editing a rule pack needs no bump)
+    ANALYSIS_VERSION = 3
+    
+    # A blank line after sentence-final punctuation (and closing quotes or brackets) ends an analysis unit
+    UNIT_BREAK = re.compile(r'[.!?]["\'”’)\]]*[ \t]*(\n[ \t]*\n\s*)')
+    NEXT_WORD = re.compile(r'\S+')
+    
+    def __init__(self, cache=None, rule_packs=()):
+        self.cache = cache if cache is not None else sentence_cache  # Per-sentence tokens, tags and rule hits
+        self.rule_packs = tuple(rule_packs)  # Custom rule pack files, loaded on top of the default pack
+        self.rules = RulePack.load(self.rule_packs)
+        
+        # Models are loaded by warm_up, once per process
+        self.nlp_available = False
+        self.sentence_tokenizer = None
+        self.tagger = None
+        self._warmed_up = False
+        self._lock = threading.Lock()
+        
+        # Cold-start measurements
+        self.resource_check_seconds = None
+        self.warmup_seconds = None
+        self.first_analysis_seconds = None
+        self.analyses = 0
+        
+        # Incremental re-analysis counters
+        self.units_reused = 0
+        self.units_analyzed = 0
+    
+    def warm_up(self, download=False):
+        """
+        Check NLTK resources and load the tokenizer and tagger models
+        
+        Runs once per process; later calls return immediately. Call it before
+        a pre-forking server forks, so workers share the loaded models.
+        
+        Args:
+            download: Download missing resources instead of disabling analysis
+            
+        Returns:
+            Whether analysis is available
+        """
+        if self._warmed_up:
+            return self.nlp_available
+        
+        with self._lock:
+            if self._warmed_up:
+                return self.nlp_available
+            
+            started = time.perf_counter()
+            missing = [name for name, resource in self.REQUIRED_RESOURCES.items() if not self._has_resource(resource)]
+            if missing and download:
+                for name in missing:
+                    nltk.download(name, quiet=True)
+                missing = [name for name in missing if not self._has_resource(self.REQUIRED_RESOURCES[name])]
+            self.resource_check_seconds = time.perf_counter() - started
+            
+            if missing:
+                # Graceful fallback if resources not available
+                print(f"Warning: NLTK resources not available ({', '.join(missing)}). Limited functionality.")
+            else:
+                self.sentence_tokenizer = nltk.data.load(self.REQUIRED_RESOURCES['punkt'])
+                self.tagger = PerceptronTagger()
+                self.nlp_available = True
+            
+            self.warmup_seconds = time.perf_counter() - started
+            self._warmed_up = True
+        
+        return self.nlp_available
+    
+    def use_rule_packs(self, paths):
+        """
+        Compile the default rules with custom rule packs on top
+        
+        Raises:
+            ValueError: If a pack can't be loaded or defines an invalid rule
+        """
+        paths = tuple(paths)
+        if paths != self.rule_packs:
+            self.rules = RulePack.load(paths)
+            self.rule_packs = paths
+    
+    @property
+    def version(self):
+        """Version of stored results: the analyzer version and the rules they were made with"""
+        return f"{self.ANALYSIS_VERSION}:{self.rules.digest[:16]}"
+    
+    @staticmethod
+    def _has_resource(resource):
+        """Check whether an NLTK resource is installed"""
         try:
-            nltk.download('punkt', quiet=True)
-            nltk.download('averaged_perceptron_tagger', quiet=True)
-            nltk.download('stopwords', quiet=True)
-            self.nlp_available = True
-        except:
-            # Graceful fallback if resources not available
-            self.nlp_available = False
-            print("Warning: NLTK resources not available. Limited functionality.")
+            nltk.data.find(resource)
+            return True
+        except LookupError:
+            return False
+    
+    def stats(self):
+        """Return warm-up and cold-start timings of this process"""
+        return {
+            'pid': os.getpid(),
+            'nlp_available': self.nlp_available,
+            'warmed_up': self._warmed_up,
+            'resource_check_seconds': self.resource_check_seconds,
+            'warmup_seconds': self.warmup_seconds,
+            'first_analysis_seconds': self.first_analysis_seconds,
+            'analyses': self.analyses,
+            'units_reused': self.units_reused,
+            'units_analyzed': self.units_analyzed,
+            'rules': len(self.rules.rules),
+            'rule_packs': list(self.rule_packs),
+            'sentence_cache': self.cache.stats()
+        }
     
     def analyze_text(self, text):
         """
@@ -32,81 +146,496 @@ class TextAnalyzer:
         Returns:
             Dict containing analysis results
         """
-        if not text or not self.nlp_available:
-            return {
-                'success': False,
-                'error': 'Text empty or NLTK resources not available',
-                'grammar_issues': [],
-                'clarity_score': 0,
-                'readability_score': 0,
-                'structure_feedback': 'Analysis not available'
-            }
+        if not text or not self.warm_up():
+            return self._unavailable_result()
+        
+        started = time.perf_counter()
+        
+        # Split, tokenize and tag once; every stage reads the same document
+        document = self._build_documents([text])[0]
+        result = self._analyze_document(document, *self._readability([document])[0])
+        
+        self._record_analyses(started, 1)
+        
+        return result
+    
+    def analyze_many(self, texts, workers=1, shard_size=None):
+        """
+        Analyze many texts, tagging their sentences together
+        
+        All texts are tokenized first and the sentences of every document are
+        then tagged as one batch, so the tagger runs in one tight loop instead
+        of once per document. With several workers the texts are sharded
+        across the shared process pool, each worker batching its shard.
+        
+        Args:
+            texts: Texts to analyze
+            workers: Worker processes (1 = analyze in the calling thread)
+            shard_size: Texts per worker task (default: spread over 4 tasks per worker)
+            
+        Returns:
+            List of analysis results, in the order of texts
+        """
+        texts = list(texts)
+        count('documents', len(texts))
+        started = time.perf_counter()
+        if workers > 1 and len(texts) > 1:
+            if shard_size is None:
+                shard_size = max(1, -(-len(texts) // (workers * 4)))
+            results = self._analyze_parallel(texts, workers, shard_size)
+            if results is not None:
+                self._record_analyses(started, sum(1 for result in results if result['success']))
+                return results
+        
+        if not self.warm_up():
+            return [self._unavailable_result() for _ in texts]
+        
+        built = iter(self._build_documents([text for text in texts if text]))
+        documents = [next(built) if text else None for text in texts]
+        
+        scores = iter(self._readability([document for document in documents if document]))
+        results = [self._analyze_document(document, *next(scores)) if document else self._unavailable_result() for document in documents]
+        
+        self._record_analyses(started, sum(1 for document in documents if document))
+        
+        return results
+    
+    def _record_analyses(self, started, analyses, reused=0, analyzed=0):
+        """
+        Count finished analyses and analysis units, and time the first analysis of the process
+        
+        Args:
+            started: perf_counter() value when the analysis started
+            analyses: Number of texts analyzed
+            reused: Units taken from a previous analysis
+            analyzed: Units analyzed from scratch
+        """
+        if not analyses:
+            return
+        
+        with self._lock:
+            if self.first_analysis_seconds is None:
+                self.first_analysis_seconds = time.perf_counter() - started
+            self.analyses += analyses
+            self.units_reused += reused
+            self.units_analyzed += analyzed
+        
+        if reused or analyzed:
+            count('units_reused', reused)
+            count('units_analyzed', analyzed)
+    
+    def _build_documents(self, texts):
+        """
+        Split, tokenize and tag texts, taking sentences seen before from the sentence cache
+        
+        Sentences missing from the cache are tokenized and then tagged together
+        in one batch; their tokens, tags, rule hits and readability counts are
+        cached for later documents.
+        """
+        with stage('sentence_split'):
+            sentence_spans = [list(self.sentence_tokenizer.span_tokenize(text)) for text in texts]
+        
+        with stage('sentence_cache'):
+            sentence_keys = [
+                [self.cache.make_key(text[start:end], self.version) for start, end in spans]
+                for text, spans in zip(texts, sentence_spans)
+            ]
+            
+            unique_keys = list(dict.fromkeys(key for keys in sentence_keys for key in keys))
+            entries = self.cache.get_many(unique_keys)
+        
+        with stage('tokenization'):
+            missing = {}  # key -> tokens of a sentence not in the cache
+            for text, spans, keys in zip(texts, sentence_spans, sentence_keys):
+                for (start, end), key in zip(spans, keys):
+                    if key not in entries and key not in missing:
+                        missing[key] = TextDocument.word_tokenizer.tokenize(text[start:end])
+        
+        with stage('pos_tagging'):
+            tagged_sentences = tag_sentences(list(missing.values()), self.tagger)
+        
+        with stage('rules'):
+            new_entries = {}
+            for key, tagged in zip(missing, tagged_sentences):
+                tokens = [word for word, _ in tagged]
+                tags = [tag for _, tag in tagged]
+                new_entries[key] = {
+                    'tokens': tokens,
+                    'tags': tags,
+                    'hits': self.rules.match_sentence(tokens, tags),
+                    'readability': readability.sentence_counts(tokens)
+                }
+        
+        with stage('sentence_cache'):
+            self.cache.put_many(new_entries)
+        entries.update(new_entries)
+        
+        with stage('document_build'):
+            documents = []
+            for text, spans, keys in zip(texts, sentence_spans, sentence_keys):
+                document = TextDocument.from_sentences(
+                    text, spans, [entries[key]['tokens'] for key in keys], [entries[key]['tags'] for key in keys]
+                )
+                document.sentence_hits = [entries[key]['hits'] for key in keys]
+                document.sentence_counts = [entries[key]['readability'] for key in keys]
+                documents.append(document)
+        
+        count('sentences', sum(len(keys) for keys in sentence_keys))
+        count('tokens', sum(len(document.tokens) for document in documents))
+        count('sentence_cache_hits', len(unique_keys) - len(missing))
+        count('sentence_cache_misses', len(missing))
+        
+        return documents
+    
+    def analyze_revision(self, text, previous=None):
+        """
+        Analyze a revised text, reusing the unchanged parts of a previous analysis
+        
+        The text is cut into units at blank lines that follow sentence-final
+        punctuation, so no sentence spans two units. Units whose content hash
+        appears in the previous analysis reuse its results; only new or edited
+        units are tokenized and tagged. Document-level scores are computed from
+        per-unit counts, so the work done scales with the size of the edit.
+        
+        Args:
+            text: The text to analyze
+            previous: Units returned for the previous version (None = analyze everything)
+            
+        Returns:
+            Tuple of (analysis result, units to keep for the next version)
+        """
+        if not text or not self.warm_up():
+            return self._unavailable_result(), None
+        
+        started = time.perf_counter()
+        cached = self._previous_units(previous)
+        
+        spans = self._split_units(text)
+        keys = [self._unit_key(text[start:end]) for start, end in spans]
+        
+        units = {}
+        changed = {}  # key -> unit text, for units not in the previous analysis
+        for key, (start, end) in zip(keys, spans):
+            if key in cached:
+                units[key] = cached[key]
+            else:
+                changed.setdefault(key, text[start:end])
+        
+        documents = self._build_documents(list(changed.values()))
+        for key, document in zip(changed, documents):
+            units[key] = self._analyze_unit(document)
+        
+        running = RunningAnalysis(self)
+        running.feed_text(text)
+        for key, (start, _) in zip(keys, spans):
+            running.add_unit(start, units[key])
+        result = running.result()
+        
+        self._record_analyses(started, 1, reused=len(spans) - len(changed), analyzed=len(changed))
+        
+        return result, {'version': self.version, 'units': units}
+    
+    def iter_analysis(self, segments, previous=None, max_unit_chars=100000):
+        """
+        Analyze text arriving in segments, yielding findings as units complete
+        
+        Text is buffered only until the next unit break, so memory stays
+        bounded by the largest unit (a unit growing past max_unit_chars is cut
+        at its last sentence boundary). Units are the ones analyze_revision
+        uses, and the previous analysis is reused the same way. Scores are
+        computed from running counts once the text ends.
+        
+        Args:
+            segments: Iterable of text segments (e.g. extracted pages)
+            previous: Units returned for the previous version (None = analyze everything)
+            max_unit_chars: Buffered characters after which a unit is cut without a blank line
+            
+        Yields:
+            (kind, finding) pairs with kind 'grammar_issue', 'improvement_suggestion'
+            or 'rewrite_suggestion', then ('result', (analysis result, units to keep))
+        """
+        if not self.warm_up():
+            yield 'result', (self._unavailable_result(), None)
+            return
+        
+        started = time.perf_counter()
+        cached = self._previous_units(previous)
+        running = RunningAnalysis(self)
+        units = {}
+        reused = 0
+        buffer = ''
+        offset = 0  # Position of buffer[0] in the whole text
+        
+        def flush(complete):
+            """Analyze the complete units at the start of the buffer; returns the consumed length"""
+            nonlocal reused
+            consumed = 0
+            breaks = list(self._iter_unit_breaks(buffer, complete=complete))
+            if complete:
+                breaks.append((len(buffer), len(buffer)))
+            elif len(buffer) > max_unit_chars and not breaks:
+                # No blank line in sight: cut before the last (possibly unfinished) sentence
+                sentence_starts = [start for start, _ in self.sentence_tokenizer.span_tokenize(buffer)]
+                if len(sentence_starts) > 1:
+                    breaks.append((sentence_starts[-1], sentence_starts[-1]))
+            
+            for end, next_start in breaks:
+                unit_text = buffer[consumed:end]
+                if unit_text:
+                    key = self._unit_key(unit_text)
+                    if key in cached:
+                        units[key] = cached[key]
+                        reused += 1
+                    elif key not in units:
+                        units[key] = self._analyze_unit(self._build_documents([unit_text])[0])
+                    yield from running.add_unit(offset + consumed, units[key])
+                consumed = next_start
+            return consumed
+        
+        for segment in segments:
+            if not segment:
+                continue
+            running.feed_text(segment)
+            buffer += segment
+            consumed = yield from flush(complete=False)
+            buffer = buffer[consumed:]
+            offset += consumed
+        
+        if not offset and not buffer.strip():
+            yield 'result', (self._unavailable_result(), None)
+            return
+        
+        yield from flush(complete=True)
+        
+        # Timed from the first segment, so the first streamed analysis includes its extraction
+        self._record_analyses(started, 1, reused=reused, analyzed=len(units) - reused)
+        
+        yield 'result', (running.result(), {'version': self.version, 'units': units})
+    
+    def is_current(self, stored_units):
+        """Check whether stored units were made by this analyzer version and rule set"""
+        return bool(stored_units) and stored_units.get('version') == self.version
+    
+    def _previous_units(self, previous):
+        """Stored units of a previous analysis, if made by this analyzer version"""
+        if self.is_current(previous):
+            return previous.get('units') or {}
+        return {}
+    
+    @staticmethod
+    def _unit_key(unit_text):
+        """Content hash identifying an analysis unit"""
+        return hashlib.sha256(unit_text.encode('utf-8', errors='surrogatepass')).hexdigest()
+    
+    def _split_units(self, text):
+        """(start, end) ranges of the analysis units of a text"""
+        spans = []
+        start = 0
+        for end, next_start in self._iter_unit_breaks(text):
+            spans.append((start, end))
+            start = next_start
+        if start < len(text) or not spans:
+            spans.append((start, len(text)))
+        return spans
+    
+    def _iter_unit_breaks(self, text, start=0, complete=True):
+        """
+        Yield (unit end, next unit start) of every unit break in text[start:]
+        
+        With complete=False the text may continue, so breaks that can't be
+        decided until more text arrives (trailing whitespace or the following
+        word reaching the end of the text) are not reported.
+        """
+        for match in self.UNIT_BREAK.finditer(text, start):
+            if not complete:
+                next_word = self.NEXT_WORD.match(text, match.end(1))
+                if not next_word or next_word.end() == len(text):
+                    return
+            if self._is_sentence_break(text, match.start(), match.end(1)):
+                yield match.start(1), match.end(1)
+    
+    def _is_sentence_break(self, text, punctuation, next_start):
+        """
+        Check that the sentence tokenizer ends a sentence at the punctuation
         
-        # Tokenize with NLTK
-        sentences = sent_tokenize(text)
-        words = word_tokenize(text)
-        pos_tags = pos_tag(words)
+        Punkt decides from the word ending at the punctuation and the word
+        after it (an abbreviation or number may not end a sentence), so a window
+        holding just those two words gives the same answer as the whole text.
+        """
+        window_start = max(text.rfind(' ', 0, punctuation), text.rfind('\n', 0, punctuation), text.rfind('\t', 0, punctuation)) + 1
+        match = self.NEXT_WORD.match(text, next_start)
+        window_end = match.end() if match else len(text)
+        return len(list(self.sentence_tokenizer.span_tokenize(text[window_start:window_end]))) > 1
+    
+    @timed('scoring')
+    def _analyze_unit(self, document):
+        """Findings (positions relative to the unit) and counts of one analysis unit"""
+        words = document.tokens
+        return {
+            'grammar_issues': self._find_grammar_issues(document),
+            'improvement_suggestions': [
+                suggestion for suggestion in self._generate_improvement_suggestions(document)
+                if suggestion['position'] is not None
+            ],
+            'rewrite_suggestions': self._generate_rewrite_suggestions(document),
+            'words': len(words),
+            'complex_words': sum(1 for word in words if len(word) > 7),
+            'characters': sum(len(word) for word in words),
+            'rule_counts': self._rule_matches(document)[1],
+            'readability': [int(count) for count in self._readability_counts(document)]
+        }
+    
+    @timed('parallel_analysis')
+    def _analyze_parallel(self, texts, workers, shard_size):
+        """Shard texts across the process pool; returns None if the pool failed"""
+        pool = get_process_pool(workers)
+        futures = []
+        
+        try:
+            futures = [
+                pool.submit(analyze_texts, texts[start:start + shard_size], self.cache.path, self.rule_packs)
+                for start in range(0, len(texts), shard_size)
+            ]
+            return [result for future in futures for result in future.result()]
+        except Exception as e:
+            # A crashed worker breaks the pool; replace it and fall back to the serial path
+            print(f"Parallel analysis failed, analyzing serially: {str(e)}")
+            discard_process_pool(workers)
+            return None
+        finally:
+            for future in futures:
+                future.cancel()
+    
+    @timed('scoring')
+    def _readability(self, documents):
+        """(counts, metrics) of the readability of documents, the metrics computed for all of them at once"""
+        counts = [self._readability_counts(document) for document in documents]
+        if not counts:
+            return []
+        return [(row, readability.metrics_dict(values)) for row, values in zip(counts, readability.metrics_many(counts))]
+    
+    @timed('scoring')
+    def _analyze_document(self, document, readability_counts, readability_metrics):
+        """Run every analysis stage over a tokenized and tagged document, given its readability counts and metrics"""
+        text = document.text
         
         # Find grammar issues
-        grammar_issues = self._find_grammar_issues(text, sentences, words, pos_tags)
+        grammar_issues = self._find_grammar_issues(document)
         
         # Calculate clarity score
-        clarity_score = self._calculate_clarity_score(words, pos_tags)
+        clarity_score = self._calculate_clarity_score(document.tokens, document.tags)
         
-        # Calculate readability score
-        readability_score = self._calculate_readability_score(text)
+        # Calculate the readability score from the same counts as the metrics
+        readability_score = readability.readability_score(readability_counts)
         
         # Analyze structure
         structure_feedback = self._analyze_structure(text)
         
         # Generate improvement suggestions
-        improvement_suggestions = self._generate_improvement_suggestions(text, sentences, words, pos_tags)
+        improvement_suggestions = self._generate_improvement_suggestions(document)
         
         # Generate rewrite suggestions
-        rewrite_suggestions = self._generate_rewrite_suggestions(sentences)
+        rewrite_suggestions = self._generate_rewrite_suggestions(document)
         
         return {
             'success': True,
             'grammar_issues': grammar_issues,
             'clarity_score': clarity_score,
             'readability_score': readability_score,
+            'readability_metrics': readability_metrics,
             'structure_feedback': structure_feedback,
             'improvement_suggestions': improvement_suggestions,
             'rewrite_suggestions': rewrite_suggestions
         }
     
-    def _find_grammar_issues(self, text, sentences, words, pos_tags):
-        """Find grammar issues in the text"""
+    @staticmethod
+    def _unavailable_result():
+        """Result returned when a text can't be analyzed"""
+        return {
+            'success': False,
+            'error': 'Text empty or NLTK resources not available',
+            'grammar_issues': [],
+            'clarity_score': 0,
+            'readability_score': 0,
+            'readability_metrics': None,
+            'structure_feedback': 'Analysis not available'
+        }
+    
+    def _find_grammar_issues(self, document):
+        """Find grammar issues in the text (positions are exact character spans)"""
+        matches, _ = self._rule_matches(document)
+        
+        # Rule by rule, in pack order
         issues = []
+        for rule in self.rules.rules_of_kind('grammar'):
+            issues.extend(self._findings(document, rule, matches.get(rule.id, ())))
         
-        # Simple rule-based checks (basic examples)
-        
-        # Check for repeated words
-        for i in range(1, len(words)):
-            if words[i].lower() == words[i-1].lower() and words[i].isalpha():
-                # Find position in text (approximate)
-                position = text.lower().find(words[i].lower() + " " + words[i].lower())
-                if position >= 0:
-                    issues.append({
-                        'type': 'repeated-word',
-                        'position': {'start': position, 'end': position + len(words[i])*2 + 1},
-                        'text': words[i] + " " + words[i],
-                        'suggestion': f"Repeated word: '{words[i]}'"
-                    })
+        return issues
+    
+    def _rule_matches(self, document):
+        """
+        Matches of every rule in a document, evaluated once per document
         
-        # Check for long, complex sentences
-        for sent in sentences:
-            sent_words = word_tokenize(sent)
-            if len(sent_words) > 40:  # More than 40 tokens
-                position = text.find(sent)
-                issues.append({
-                    'type': 'long-sentence',
-                    'position': {'start': position, 'end': position + len(sent)},
-                    'text': sent,
-                    'suggestion': 'Consider breaking this long sentence into smaller ones'
-                })
+        Sentences carry their rule hits when they came through the sentence
+        cache; otherwise the rules run over each sentence now. Repeats that
+        span two sentences are checked at each sentence boundary.
         
-        return issues
+        Returns:
+            Tuple of (id of each matching rule -> list of (first token, end token,
+            sentence index) in text order, density rule id -> tokens counted)
+        """
+        if document.rule_matches is not None:
+            return document.rule_matches
+        
+        rules = self.rules
+        tokens = document.tokens
+        sentence_hits = document.sentence_hits
+        if sentence_hits is None:
+            sentence_hits = [
+                rules.match_sentence(tokens[first:last], document.tags[first:last])
+                for first, last in document.sentence_token_ranges
+            ]
+        
+        matches = {}
+        counts = dict.fromkeys((rule.id for rule in rules.density_rules), 0)
+        for j, ((first, last), hits) in enumerate(zip(document.sentence_token_ranges, sentence_hits)):
+            if 0 < first < last:
+                for rule_id in rules.match_boundary(tokens[first - 1], tokens[first]):
+                    matches.setdefault(rule_id, []).append((first - 1, first + 1, j))
+            for rule_id, start, end in hits['matches']:
+                matches.setdefault(rule_id, []).append((first + start, first + end, j))
+            for rule_id, count in hits['counts'].items():
+                counts[rule_id] += count
+        
+        for found in matches.values():
+            found.sort()
+        
+        document.rule_matches = (matches, counts)
+        return document.rule_matches
+    
+    @staticmethod
+    def _findings(document, rule, matches):
+        """Findings of a rule's matches: the matched tokens, or each matching sentence once"""
+        findings = []
+        reported = set()
+        for first, end, sentence_index in matches:
+            if rule.report == 'sentence':
+                if sentence_index in reported:
+                    continue
+                reported.add(sentence_index)
+                start, stop = document.sentence_spans[sentence_index]
+                text = document.sentences[sentence_index]
+            else:
+                start, stop = document.token_spans[first][0], document.token_spans[end - 1][1]
+                text = document.text[start:stop]
+            
+            findings.append({
+                'type': rule.id,
+                'position': {'start': start, 'end': stop},
+                'text': text,
+                'suggestion': rule.format_message(document.tokens[end - 1])
+            })
+        return findings
     
     def _calculate_clarity_score(self, words, pos_tags):
         """Calculate clarity score (0-10)"""
@@ -114,10 +643,18 @@ class TextAnalyzer:
         # In a real app, this would be more sophisticated
         
         # Count long and complex words
-        complex_word_ratio = sum(1 for word in words if len(word) > 7) / len(words) if words else 0
+        complex_words = sum(1 for word in words if len(word) > 7)
+        characters = sum(len(word) for word in words)
         
-        # Average sentence length (using existing tokenization)
-        avg_word_len = sum(len(word) for word in words) / len(words) if words else 0
+        return self._clarity_from_counts(len(words), complex_words, characters)
+    
+    @staticmethod
+    def _clarity_from_counts(word_count, complex_words, characters):
+        """Clarity score (0-10) from word, long-word and character counts"""
+        complex_word_ratio = complex_words / word_count if word_count else 0
+        
+        # Average word length
+        avg_word_len = characters / word_count if word_count else 0
         
         # Calculate clarity score (lower complexity, higher clarity)
         clarity_score = 10 - (complex_word_ratio * 10) - (min(avg_word_len / 10, 0.5) * 10)
@@ -125,63 +662,37 @@ class TextAnalyzer:
         # Ensure score is between 0-10
         return max(0, min(clarity_score, 10))
     
-    def _calculate_readability_score(self, text):
-        """Calculate readability score (0-10) using a simple formula"""
-        # Count sentences
-        sentences = sent_tokenize(text)
-        
-        # Count words
-        words = word_tokenize(text)
-        
-        # Count syllables (approximate)
-        syllables = sum(self._count_syllables(word) for word in words)
-        
-        # Calculate Flesch-Kincaid Grade Level (simplified)
-        if len(words) == 0 or len(sentences) == 0:
-            return 5  # Default middle score
-            
-        fk_score = 0.39 * (len(words) / len(sentences)) + 11.8 * (syllables / len(words)) - 15.59
-        
-        # Convert to 0-10 scale, where lower grade level means higher readability
-        readability_score = max(0, min(10, 10 - (fk_score / 2)))
-        
-        return readability_score
-    
-    def _count_syllables(self, word):
-        """Count syllables in a word (approximate)"""
-        word = word.lower()
-        if len(word) <= 3:
-            return 1
-            
-        # Remove final e
-        word = re.sub(r'e$', '', word)
-        
-        # Count vowel groups
-        syllables = len(re.findall(r'[aeiouy]+', word))
-        
-        return max(1, syllables)
+    def _readability_counts(self, document):
+        """Readability counts of a document, summed from its sentences (counted once per sentence)"""
+        counts = document.sentence_counts
+        if counts is None:
+            counts = [readability.sentence_counts(document.sentence_tokens(i)) for i in range(len(document.sentences))]
+        return readability.total_counts(counts)
     
     def _analyze_structure(self, text):
         """Analyze document structure"""
         paragraphs = [p for p in text.split('\n\n') if p.strip()]
+        lengths = [len(p) for p in paragraphs]
         
-        if len(paragraphs) < 3:
+        return self._structure_feedback(len(lengths), lengths[0] if lengths else 0, lengths[-1] if lengths else 0, sum(lengths))
+    
+    def _structure_feedback(self, paragraph_count, intro_length, conclusion_length, total_length):
+        """Structure feedback from the paragraph count and the lengths of the first, last and all paragraphs"""
+        if paragraph_count < 3:
             return "The document appears to have limited structure. Consider organizing content into clear introduction, body, and conclusion sections."
             
         # Analyze first paragraph (introduction)
-        intro = paragraphs[0]
         intro_feedback = "Introduction: "
-        if len(intro) < 200:
+        if intro_length < 200:
             intro_feedback += "Your introduction is concise, but may need more context. "
-        elif len(intro) > 600:
+        elif intro_length > 600:
             intro_feedback += "Your introduction is quite long. Consider making it more focused. "
         else:
             intro_feedback += "Your introduction has good length. "
             
         # Analyze middle paragraphs (body)
         body_feedback = "Body: "
-        body_paragraphs = paragraphs[1:-1]
-        avg_paragraph_len = sum(len(p) for p in body_paragraphs) / len(body_paragraphs) if body_paragraphs else 0
+        avg_paragraph_len = (total_length - intro_length - conclusion_length) / (paragraph_count - 2)
         
         if avg_paragraph_len < 300:
             body_feedback += "Your paragraphs are relatively short. Consider developing ideas more fully. "
@@ -191,96 +702,71 @@ class TextAnalyzer:
             body_feedback += "Your paragraph length is good. "
             
         # Analyze last paragraph (conclusion)
-        conclusion = paragraphs[-1]
         conclusion_feedback = "Conclusion: "
-        if len(conclusion) < 150:
+        if conclusion_length < 150:
             conclusion_feedback += "Your conclusion is brief. Consider summarizing key points more thoroughly. "
-        elif len(conclusion) > 500:
+        elif conclusion_length > 500:
             conclusion_feedback += "Your conclusion is quite long. Consider making it more concise. "
         else:
             conclusion_feedback += "Your conclusion has good length. "
             
         return intro_feedback + body_feedback + conclusion_feedback
     
-    def _generate_improvement_suggestions(self, text, sentences, words, pos_tags):
+    def _generate_improvement_suggestions(self, document):
         """Generate content improvement suggestions"""
+        matches, counts = self._rule_matches(document)
+        
+        # Sentence-level suggestions rule by rule, then document-level ones
         suggestions = []
+        for rule in self.rules.rules_of_kind('suggestion'):
+            if rule.match != 'density':
+                suggestions.extend(self._findings(document, rule, matches.get(rule.id, ())))
         
-        # Check for weak verbs
-        weak_verbs = ['is', 'was', 'are', 'were', 'be', 'been', 'being', 'has', 'have', 'had']
-        for i, (word, tag) in enumerate(pos_tags):
-            if word.lower() in weak_verbs and tag.startswith('VB'):
-                # Find the sentence containing this word
-                for sent in sentences:
-                    if word in sent.split():
-                        suggestions.append({
-                            'type': 'weak-verb',
-                            'text': sent,
-                            'position': {'start': text.find(sent), 'end': text.find(sent) + len(sent)},
-                            'suggestion': 'Consider using a stronger, more specific verb'
-                        })
-                        break
-        
-        # Check for passive voice (simplified detection)
-        for sent in sentences:
-            sent_words = word_tokenize(sent)
-            sent_tags = pos_tag(sent_words)
-            
-            # Look for 'be' verb followed by past participle
-            for i in range(len(sent_tags) - 1):
-                if sent_tags[i][0].lower() in ['is', 'are', 'was', 'were', 'be', 'been', 'being'] and \
-                   sent_tags[i+1][1] == 'VBN':
-                    suggestions.append({
-                        'type': 'passive-voice',
-                        'text': sent,
-                        'position': {'start': text.find(sent), 'end': text.find(sent) + len(sent)},
-                        'suggestion': 'Consider using active voice for more direct expression'
-                    })
-                    break
+        suggestions.extend(self._density_suggestions(counts, len(document.tokens)))
         
-        # Check for excessive adverbs
-        adverb_count = sum(1 for word, tag in pos_tags if tag == 'RB')
-        if adverb_count > len(words) * 0.05:  # More than 5% adverbs
-            suggestions.append({
-                'type': 'excessive-adverbs',
+        return suggestions
+    
+    def _density_suggestions(self, counts, token_count):
+        """Document-level suggestions of density rules (e.g. more than 5% adverbs)"""
+        return [
+            {
+                'type': rule.id,
                 'text': None,
                 'position': None,
-                'suggestion': 'Your writing contains many adverbs. Consider replacing some with stronger verbs or more specific descriptions'
-            })
-            
-        return suggestions
+                'suggestion': rule.format_message()
+            }
+            for rule in self.rules.density_rules
+            if counts.get(rule.id, 0) > token_count * rule.max_ratio
+        ]
     
-    def _generate_rewrite_suggestions(self, sentences):
+    def _generate_rewrite_suggestions(self, document):
         """Generate rewrite suggestions for problematic sections"""
-        rewrite_suggestions = []
+        matches, _ = self._rule_matches(document)
+        rewrite_rules = self.rules.rules_of_kind('rewrite')
         
-        # Find sentences with potential issues
-        for sent in sentences:
-            sent_words = word_tokenize(sent)
-            
-            # Check for very long sentences
-            if len(sent_words) > 35:
-                simpler_alternative = self._generate_simpler_alternative(sent)
-                rewrite_suggestions.append({
-                    'original': sent,
-                    'suggestion': simpler_alternative,
-                    'reason': 'Sentence is too long and may be difficult to follow'
-                })
-                
-            # Check for sentences with many conjunctions
-            conjunction_count = sent.lower().count(' and ') + sent.lower().count(' but ') + sent.lower().count(' or ')
-            if conjunction_count >= 3:
-                simpler_alternative = self._generate_simpler_alternative(sent)
-                rewrite_suggestions.append({
-                    'original': sent,
-                    'suggestion': simpler_alternative,
-                    'reason': 'Sentence contains many conjunctions and could be broken down'
-                })
+        # Sentence index -> ids of the rewrite rules it matches
+        sentence_rules = {}
+        for rule in rewrite_rules:
+            for _, _, sentence_index in matches.get(rule.id, ()):
+                sentence_rules.setdefault(sentence_index, set()).add(rule.id)
+        
+        # Sentence by sentence, one suggestion per rule the sentence matches
+        rewrite_suggestions = []
+        for i in sorted(sentence_rules):
+            sent = document.sentences[i]
+            simpler_alternative = self._generate_simpler_alternative(sent, document.sentence_tokens(i))
+            for rule in rewrite_rules:
+                if rule.id in sentence_rules[i]:
+                    rewrite_suggestions.append({
+                        'original': sent,
+                        'suggestion': simpler_alternative,
+                        'reason': rule.format_message()
+                    })
                 
         return rewrite_suggestions
         
-    def _generate_simpler_alternative(self, sentence):
-        """Generate a simpler alternative for a complex sentence"""
+    def _generate_simpler_alternative(self, sentence, words=None):
+        """Generate a simpler alternative for a complex sentence (words: its tokens, if known)"""
         # This is a simplified implementation and would be more sophisticated in a real app
         
         # Break sentence at conjunctions
@@ -292,7 +778,8 @@ class TextAnalyzer:
                             for i, part in enumerate(parts))
         
         # If we can't split at conjunctions, just break a long sentence in half
-        words = word_tokenize(sentence)
+        if words is None:
+            words = word_tokenize(sentence)
         if len(words) > 20:
             mid = len(words) // 2
             
@@ -308,4 +795,144 @@ class TextAnalyzer:
             
             return first_half + '. ' + second_half
         
-        return sentence 
\ No newline at end of file
+        return sentence 
+
+class RunningAnalysis:
+    """
+    Findings and counts of a text analyzed unit by unit
+    
+    Combines unit results into the result analyze_text returns for the whole
+    text, keeping only findings and counters (never tokens or the text).
+    """
+    
+    COUNTS = ('words', 'complex_words', 'characters')
+    
+    def __init__(self, analyzer):
+        self.analyzer = analyzer
+        
+        # Stages list their findings rule by rule, in pack order; merged findings keep that order
+        rules = analyzer.rules
+        self.grammar_issues = {rule.id: [] for rule in rules.rules_of_kind('grammar')}
+        self.improvement_suggestions = {
+            rule.id: [] for rule in rules.rules_of_kind('suggestion') if rule.match != 'density'
+        }
+        self.rewrite_suggestions = []
+        self.totals = dict.fromkeys(self.COUNTS, 0)
+        self.rule_counts = dict.fromkeys((rule.id for rule in rules.density_rules), 0)
+        self.readability_counts = readability.total_counts([])
+        
+        # Paragraphs as _analyze_structure splits them (on blank lines), counted as text is fed
+        self.paragraph_count = 0
+        self.intro_length = 0
+        self.conclusion_length = 0
+        self.total_length = 0
+        self._paragraph_length = 0
+        self._paragraph_has_text = False
+        self._newline = ''  # A trailing newline that may start the next separator
+    
+    def add_unit(self, offset, unit):
+        """
+        Add the results of a unit starting at offset in the text
+        
+        Returns:
+            List of (kind, finding) pairs of the unit, with positions in the whole text
+        """
+        findings = []
+        
+        for issue in unit['grammar_issues']:
+            issue = self._shifted(issue, offset)
+            self.grammar_issues.setdefault(issue['type'], []).append(issue)
+            findings.append(('grammar_issue', issue))
+        
+        for suggestion in unit['improvement_suggestions']:
+            suggestion = self._shifted(suggestion, offset)
+            self.improvement_suggestions.setdefault(suggestion['type'], []).append(suggestion)
+            findings.append(('improvement_suggestion', suggestion))
+        
+        for suggestion in unit['rewrite_suggestions']:
+            self.rewrite_suggestions.append(suggestion)
+            findings.append(('rewrite_suggestion', suggestion))
+        
+        for name in self.COUNTS:
+            self.totals[name] += unit[name]
+        for rule_id, count in unit['rule_counts'].items():
+            self.rule_counts[rule_id] = self.rule_counts.get(rule_id, 0) + count
+        self.readability_counts = self.readability_counts + unit['readability']
+        
+        return findings
+    
+    @staticmethod
+    def _shifted(finding, offset):
+        """Copy of a finding with its position moved by offset"""
+        position = finding['position']
+        return dict(finding, position={'start': position['start'] + offset, 'end': position['end'] + offset})
+    
+    def feed_text(self, text):
+        """Count the paragraphs of the next piece of text, split on blank lines as _analyze_structure does"""
+        parts = (self._newline + text).split('\n\n')
+        
+        # A trailing newline may pair with a leading one in the next piece
+        self._newline = ''
+        if parts[-1].endswith('\n'):
+            self._newline = '\n'
+            parts[-1] = parts[-1][:-1]
+        
+        for part in parts[:-1]:
+            self._add_to_paragraph(part)
+            self._end_paragraph()
+        self._add_to_paragraph(parts[-1])
+    
+    def _add_to_paragraph(self, part):
+        self._paragraph_length += len(part)
+        self._paragraph_has_text = self._paragraph_has_text or bool(part.strip())
+    
+    def _end_paragraph(self):
+        """Count the current paragraph unless it is blank"""
+        if self._paragraph_has_text:
+            if not self.paragraph_count:
+                self.intro_length = self._paragraph_length
+            self.paragraph_count += 1
+            self.conclusion_length = self._paragraph_length
+            self.total_length += self._paragraph_length
+        self._paragraph_length = 0
+        self._paragraph_has_text = False
+    
+    def result(self):
+        """The analysis result of everything added so far"""
+        self._add_to_paragraph(self._newline)
+        self._newline = ''
+        self._end_paragraph()
+        
+        analyzer = self.analyzer
+        totals = self.totals
+        improvement_suggestions = [suggestion for suggestions in self.improvement_suggestions.values() for suggestion in suggestions]
+        improvement_suggestions.extend(analyzer._density_suggestions(self.rule_counts, totals['words']))
+        
+        return {
+            'success': True,
+            'grammar_issues': [issue for issues in self.grammar_issues.values() for issue in issues],
+            'clarity_score': analyzer._clarity_from_counts(totals['words'], totals['complex_words'], totals['characters']),
+            'readability_score': readability.readability_score(self.readability_counts),
+            'readability_metrics': readability.metrics(self.readability_counts),
+            'structure_feedback': analyzer._structure_feedback(
+                self.paragraph_count, self.intro_length, self.conclusion_length, self.total_length
+            ),
+            'improvement_suggestions': improvement_suggestions,
+            'rewrite_suggestions': self.rewrite_suggestions
+        }
+
+# Shared by all requests and job workers in the process, warmed up by create_app
+text_analyzer = TextAnalyzer()
+
+def analyze_texts(texts, cache_path=None, rule_packs=()):
+    """
+    Analyze a shard of texts with this process's analyzer
+    
+    Module-level so shards can be analyzed in worker processes; each worker
+    loads the models once, on its first shard, and shares the parent's
+    on-disk sentence cache and rule packs.
+    """
+    if cache_path and sentence_cache.path != cache_path:
+        sentence_cache.configure(path=cache_path)
+    text_analyzer.use_rule_packs(rule_packs)
+    return text_analyzer.analyze_many(texts)
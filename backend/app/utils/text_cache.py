@@ -0,0 +1,82 @@
+import hashlib
+from datetime import datetime, timedelta
+from sqlalchemy.exc import IntegrityError
+from app.extensions import db
+from app.models.extracted_text import ExtractedText
+
+class ExtractedTextCache:
+    """Content-addressed store of extracted file text, shared by the feedback and plagiarism pipelines"""
+
+    EXTRACTOR_VERSION = 1  # Bump when extraction changes so stale texts are re-extracted
+    BLOCK_SIZE = 1024 * 1024  # Bytes read at a time when hashing a file
+    TOUCH_INTERVAL = timedelta(hours=1)  # last_used_at is only updated when older than this
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def file_digest(cls, file_path):
+        """Return the hex SHA-256 of a file's bytes"""
+        digest = hashlib.sha256()
+        with open(file_path, 'rb') as file:
+            for block in iter(lambda: file.read(cls.BLOCK_SIZE), b''):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def get(self, content_hash):
+        """
+        Look up the extracted text of a file by content hash
+
+        Nothing is committed here: a stale last_used_at is updated in the
+        caller's session and saved with the caller's commit.
+
+        Returns:
+            Tuple of (text, page_starts), or None on a miss
+        """
+        entry = ExtractedText.query.filter_by(content_hash=content_hash).first()
+        if not entry or entry.extractor_version != self.EXTRACTOR_VERSION:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        now = datetime.utcnow()
+        if entry.last_used_at is None or now - entry.last_used_at > self.TOUCH_INTERVAL:
+            entry.last_used_at = now
+        return entry.text, entry.page_starts
+
+    def put(self, content_hash, text, page_starts=None):
+        """
+        Store the extracted text of a file, replacing an entry from an older extractor
+
+        The entry is written in a savepoint, so the caller's pending changes
+        are neither committed nor rolled back here; the caller's commit saves it.
+        """
+        try:
+            with db.session.begin_nested():
+                entry = ExtractedText.query.filter_by(content_hash=content_hash).first()
+                if entry is None:
+                    entry = ExtractedText(content_hash=content_hash)
+                    db.session.add(entry)
+
+                entry.extractor_version = self.EXTRACTOR_VERSION
+                entry.text = text
+                entry.page_starts = page_starts
+                entry.char_count = len(text)
+                entry.last_used_at = datetime.utcnow()
+        except IntegrityError:
+            # Another worker stored the same file first
+            pass
+
+    def stats(self):
+        """Return hit/miss counters and the number of stored texts"""
+        lookups = self.hits + self.misses
+        return {
+            'size': ExtractedText.query.count(),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': self.hits / lookups if lookups else 0.0
+        }
+
+# Shared by all detectors created through PlagiarismDetector.from_config
+extracted_text_cache = ExtractedTextCache()
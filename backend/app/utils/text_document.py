@@ -0,0 +1,135 @@
+import nltk
+from nltk.tokenize import NLTKWordTokenizer
+from nltk.tag import pos_tag_sents
+
+# Treebank turns double quotes into `` and '' tokens
+_QUOTE_TOKENS = {'``': ('``', '"'), "''": ("''", '"')}
+
+class TextDocument:
+    """Sentences, tokens and POS tags of a text with character spans, built once per analysis"""
+
+    word_tokenizer = NLTKWordTokenizer()  # The tokenizer behind nltk.word_tokenize
+
+    def __init__(self, text, sentence_spans, tokens, token_spans, tags, sentence_token_ranges):
+        self.text = text
+        self.sentence_spans = sentence_spans  # (start, end) character range of every sentence
+        self.sentences = [text[start:end] for start, end in sentence_spans]
+        self.tokens = tokens  # Word tokens of the whole text, as word_tokenize returns them
+        self.token_spans = token_spans  # (start, end) character range of every token
+        self.tags = tags  # POS tag of every token
+        self.sentence_token_ranges = sentence_token_ranges  # (first, end) token range of every sentence
+        self.sentence_hits = None  # Rule matches of each sentence, if the analyzer recorded them
+        self.rule_matches = None  # Rule matches of the whole document, once the analyzer evaluated them
+        self.sentence_counts = None  # Readability counts of each sentence, if the analyzer recorded them
+
+        # Token index -> index of the sentence containing it
+        self.token_sentences = [
+            sentence_index
+            for sentence_index, (first, last) in enumerate(sentence_token_ranges)
+            for _ in range(first, last)
+        ]
+
+    @classmethod
+    def from_text(cls, text, sentence_tokenizer=None, tagger=None):
+        """
+        Split, tokenize and tag a text in a single pass
+
+        Sentences come from the Punkt model used by sent_tokenize and tokens
+        from the tokenizer used by word_tokenize, so tokens match
+        word_tokenize(text). Every sentence is tagged on its own.
+
+        Args:
+            text: The text to analyze
+            sentence_tokenizer: Loaded Punkt model (loaded through nltk.data if omitted)
+            tagger: Loaded POS tagger (NLTK's default tagger if omitted)
+        """
+        document = cls.tokenize(text, sentence_tokenizer)
+        document.set_tags(tag_sentences(document.token_lists(), tagger))
+        return document
+
+    @classmethod
+    def tokenize(cls, text, sentence_tokenizer=None):
+        """
+        Split and tokenize a text without tagging it
+
+        The returned document has no tags until set_tags is called, which lets
+        callers tag the sentences of many documents together.
+        """
+        if sentence_tokenizer is None:
+            sentence_tokenizer = nltk.data.load('tokenizers/punkt/english.pickle')
+        sentence_spans = list(sentence_tokenizer.span_tokenize(text))
+
+        sentence_tokens = [cls.word_tokenizer.tokenize(text[start:end]) for start, end in sentence_spans]
+        return cls.from_sentences(text, sentence_spans, sentence_tokens)
+
+    @classmethod
+    def from_sentences(cls, text, sentence_spans, sentence_tokens, sentence_tags=None):
+        """
+        Build a document from the tokens (and tags, if known) of every sentence
+
+        Token spans are found in the text, so the tokens may come from a cache
+        instead of the tokenizer.
+        """
+        tokens = []
+        token_spans = []
+        sentence_token_ranges = []
+        for (start, end), words in zip(sentence_spans, sentence_tokens):
+            first = len(tokens)
+            tokens.extend(words)
+            token_spans.extend(cls.align_tokens(text, words, start, end))
+            sentence_token_ranges.append((first, len(tokens)))
+
+        tags = [tag for sentence in sentence_tags for tag in sentence] if sentence_tags is not None else None
+        return cls(text, sentence_spans, tokens, token_spans, tags, sentence_token_ranges)
+
+    def token_lists(self):
+        """Tokens of every sentence, in the form POS taggers take"""
+        return [self.tokens[first:last] for first, last in self.sentence_token_ranges]
+
+    def set_tags(self, tagged_sentences):
+        """Store the tags of (token, tag) sentences as returned for token_lists()"""
+        self.tags = [tag for sentence in tagged_sentences for _, tag in sentence]
+
+    @staticmethod
+    def align_tokens(text, tokens, start=0, end=None):
+        """
+        Find the (start, end) character range of each token in text[start:end]
+
+        Tokens the tokenizer rewrote (quotes) are matched against their original
+        spelling; a token that can't be found gets an empty span at the cursor.
+        """
+        if end is None:
+            end = len(text)
+
+        spans = []
+        cursor = start
+        for token in tokens:
+            best = None
+            for candidate in _QUOTE_TOKENS.get(token, (token,)):
+                position = text.find(candidate, cursor, end)
+                if position >= 0 and (best is None or position < best[0]):
+                    best = (position, position + len(candidate))
+
+            if best is None:
+                spans.append((cursor, cursor))
+            else:
+                spans.append(best)
+                cursor = best[1]
+
+        return spans
+
+    def sentence_tokens(self, sentence_index):
+        """Tokens of one sentence"""
+        first, last = self.sentence_token_ranges[sentence_index]
+        return self.tokens[first:last]
+
+    def sentence_tags(self, sentence_index):
+        """(token, tag) pairs of one sentence"""
+        first, last = self.sentence_token_ranges[sentence_index]
+        return list(zip(self.tokens[first:last], self.tags[first:last]))
+
+def tag_sentences(token_lists, tagger=None):
+    """POS tag a list of tokenized sentences with a loaded tagger (NLTK's default tagger if omitted)"""
+    if tagger is None:
+        return pos_tag_sents(token_lists)
+    return [tagger.tag(words) for words in token_lists]
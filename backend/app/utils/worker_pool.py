@@ -0,0 +1,38 @@
+import atexit
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+def get_process_pool(max_workers):
+    """
+    Return the long-lived process pool with max_workers workers
+
+    Pools are created on first use and reused by every later request in the
+    process. Workers are spawned (not forked) so they never inherit locks or
+    database connections held by request threads.
+    """
+    with _pools_lock:
+        pool = _pools.get(max_workers)
+        if pool is None:
+            pool = ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context('spawn'))
+            _pools[max_workers] = pool
+        return pool
+
+def discard_process_pool(max_workers):
+    """Drop a pool (e.g. after a worker crashed) so the next call creates a fresh one"""
+    with _pools_lock:
+        pool = _pools.pop(max_workers, None)
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+@atexit.register
+def shutdown_process_pools():
+    """Shut down all pools when the process exits"""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.shutdown(wait=False, cancel_futures=True)
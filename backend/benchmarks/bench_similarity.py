@@ -0,0 +1,92 @@
+"""
+Benchmark the token-level similarity kernel against the legacy difflib path
+
+Usage:
+    python benchmarks/bench_similarity.py [--file uploads/assignments/homework-1.txt] [--words 3000] [--sources 5]
+
+Without --file a synthetic essay of --words words is generated; each source
+shares a few copied passages with it.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.plagiarism_detector import PlagiarismDetector
+from app.utils.source_cache import SourceCache
+
+def legacy_find_similar_chunks(detector, text, comparison_sources, min_similarity=0.8):
+    """The original all-pairs difflib comparison"""
+    normalized_text = detector.normalize_text(text)
+    chunks = detector.split_into_chunks(normalized_text)
+    flagged_sections = []
+
+    for i, chunk in enumerate(chunks):
+        for source_name, source_text in comparison_sources.items():
+            source_chunks = detector.split_into_chunks(detector.normalize_text(source_text))
+            for source_chunk in source_chunks:
+                similarity = detector.calculate_similarity(chunk, source_chunk)
+                if similarity >= min_similarity:
+                    flagged_sections.append({'chunk_index': i, 'source': source_name, 'similarity': similarity})
+                    break
+
+    return flagged_sections
+
+def make_corpus(words, sources, seed=42):
+    """Generate an essay and sources that each copy some of its passages"""
+    rng = random.Random(seed)
+    letters = 'abcdefghijklmnopqrstuvwxyz'
+    vocabulary = [''.join(rng.choice(letters) for _ in range(rng.randint(2, 9))) for _ in range(3000)]
+
+    essay = [rng.choice(vocabulary) for _ in range(words)]
+    comparison_sources = {}
+    for n in range(sources):
+        source = [rng.choice(vocabulary) for _ in range(words // 2)]
+        start = rng.randrange(0, max(1, words - 300))
+        source[100:100] = essay[start:start + 300]  # Copied passage
+        comparison_sources[f"source-{n}"] = ' '.join(source)
+
+    return ' '.join(essay), comparison_sources
+
+def timed(func, repeat):
+    """Best wall-clock time of func over repeat runs"""
+    best, result = None, None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--file', help='Essay to check (a synthetic one is generated if omitted)')
+    parser.add_argument('--words', type=int, default=3000, help='Words in the synthetic essay')
+    parser.add_argument('--sources', type=int, default=5, help='Number of comparison sources')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per path (best time is reported)')
+    args = parser.parse_args()
+
+    text, comparison_sources = make_corpus(args.words, args.sources)
+    if args.file:
+        text = PlagiarismDetector().extract_text_from_file(args.file) or text
+
+    detector = PlagiarismDetector(cache=SourceCache())
+    legacy_time, legacy = timed(lambda: legacy_find_similar_chunks(detector, text, comparison_sources), 1)
+
+    def cold():
+        detector.cache.clear()
+        return detector.find_similar_chunks(text, comparison_sources)
+
+    cold_time, flagged = timed(cold, args.repeat)
+    warm_time, _ = timed(lambda: detector.find_similar_chunks(text, comparison_sources), args.repeat)
+
+    print(f"words={len(text.split())} sources={len(comparison_sources)}")
+    print(f"legacy difflib path:   {legacy_time * 1000:10.1f} ms  ({len(legacy)} flagged)")
+    print(f"kernel (cold cache):   {cold_time * 1000:10.1f} ms  ({len(flagged)} flagged)  {legacy_time / cold_time:8.1f}x")
+    print(f"kernel (warm cache):   {warm_time * 1000:10.1f} ms  {legacy_time / warm_time:25.1f}x")
+
+if __name__ == '__main__':
+    main()
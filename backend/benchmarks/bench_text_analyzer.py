@@ -0,0 +1,122 @@
+"""
+Measure text analyzer cold start and steady-state latency in a fresh process
+
+Usage:
+    python benchmarks/bench_text_analyzer.py [--file uploads/assignments/homework-1.txt] [--words 2000] [--runs 10] [--lazy]
+    python benchmarks/bench_text_analyzer.py --batch 100 [--workers 4]
+
+By default the analyzer is warmed up first, as create_app does. With --lazy
+the first analysis also pays for loading the models, as a worker that was
+never warmed up would. With --batch the analyzer instead analyzes that many
+documents one by one and then with analyze_many, and reports documents per
+second for both. The sentence cache is off unless --cache is given, so
+repeated runs measure the analysis itself. Requires the NLTK punkt and averaged_perceptron_tagger data.
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+started = time.perf_counter()
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.text_analyzer import TextAnalyzer
+from app.utils.sentence_cache import SentenceCache
+
+import_seconds = time.perf_counter() - started
+
+def make_essay(words, seed=42):
+    """Generate paragraphs of plain sentences"""
+    rng = random.Random(seed)
+    vocabulary = (
+        "the student was asked to write a report about how the results were analysed and "
+        "why the method is considered reliable but some data has been collected carefully "
+        "while other findings are clearly limited by the small sample size"
+    ).split()
+
+    paragraphs = []
+    remaining = words
+    while remaining > 0:
+        sentences = []
+        for _ in range(rng.randint(3, 7)):
+            length = rng.randint(8, 30)
+            sentence = ' '.join(rng.choice(vocabulary) for _ in range(length))
+            sentences.append(sentence[0].upper() + sentence[1:] + '.')
+            remaining -= length
+        paragraphs.append(' '.join(sentences))
+
+    return '\n\n'.join(paragraphs)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--file', help='Text file to analyze instead of a synthetic essay')
+    parser.add_argument('--words', type=int, default=2000)
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--lazy', action='store_true', help='Skip warm_up and let the first analysis load the models')
+    parser.add_argument('--batch', type=int, help='Measure batch throughput over this many documents')
+    parser.add_argument('--workers', type=int, default=1, help='Worker processes for the batch run')
+    parser.add_argument('--cache', action='store_true', help='Keep analyzed sentences in an in-memory sentence cache')
+    args = parser.parse_args()
+
+    if args.file:
+        with open(args.file, encoding='utf-8', errors='ignore') as file:
+            text = file.read()
+    else:
+        text = make_essay(args.words)
+
+    analyzer = TextAnalyzer(cache=SentenceCache(maxsize=20000 if args.cache else 0))
+    if not args.lazy and not analyzer.warm_up():
+        sys.exit("NLTK resources are missing; run nltk.download('punkt') and nltk.download('averaged_perceptron_tagger')")
+
+    if args.batch:
+        run_batch(analyzer, args)
+        return
+
+    first_started = time.perf_counter()
+    result = analyzer.analyze_text(text)
+    first = time.perf_counter() - first_started
+    if not result['success']:
+        sys.exit(result['error'])
+
+    timings = []
+    for _ in range(args.runs):
+        run_started = time.perf_counter()
+        analyzer.analyze_text(text)
+        timings.append(time.perf_counter() - run_started)
+
+    stats = analyzer.stats()
+    print(f"text: {len(text.split())} words")
+    print(f"import:          {import_seconds * 1000:8.1f} ms")
+    print(f"resource check:  {stats['resource_check_seconds'] * 1000:8.1f} ms")
+    print(f"warm-up:         {stats['warmup_seconds'] * 1000:8.1f} ms")
+    print(f"first analysis:  {first * 1000:8.1f} ms{' (includes warm-up)' if args.lazy else ''}")
+    print(f"warm analysis:   {statistics.median(timings) * 1000:8.1f} ms (median of {args.runs})")
+    if args.cache:
+        print(f"sentence cache:  {stats['sentence_cache']['hit_ratio']:8.1%} hits")
+
+def run_batch(analyzer, args):
+    """Compare one-by-one analysis with analyze_many over a batch of documents"""
+    texts = [make_essay(args.words, seed=seed) for seed in range(args.batch)]
+
+    started = time.perf_counter()
+    for text in texts:
+        analyzer.analyze_text(text)
+    single = time.perf_counter() - started
+
+    # The first batch call starts the worker processes, which load their own models
+    analyzer.analyze_many(texts[:args.workers], workers=args.workers)
+
+    started = time.perf_counter()
+    results = analyzer.analyze_many(texts, workers=args.workers)
+    batch = time.perf_counter() - started
+    if not all(result['success'] for result in results):
+        sys.exit('Batch analysis failed')
+
+    print(f"batch: {args.batch} documents of {args.words} words, {args.workers} worker(s)")
+    print(f"one by one:      {args.batch / single:8.1f} docs/s")
+    print(f"analyze_many:    {args.batch / batch:8.1f} docs/s")
+
+if __name__ == '__main__':
+    main()
@@ -11,6 +11,33 @@ class Config:
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     UPLOAD_FOLDER = os.path.join(os.getcwd(), 'uploads')
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16 MB max upload size
+    UPLOAD_PART_SIZE = 8 * 1024 * 1024  # Part size of resumable uploads (must stay below MAX_CONTENT_LENGTH)
+    UPLOAD_MAX_FILE_SIZE = 1024 * 1024 * 1024  # 1 GB max resumable upload size
+    UPLOAD_SESSION_HOURS = 24  # Resumable uploads expire after this many hours (expired ones are swept hourly)
+    DOWNLOAD_OFFLOAD = os.getenv('DOWNLOAD_OFFLOAD')  # "x-accel-redirect" (nginx) or "x-sendfile" (Apache); unset = serve from Flask
+    DOWNLOAD_ACCEL_PREFIX = os.getenv('DOWNLOAD_ACCEL_PREFIX', '/protected-uploads/')  # nginx internal location mapped to UPLOAD_FOLDER
+    USE_X_SENDFILE = DOWNLOAD_OFFLOAD == 'x-sendfile'
+    CORPUS_CANDIDATE_LIMIT = 10  # Stored assignments compared against in a plagiarism check
+    CORPUS_MAX_CANDIDATES = 50  # Largest max_candidates a plagiarism check may ask for
+    CORPUS_MIN_SHARED_FINGERPRINTS = 5  # Shared fingerprints needed to count as a candidate
+    COHORT_MAX_PAIRS = 200  # Largest number of pairs a cohort check may ask for
+    SELECTION_MAX_ASSIGNMENTS = int(os.getenv('SELECTION_MAX_ASSIGNMENTS', 500))  # Most assignments one batch analysis or cohort check may select
+    PLAGIARISM_WORKERS = int(os.getenv('PLAGIARISM_WORKERS', 1))  # Worker processes per plagiarism check (1 = serial)
+    PLAGIARISM_SHARD_SIZE = int(os.getenv('PLAGIARISM_SHARD_SIZE', 64))  # Candidate chunk pairs per worker task
+    EXTRACTION_WORKERS = int(os.getenv('EXTRACTION_WORKERS', 1))  # Worker processes for PDF page extraction (1 = serial)
+    EXTRACTION_MAX_PAGES = int(os.getenv('EXTRACTION_MAX_PAGES', 0)) or None  # Pages extracted per PDF (0 = all)
+    EXTRACTION_TIME_BUDGET = float(os.getenv('EXTRACTION_TIME_BUDGET', 0)) or None  # Seconds to extract one file (0 = unlimited)
+    NLTK_DOWNLOAD = os.getenv('NLTK_DOWNLOAD', 'true').lower() == 'true'  # Download missing NLTK data at startup
+    ANALYSIS_WORKERS = int(os.getenv('ANALYSIS_WORKERS', 1))  # Worker processes for batch feedback analysis (1 = serial)
+    JOB_WORKERS = int(os.getenv('JOB_WORKERS', 2))  # Background threads running queued analysis jobs
+    JOB_HEARTBEAT_SECONDS = int(os.getenv('JOB_HEARTBEAT_SECONDS', 30))  # How often workers mark their running jobs alive
+    JOB_STALE_SECONDS = int(os.getenv('JOB_STALE_SECONDS', 120))  # Running jobs without a heartbeat for this long are re-queued
+    SOURCE_CACHE_SIZE = int(os.getenv('SOURCE_CACHE_SIZE', 256))  # Preprocessed texts kept in memory per process
+    SENTENCE_CACHE_SIZE = int(os.getenv('SENTENCE_CACHE_SIZE', 20000))  # Analyzed sentences kept in memory per process (0 = no cache)
+    SENTENCE_CACHE_PATH = os.getenv('SENTENCE_CACHE_PATH', os.path.join(os.getcwd(), 'cache', 'sentences.sqlite'))  # SQLite file shared by workers ('' = memory only)
+    SENTENCE_CACHE_DISK_SIZE = int(os.getenv('SENTENCE_CACHE_DISK_SIZE', 500000))  # Analyzed sentences kept in the SQLite file
+    METRICS_PATH = os.getenv('METRICS_PATH', os.path.join(os.getcwd(), 'cache', 'metrics.sqlite'))  # SQLite file adding up the metrics of all workers ('' = per process)
+    ANALYSIS_RULE_PACKS = [path for path in os.getenv('ANALYSIS_RULE_PACKS', '').split(',') if path]  # JSON rule packs loaded on top of app/rules/default.json
 
 class DevelopmentConfig(Config):
     SQLALCHEMY_DATABASE_URI = f"mysql+pymysql://{os.getenv('MYSQL_USER', 'root')}:{os.getenv('MYSQL_PASSWORD', '')}@{os.getenv('MYSQL_HOST', 'localhost')}:{os.getenv('MYSQL_PORT', '3306')}/{os.getenv('MYSQL_DB', 'homework_assistant')}"
@@ -0,0 +1,9 @@
+# gunicorn settings, read from the working directory: gunicorn -w 4 "app:create_app()"
+
+# Create the app once in the master process, so workers share the loaded NLTK models
+preload_app = True
+
+def post_worker_init(worker):
+    """Start the background job workers of each worker process (threads don't survive the fork)"""
+    from app.utils.job_queue import job_queue
+    job_queue.start()
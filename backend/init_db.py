@@ -2,11 +2,16 @@ import os
 import sys
 from datetime import datetime
 from flask import Flask, current_app
+from alembic.migration import MigrationContext
+from alembic.script import ScriptDirectory
 from sqlalchemy import inspect
 from app.extensions import db
 from app.models.user import User, Role, UserRole
 from config import DevelopmentConfig
 
+# Alembic migrations of the schema (flask db upgrade)
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migrations')
+
 def create_app():
     """Create Flask app for database initialization"""
     app = Flask(__name__)
@@ -14,13 +19,31 @@ def create_app():
     db.init_app(app)
     return app
 
+def create_tables():
+    """Create missing tables; a new database is marked as up to date with the migrations"""
+    new_database = not inspect(db.engine).get_table_names()
+    db.create_all()
+    if new_database:
+        with db.engine.begin() as connection:
+            MigrationContext.configure(connection).stamp(ScriptDirectory(MIGRATIONS_DIR), 'heads')
+
+def check_migrations():
+    """Warn when the schema of an existing database is behind the migrations"""
+    heads = set(ScriptDirectory(MIGRATIONS_DIR).get_heads())
+    with db.engine.connect() as connection:
+        current = set(MigrationContext.configure(connection).get_current_heads())
+    
+    if current != heads:
+        print(f"Warning: database schema is at revision {', '.join(sorted(current)) or 'none'}, "
+              f"migrations are at {', '.join(sorted(heads))}. Run `flask db upgrade` (see README).")
+
 def init_db():
     """Initialize database with tables and default data"""
     app = create_app()
     
     with app.app_context():
         # Create all tables
-        db.create_all()
+        create_tables()
         print("Created database tables.")
         
         # Create default roles if they don't exist
@@ -68,13 +91,13 @@ def init_db_if_needed():
     inspector = inspect(db.engine)
     tables = inspector.get_table_names()
     
-    required_tables = ['user', 'role', 'user_role']
+    required_tables = ['users', 'roles', 'user_roles']
     missing_tables = [table for table in required_tables if table not in tables]
     
     if missing_tables:
         print(f"Database missing tables: {', '.join(missing_tables)}. Initializing database...")
         # Create all tables
-        db.create_all()
+        create_tables()
         
         # Create default roles
         roles = [
@@ -113,6 +136,7 @@ def init_db_if_needed():
         print("Database initialization completed.")
     else:
         print("Database tables already exist, skipping initialization.")
+        check_migrations()
 
 if __name__ == "__main__":
     init_db()
\ No newline at end of file
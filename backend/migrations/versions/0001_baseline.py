@@ -0,0 +1,109 @@
+"""Initial schema: users, roles, assignments, feedback and plagiarism reports
+
+Databases created by init_db.py before migrations were added are at this
+revision; mark them with `flask db stamp 0001_baseline` before upgrading.
+
+Revision ID: 0001_baseline
+Revises:
+Create Date: 2026-10-18 09:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0001_baseline'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('roles',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(length=50), nullable=False),
+        sa.Column('description', sa.String(length=255), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('name')
+    )
+    op.create_table('users',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('email', sa.String(length=120), nullable=False),
+        sa.Column('password_hash', sa.String(length=255), nullable=False),
+        sa.Column('full_name', sa.String(length=100), nullable=True),
+        sa.Column('is_active', sa.Boolean(), nullable=True),
+        sa.Column('last_login', sa.DateTime(), nullable=True),
+        sa.Column('settings', sa.JSON(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('email')
+    )
+    op.create_table('user_roles',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('role_id', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['role_id'], ['roles.id'], ),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('user_id', 'role_id')
+    )
+    op.create_table('assignments',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('title', sa.String(length=255), nullable=False),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.Column('file_path', sa.String(length=255), nullable=False),
+        sa.Column('file_name', sa.String(length=255), nullable=False),
+        sa.Column('file_type', sa.String(length=50), nullable=False),
+        sa.Column('file_size', sa.Integer(), nullable=False),
+        sa.Column('deadline', sa.DateTime(), nullable=True),
+        sa.Column('is_submitted', sa.Boolean(), nullable=True),
+        sa.Column('submitted_at', sa.DateTime(), nullable=True),
+        sa.Column('status', sa.String(length=50), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('feedback',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('grammar_issues', sa.JSON(), nullable=True),
+        sa.Column('clarity_score', sa.Float(), nullable=True),
+        sa.Column('structure_feedback', sa.Text(), nullable=True),
+        sa.Column('readability_score', sa.Float(), nullable=True),
+        sa.Column('improvement_suggestions', sa.JSON(), nullable=True),
+        sa.Column('rewrite_suggestions', sa.JSON(), nullable=True),
+        sa.Column('instructor_comments', sa.Text(), nullable=True),
+        sa.Column('instructor_feedback_date', sa.DateTime(), nullable=True),
+        sa.Column('grade', sa.String(length=10), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.Column('assignment_id', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['assignment_id'], ['assignments.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('plagiarism_reports',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('similarity_score', sa.Float(), nullable=False),
+        sa.Column('flagged_sections', sa.JSON(), nullable=True),
+        sa.Column('sources', sa.JSON(), nullable=True),
+        sa.Column('report_data', sa.JSON(), nullable=True),
+        sa.Column('generated_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.Column('assignment_id', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['assignment_id'], ['assignments.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade():
+    op.drop_table('plagiarism_reports')
+    op.drop_table('feedback')
+    op.drop_table('assignments')
+    op.drop_table('user_roles')
+    op.drop_table('users')
+    op.drop_table('roles')
@@ -0,0 +1,39 @@
+"""Add the corpus fingerprint index
+
+Revision ID: 0002_corpus_fingerprints
+Revises: 0001_baseline
+Create Date: 2026-10-18 09:10:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002_corpus_fingerprints'
+down_revision = '0001_baseline'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Before migrations were added, startup created new tables itself; keep those
+    if sa.inspect(op.get_bind()).has_table('corpus_fingerprints'):
+        return
+
+    op.create_table('corpus_fingerprints',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('fingerprint', sa.BigInteger(), nullable=False),
+        sa.Column('position', sa.Integer(), nullable=False),
+        sa.Column('assignment_id', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['assignment_id'], ['assignments.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_corpus_fingerprints_assignment_id'), 'corpus_fingerprints', ['assignment_id'], unique=False)
+    op.create_index(op.f('ix_corpus_fingerprints_fingerprint'), 'corpus_fingerprints', ['fingerprint'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_corpus_fingerprints_fingerprint'), table_name='corpus_fingerprints')
+    op.drop_index(op.f('ix_corpus_fingerprints_assignment_id'), table_name='corpus_fingerprints')
+    op.drop_table('corpus_fingerprints')
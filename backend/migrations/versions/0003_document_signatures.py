@@ -0,0 +1,50 @@
+"""Add MinHash document signatures and LSH buckets
+
+Revision ID: 0003_document_signatures
+Revises: 0002_corpus_fingerprints
+Create Date: 2026-10-18 09:20:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0003_document_signatures'
+down_revision = '0002_corpus_fingerprints'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Before migrations were added, startup created new tables itself; keep those
+    if sa.inspect(op.get_bind()).has_table('document_signatures'):
+        return
+
+    op.create_table('document_signatures',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('signature', sa.LargeBinary(), nullable=False),
+        sa.Column('num_perm', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('assignment_id', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['assignment_id'], ['assignments.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('assignment_id')
+    )
+    op.create_table('lsh_buckets',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('band', sa.Integer(), nullable=False),
+        sa.Column('bucket', sa.BigInteger(), nullable=False),
+        sa.Column('assignment_id', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['assignment_id'], ['assignments.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_lsh_buckets_assignment_id'), 'lsh_buckets', ['assignment_id'], unique=False)
+    op.create_index(op.f('ix_lsh_buckets_bucket'), 'lsh_buckets', ['bucket'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_lsh_buckets_bucket'), table_name='lsh_buckets')
+    op.drop_index(op.f('ix_lsh_buckets_assignment_id'), table_name='lsh_buckets')
+    op.drop_table('lsh_buckets')
+    op.drop_table('document_signatures')
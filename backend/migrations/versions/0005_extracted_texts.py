@@ -0,0 +1,39 @@
+"""Add the extracted text cache
+
+Revision ID: 0005_extracted_texts
+Revises: 0004_jobs
+Create Date: 2026-10-18 09:40:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0005_extracted_texts'
+down_revision = '0004_jobs'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Before migrations were added, startup created new tables itself; keep those
+    if sa.inspect(op.get_bind()).has_table('extracted_texts'):
+        return
+
+    op.create_table('extracted_texts',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('content_hash', sa.String(length=64), nullable=False),
+        sa.Column('extractor_version', sa.Integer(), nullable=False),
+        sa.Column('text', sa.Text(length=4294967295), nullable=False),
+        sa.Column('page_starts', sa.JSON(), nullable=True),
+        sa.Column('char_count', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('last_used_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('content_hash')
+    )
+
+
+def downgrade():
+    op.drop_table('extracted_texts')
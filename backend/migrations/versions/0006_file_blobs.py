@@ -0,0 +1,50 @@
+"""Store uploads once per content hash
+
+Adds the reference-counted file blobs and the content hash of assignments.
+Files uploaded before have no blob and no hash; they are served and deleted
+as before.
+
+Revision ID: 0006_file_blobs
+Revises: 0005_extracted_texts
+Create Date: 2026-10-18 09:50:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0006_file_blobs'
+down_revision = '0005_extracted_texts'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+
+    # Before migrations were added, startup created new tables itself; keep those
+    if not inspector.has_table('file_blobs'):
+        op.create_table('file_blobs',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('content_hash', sa.String(length=64), nullable=False),
+            sa.Column('file_path', sa.String(length=255), nullable=False),
+            sa.Column('file_size', sa.BigInteger(), nullable=False),
+            sa.Column('ref_count', sa.Integer(), nullable=False),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('file_path')
+        )
+        op.create_index(op.f('ix_file_blobs_content_hash'), 'file_blobs', ['content_hash'], unique=False)
+
+    # Assignments tables created by startup after this change already have the column
+    if 'content_hash' not in {column['name'] for column in inspector.get_columns('assignments')}:
+        op.add_column('assignments', sa.Column('content_hash', sa.String(length=64), nullable=True))
+        op.create_index(op.f('ix_assignments_content_hash'), 'assignments', ['content_hash'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_assignments_content_hash'), table_name='assignments')
+    op.drop_column('assignments', 'content_hash')
+    op.drop_index(op.f('ix_file_blobs_content_hash'), table_name='file_blobs')
+    op.drop_table('file_blobs')
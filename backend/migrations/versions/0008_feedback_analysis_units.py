@@ -0,0 +1,26 @@
+"""Store per-unit analysis results with feedback, for incremental re-analysis
+
+Revision ID: 0008_feedback_analysis_units
+Revises: 0007_upload_sessions
+Create Date: 2026-10-18 10:10:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0008_feedback_analysis_units'
+down_revision = '0007_upload_sessions'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Feedback tables created by startup after this change already have the column
+    if 'analysis_units' not in {column['name'] for column in sa.inspect(op.get_bind()).get_columns('feedback')}:
+        op.add_column('feedback', sa.Column('analysis_units', sa.JSON(), nullable=True))
+
+
+def downgrade():
+    op.drop_column('feedback', 'analysis_units')
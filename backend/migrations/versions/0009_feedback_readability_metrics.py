@@ -0,0 +1,26 @@
+"""Store the readability metrics of feedback
+
+Revision ID: 0009_feedback_readability
+Revises: 0008_feedback_analysis_units
+Create Date: 2026-10-18 10:20:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0009_feedback_readability'
+down_revision = '0008_feedback_analysis_units'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Feedback tables created by startup after this change already have the column
+    if 'readability_metrics' not in {column['name'] for column in sa.inspect(op.get_bind()).get_columns('feedback')}:
+        op.add_column('feedback', sa.Column('readability_metrics', sa.JSON(), nullable=True))
+
+
+def downgrade():
+    op.drop_column('feedback', 'readability_metrics')
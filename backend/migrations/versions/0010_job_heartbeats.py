@@ -0,0 +1,30 @@
+"""Record the worker process and heartbeat of running jobs
+
+Revision ID: 0010_job_heartbeats
+Revises: 0009_feedback_readability
+Create Date: 2026-10-18 10:30:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0010_job_heartbeats'
+down_revision = '0009_feedback_readability'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Job tables created by startup after this change already have the columns
+    columns = {column['name'] for column in sa.inspect(op.get_bind()).get_columns('jobs')}
+    if 'worker' not in columns:
+        op.add_column('jobs', sa.Column('worker', sa.String(length=255), nullable=True))
+    if 'heartbeat_at' not in columns:
+        op.add_column('jobs', sa.Column('heartbeat_at', sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    op.drop_column('jobs', 'heartbeat_at')
+    op.drop_column('jobs', 'worker')
@@ -0,0 +1,26 @@
+"""Record the state of upload sessions, so an upload is completed only once
+
+Revision ID: 0011_upload_session_status
+Revises: 0010_job_heartbeats
+Create Date: 2026-10-18 10:40:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0011_upload_session_status'
+down_revision = '0010_job_heartbeats'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Upload tables created by startup after this change already have the column
+    if 'status' not in {column['name'] for column in sa.inspect(op.get_bind()).get_columns('upload_sessions')}:
+        op.add_column('upload_sessions', sa.Column('status', sa.String(length=20), nullable=False, server_default='open'))
+
+
+def downgrade():
+    op.drop_column('upload_sessions', 'status')
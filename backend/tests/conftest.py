@@ -0,0 +1,110 @@
+import importlib.util
+import io
+import os
+import sys
+
+import pytest
+from flask_jwt_extended import create_access_token
+from nltk.tokenize.punkt import PunktSentenceTokenizer
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.join(BACKEND_DIR, 'benchmarks'))
+
+from config import Config
+from app.extensions import db
+from app.models.user import User
+from app.utils.sentence_cache import SentenceCache
+from app.utils.text_analyzer import TextAnalyzer, text_analyzer
+
+def _load_create_app():
+    """Import create_app from app.py, which the app package shadows"""
+    spec = importlib.util.spec_from_file_location('app_main', os.path.join(BACKEND_DIR, 'app.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.create_app
+
+create_app = _load_create_app()
+
+class SimpleTagger:
+    """Suffix-based stand-in for the perceptron tagger, whose model isn't downloaded in tests"""
+
+    VERBS = {'is', 'was', 'are', 'were', 'be', 'been', 'being', 'has', 'have', 'had'}
+
+    def tag(self, tokens):
+        tagged = []
+        for token in tokens:
+            word = token.lower()
+            if word in self.VERBS:
+                tag = 'VBZ'
+            elif word.endswith('ed'):
+                tag = 'VBN'
+            elif word.endswith('ly'):
+                tag = 'RB'
+            elif not token.isalnum():
+                tag = '.'
+            else:
+                tag = 'NN'
+            tagged.append((token, tag))
+        return tagged
+
+def use_stand_in_models(analyzer):
+    """Enable analysis on an analyzer with an untrained Punkt tokenizer and SimpleTagger"""
+    analyzer._warmed_up = True
+    analyzer.nlp_available = True
+    analyzer.sentence_tokenizer = PunktSentenceTokenizer()
+    analyzer.tagger = SimpleTagger()
+    return analyzer
+
+@pytest.fixture
+def app(tmp_path):
+    """App on a fresh SQLite database, with uploads and caches under tmp_path"""
+    class TestConfig(Config):
+        TESTING = True
+        SECRET_KEY = 'test_secret_key'
+        JWT_SECRET_KEY = 'test_jwt_secret_key_of_at_least_32_bytes'
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + str(tmp_path / 'test.sqlite')
+        UPLOAD_FOLDER = str(tmp_path / 'uploads')
+        NLTK_DOWNLOAD = False
+        SENTENCE_CACHE_PATH = ''
+        METRICS_PATH = ''
+
+    return create_app(TestConfig)
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+@pytest.fixture
+def auth_headers(app):
+    """Authorization headers of a new student"""
+    with app.app_context():
+        user = User(email='student@example.com', full_name='Student')
+        user.set_password('password')
+        db.session.add(user)
+        db.session.commit()
+        return {'Authorization': 'Bearer ' + create_access_token(identity=str(user.id))}
+
+@pytest.fixture
+def upload(client, auth_headers):
+    """Submit a text file as an assignment and return the response data"""
+    def upload(content, filename='essay.txt', title='Essay'):
+        response = client.post('/api/assignments', headers=auth_headers, data={
+            'title': title,
+            'file': (io.BytesIO(content.encode('utf-8')), filename)
+        }, content_type='multipart/form-data')
+        assert response.status_code == 201, response.json
+        return response.json['data']
+    return upload
+
+@pytest.fixture
+def analyzer():
+    """TextAnalyzer with stand-in models and no sentence cache"""
+    return use_stand_in_models(TextAnalyzer(cache=SentenceCache(maxsize=0)))
+
+@pytest.fixture
+def shared_analyzer(monkeypatch):
+    """Enable analysis on the shared text_analyzer used by the API"""
+    for name in ('_warmed_up', 'nlp_available', 'sentence_tokenizer', 'tagger'):
+        monkeypatch.setattr(text_analyzer, name, getattr(text_analyzer, name))
+    return use_stand_in_models(text_analyzer)
@@ -0,0 +1,72 @@
+import hashlib
+import os
+
+from app.extensions import db
+from app.models.assignment import Assignment
+from app.models.file_blob import FileBlob
+from app.utils.file_handler import FileHandler
+
+def _relative_path(app, assignment):
+    with app.app_context():
+        return db.session.get(Assignment, assignment['id']).file_path
+
+def _stored_path(app, relative_path):
+    return os.path.join(app.config['UPLOAD_FOLDER'], relative_path)
+
+def _ref_counts(app):
+    with app.app_context():
+        return sorted(blob.ref_count for blob in FileBlob.query.all())
+
+def test_identical_uploads_share_one_file(app, upload):
+    first = upload('the same essay text', filename='first.txt')
+    second = upload('the same essay text', filename='second.txt')
+
+    assert _relative_path(app, first) == _relative_path(app, second)
+    assert first['content_hash'] == hashlib.sha256(b'the same essay text').hexdigest()
+    assert _ref_counts(app) == [2]
+
+def test_deleting_a_shared_file_keeps_it_until_the_last_reference(app, client, auth_headers, upload):
+    first = upload('the same essay text')
+    second = upload('the same essay text')
+    other = upload('a different essay')
+    path = _stored_path(app, _relative_path(app, first))
+
+    assert client.delete(f"/api/assignments/{first['id']}", headers=auth_headers).status_code == 200
+    assert os.path.exists(path)
+    assert _ref_counts(app) == [1, 1]
+
+    assert client.delete(f"/api/assignments/{second['id']}", headers=auth_headers).status_code == 200
+    assert not os.path.exists(path)
+    assert _ref_counts(app) == [1]
+    assert os.path.exists(_stored_path(app, _relative_path(app, other)))
+
+def test_upload_after_delete_stores_the_file_again(app, client, auth_headers, upload):
+    first = upload('the same essay text')
+    client.delete(f"/api/assignments/{first['id']}", headers=auth_headers)
+
+    second = upload('the same essay text')
+
+    assert os.path.exists(_stored_path(app, _relative_path(app, second)))
+    assert _ref_counts(app) == [1]
+
+def test_released_file_referenced_again_is_not_removed(app, upload):
+    assignment = upload('the same essay text')
+    relative_path = _relative_path(app, assignment)
+    path = _stored_path(app, relative_path)
+
+    with app.app_context():
+        released = FileHandler.release_file(relative_path)
+        db.session.commit()
+        assert released == relative_path
+
+        # The same bytes are uploaded again before the released file is removed
+        temp_path = path + '.upload'
+        with open(temp_path, 'w') as f:
+            f.write('the same essay text')
+        FileHandler.store_blob(temp_path, assignment['content_hash'], '.txt', 'assignments')
+        db.session.commit()
+
+        assert FileHandler.remove_released_file(released) is False
+
+    assert os.path.exists(path)
+    assert _ref_counts(app) == [1]
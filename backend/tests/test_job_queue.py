@@ -0,0 +1,113 @@
+import os
+import socket
+import subprocess
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.extensions import db
+from app.models.job import Job
+from app.utils.job_queue import job_queue
+
+@pytest.fixture
+def runs():
+    """IDs of the test jobs run, in order"""
+    return []
+
+@pytest.fixture
+def queue(app, monkeypatch, runs):
+    """The shared job queue as in a freshly started process, with a test job type that records its runs"""
+    app.config['JOB_HEARTBEAT_SECONDS'] = 3600
+
+    def handler(job):
+        runs.append(job.id)
+        return job.assignment_id
+
+    monkeypatch.setitem(job_queue._handlers, 'test-job', handler)
+    job_queue.init_app(app)
+    job_queue._pid = None
+    yield job_queue
+
+    if job_queue._executor is not None:
+        job_queue._executor.shutdown(wait=True)
+    job_queue._pid = None
+
+@pytest.fixture
+def assignment(upload):
+    return upload('an essay to analyze')
+
+def _dead_pid():
+    """PID of a process that has exited"""
+    process = subprocess.Popen([sys.executable, '-c', 'pass'])
+    process.wait()
+    return process.pid
+
+def _add_job(app, assignment, status='running', worker=None, heartbeat_at=None):
+    with app.app_context():
+        job = Job(
+            id=str(uuid.uuid4()),
+            job_type='test-job',
+            assignment_id=assignment['id'],
+            user_id=assignment['user_id'],
+            status=status,
+            worker=worker,
+            heartbeat_at=heartbeat_at,
+            started_at=heartbeat_at
+        )
+        db.session.add(job)
+        db.session.commit()
+        return job.id
+
+def _wait_for(app, job_ids, status, timeout=10):
+    """Poll until all jobs have the status, returning their final statuses"""
+    deadline = time.monotonic() + timeout
+    while True:
+        with app.app_context():
+            statuses = {job_id: db.session.get(Job, job_id).status for job_id in job_ids}
+        if all(value == status for value in statuses.values()) or time.monotonic() > deadline:
+            return statuses
+        time.sleep(0.05)
+
+def test_restart_resumes_jobs_of_dead_workers(app, queue, runs, assignment):
+    host = socket.gethostname()
+    now = datetime.utcnow()
+    stale = now - timedelta(seconds=app.config['JOB_STALE_SECONDS'] + 60)
+
+    dead_local = _add_job(app, assignment, worker=f"{host}:{_dead_pid()}", heartbeat_at=now)
+    stale_remote = _add_job(app, assignment, worker='elsewhere:1', heartbeat_at=stale)
+    legacy = _add_job(app, assignment, heartbeat_at=stale)
+    queued = _add_job(app, assignment, status='queued')
+    alive_remote = _add_job(app, assignment, worker='elsewhere:1', heartbeat_at=now)
+    alive_local = _add_job(app, assignment, worker=f"{host}:{os.getppid()}", heartbeat_at=stale)
+
+    queue.start()
+
+    resumed = [dead_local, stale_remote, legacy, queued]
+    assert _wait_for(app, resumed, 'completed') == {job_id: 'completed' for job_id in resumed}
+    assert sorted(runs) == sorted(resumed)
+    with app.app_context():
+        for job_id in resumed:
+            job = db.session.get(Job, job_id)
+            assert job.worker == queue.worker_id
+            assert job.result_id == assignment['id']
+        assert db.session.get(Job, alive_remote).status == 'running'
+        assert db.session.get(Job, alive_local).status == 'running'
+
+def test_job_of_an_earlier_process_with_the_same_pid_is_resumed(app, queue, assignment):
+    queue.start()
+    job_id = _add_job(app, assignment, worker=queue.worker_id, heartbeat_at=datetime.utcnow())
+
+    with app.app_context():
+        assert queue._requeue_orphans() == [job_id]
+
+def test_jobs_running_in_this_process_are_kept(app, queue, assignment):
+    queue.start()
+    job_id = _add_job(app, assignment, worker=queue.worker_id, heartbeat_at=datetime.utcnow())
+    queue._running.add(job_id)
+
+    with app.app_context():
+        assert queue._requeue_orphans() == []
+        assert db.session.get(Job, job_id).status == 'running'
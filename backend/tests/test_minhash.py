@@ -0,0 +1,73 @@
+import random
+from array import array
+
+import pytest
+
+from app.models.document_signature import DocumentSignature, LshBucket
+from app.utils.minhash import MinHasher
+from app.utils.plagiarism_detector import PlagiarismDetector
+from app.utils.source_cache import SourceCache
+
+def legacy_signature(minhasher, shingles):
+    """Reference signature: the permutation loop over Python integers"""
+    signature = array('I', [minhasher.MAX_HASH] * minhasher.num_perm)
+    for shingle in set(shingles):
+        for i, (a, b) in enumerate(minhasher.permutations):
+            value = ((a * shingle + b) % minhasher.MERSENNE_PRIME) & minhasher.MAX_HASH
+            if value < signature[i]:
+                signature[i] = value
+    return signature
+
+def _essay(seed, words=300):
+    rng = random.Random(seed)
+    vocabulary = [f"word{i}" for i in range(2000)]
+    return ' '.join(rng.choice(vocabulary) for _ in range(words))
+
+@pytest.fixture
+def detector():
+    return PlagiarismDetector(cache=SourceCache())
+
+@pytest.mark.parametrize('text', ['', '   ', '!!!', 'only four short words'])
+def test_document_without_shingles_has_no_signature(detector, text):
+    assert len(detector.minhash_signature(text)) == 0
+
+def test_empty_shingles_have_no_signature():
+    minhasher = MinHasher()
+
+    assert minhasher.signature([]) == array('I')
+
+def test_signature_matches_reference():
+    rng = random.Random(3)
+    minhasher = MinHasher(num_perm=64, bands=16)
+    # Full 61-bit shingles, and more than one block of them
+    shingles = [rng.randrange(0, (1 << 61) - 1) for _ in range(MinHasher.BLOCK_SIZE + 100)] + [0, 1]
+
+    assert minhasher.signature(shingles) == legacy_signature(minhasher, shingles)
+
+def test_identical_documents_have_identical_signatures(detector):
+    text = _essay(1)
+
+    signature = detector.minhash_signature(text)
+
+    assert len(signature) == detector.minhasher.num_perm
+    assert signature == detector.minhash_signature(text.upper())
+    assert MinHasher.estimate_similarity(signature, detector.minhash_signature(_essay(2))) < 0.2
+
+def test_corpus_skips_documents_without_shingles(app, upload):
+    upload('hi there')
+    upload('totally different words')
+
+    with app.app_context():
+        assert DocumentSignature.query.count() == 0
+        assert LshBucket.query.count() == 0
+        assert PlagiarismDetector().find_near_duplicates('hi there') == []
+
+def test_corpus_finds_near_duplicates_of_long_documents(app, upload):
+    text = _essay(4)
+    upload('hi there')
+    long_id = upload(text)['id']
+
+    with app.app_context():
+        assert DocumentSignature.query.count() == 1
+        duplicates = PlagiarismDetector().find_near_duplicates(text + ' one more sentence')
+        assert [assignment_id for assignment_id, _ in duplicates] == [long_id]
@@ -0,0 +1,108 @@
+import random
+
+import pytest
+
+from bench_similarity import legacy_find_similar_chunks, make_corpus
+from app.utils.fingerprint import Winnower
+from app.utils.plagiarism_detector import PlagiarismDetector
+from app.utils.source_cache import SourceCache
+
+def legacy_winnow(hashes, window):
+    """Reference winnowing: the rightmost minimum of every window, recorded once per position"""
+    if len(hashes) <= window:
+        position = max(i for i, h in enumerate(hashes) if h == min(hashes))
+        return [(hashes[position], position)]
+
+    fingerprints = []
+    for start in range(len(hashes) - window + 1):
+        selected = hashes[start:start + window]
+        position = start + max(i for i, h in enumerate(selected) if h == min(selected))
+        if not fingerprints or fingerprints[-1][1] != position:
+            fingerprints.append((hashes[position], position))
+    return fingerprints
+
+def brute_force_matches(detector, text, comparison_sources, min_similarity=0.8):
+    """(chunk, source, first source chunk) of every pair above min_similarity, comparing all chunk pairs"""
+    document = detector.preprocess(text)
+    matches = set()
+    for chunk_index, (start, end) in enumerate(document.chunk_spans):
+        words = set(document.words[start:end])
+        for source_name, source_text in comparison_sources.items():
+            source = detector.preprocess(source_text)
+            for source_chunk_index, (source_start, source_end) in enumerate(source.chunk_spans):
+                source_words = set(source.words[source_start:source_end])
+                if len(words & source_words) / len(words | source_words) >= min_similarity:
+                    matches.add((chunk_index, source_name, source_chunk_index))
+                    break
+    return matches
+
+@pytest.fixture
+def detector():
+    return PlagiarismDetector(cache=SourceCache())
+
+@pytest.mark.parametrize('seed', range(5))
+def test_winnow_matches_reference(seed):
+    rng = random.Random(seed)
+    winnower = Winnower(k=5, window=4)
+    # Few distinct values, so windows often hold ties
+    hashes = [rng.randrange(20) for _ in range(rng.randint(1, 300))]
+
+    assert winnower.winnow(hashes) == legacy_winnow(hashes, winnower.window)
+
+def test_winnow_of_nothing_is_empty():
+    assert Winnower().winnow([]) == []
+    assert Winnower().fingerprint(['too', 'short']) == []
+
+@pytest.mark.parametrize('seed', range(5))
+def test_shared_run_shares_a_fingerprint(seed):
+    rng = random.Random(seed)
+    winnower = Winnower(k=5, window=4)
+    vocabulary = [f"word{i}" for i in range(1000)]
+    shared = [rng.choice(vocabulary) for _ in range(winnower.window + winnower.k - 1)]
+    first = [rng.choice(vocabulary) for _ in range(50)] + shared + [rng.choice(vocabulary) for _ in range(50)]
+    second = [rng.choice(vocabulary) for _ in range(80)] + shared
+
+    first_prints = {h for h, _ in winnower.fingerprint(first)}
+    second_prints = {h for h, _ in winnower.fingerprint(second)}
+    assert first_prints & second_prints
+
+@pytest.mark.parametrize('seed', [0, 4, 5])
+def test_kernel_flags_every_legacy_match(detector, seed):
+    text, comparison_sources = make_corpus(1500, 3, seed)
+
+    legacy = legacy_find_similar_chunks(detector, text, comparison_sources)
+    flagged = detector.find_similar_chunks(text, comparison_sources)
+
+    assert legacy
+    assert {(s['chunk_index'], s['source']) for s in legacy} <= {(s['chunk_index'], s['source']) for s in flagged}
+
+@pytest.mark.parametrize('seed', range(4))
+def test_kernel_matches_all_pairs_comparison(detector, seed):
+    text, comparison_sources = make_corpus(1500, 3, seed)
+
+    flagged = detector.find_similar_chunks(text, comparison_sources)
+
+    assert {(s['chunk_index'], s['source'], s['source_chunk_index']) for s in flagged} == \
+        brute_force_matches(detector, text, comparison_sources)
+
+def test_copied_chunks_score_one(detector):
+    text, _ = make_corpus(1500, 1, 0)
+
+    flagged = detector.find_similar_chunks(text, {'copy': text})
+
+    assert [s['chunk_index'] for s in flagged] == list(range(len(detector.preprocess(text).chunks)))
+    assert all(s['similarity'] == 1.0 and s['containment'] == 1.0 for s in flagged)
+
+def test_parallel_check_matches_serial(tmp_path, capsys):
+    text, comparison_sources = make_corpus(3000, 4, 0)
+    path = tmp_path / 'essay.txt'
+    path.write_text(text)
+
+    serial = PlagiarismDetector(cache=SourceCache()).check_plagiarism(str(path), comparison_sources)
+    parallel = PlagiarismDetector(cache=SourceCache(), workers=2, shard_size=2).check_plagiarism(str(path), comparison_sources)
+
+    # A failing pool falls back to the serial path, which would hide a difference
+    assert 'running serially' not in capsys.readouterr().out
+    # Every flagged section comes from a candidate pair, so the pairs span several shards
+    assert len(serial['flagged_sections']) > 2
+    assert parallel == serial
@@ -0,0 +1,90 @@
+import random
+
+import pytest
+
+from app.utils.plagiarism_detector import PlagiarismDetector
+from app.utils.source_cache import SourceCache
+
+TEXTS = [
+    "Hello,   World!\n\nThis is  a TEST.",
+    "  leading and trailing spaces  ",
+    "Punctuation-joined words: don't, won't; (brackets) [and] {braces}.",
+    "Straße, İstanbul and ǅemal expand or change when lowercased.",
+    "snake_case stays, tabs\tand\nnewlines\r\ncollapse",
+    "",
+    "!!! ... ???"
+]
+
+@pytest.fixture
+def detector():
+    return PlagiarismDetector(cache=SourceCache())
+
+def _random_text(seed, words=400):
+    rng = random.Random(seed)
+    vocabulary = ['Alpha', 'beta,', 'GAMMA.', "it's", 'Ünïcode', 'x_y', '(paren)', '42', 'Straße', 'İz', '—', '...']
+    separators = [' ', '  ', '\n', '\n\n', '\t', ' - ']
+    return ''.join(rng.choice(vocabulary) + rng.choice(separators) for _ in range(words))
+
+def _words(detector, text):
+    """Normalized words of a piece of original text"""
+    return detector.normalize_text(text).split()
+
+@pytest.mark.parametrize('text', TEXTS + [_random_text(seed) for seed in range(3)])
+def test_normalized_text_matches_normalize_text(detector, text):
+    normalized, offsets = detector.normalize_text_with_offsets(text)
+
+    assert normalized == detector.normalize_text(text)
+    assert len(offsets) == len(normalized)
+
+@pytest.mark.parametrize('text', TEXTS + [_random_text(seed) for seed in range(3)])
+def test_offsets_point_at_original_characters(detector, text):
+    normalized, offsets = detector.normalize_text_with_offsets(text, base=7)
+
+    assert list(offsets) == sorted(offsets)
+    for char, offset in zip(normalized, offsets):
+        original = text[offset - 7]
+        if char == ' ':
+            assert original.isspace()
+        else:
+            assert char in original.lower()
+
+@pytest.mark.parametrize('seed', range(3))
+def test_chunk_spans_map_back_to_original_text(detector, seed):
+    text = _random_text(seed)
+    document = detector.preprocess(text)
+
+    assert document.chunks
+    for chunk_index, chunk in enumerate(document.chunks):
+        start, end = document.original_chunk_span(chunk_index)
+        assert _words(detector, text[start:end]) == chunk.split(' ')
+
+@pytest.mark.parametrize('seed', range(3))
+def test_offsets_inside_chunks_map_to_word_boundaries(detector, seed):
+    text = _random_text(seed)
+    document = detector.preprocess(text)
+
+    for chunk_index, chunk in enumerate(document.chunks):
+        position = 0
+        for word in chunk.split(' '):
+            start = document.original_offset(chunk_index, position)
+            end = document.original_offset(chunk_index, position + len(word), is_end=True)
+            assert _words(detector, text[start:end]) == [word]
+            position += len(word) + 1
+
+def test_matched_spans_cover_the_same_text_in_both_documents(detector):
+    passage = _random_text(11, words=150)
+    text = _random_text(12, words=200) + passage + _random_text(13, words=100)
+    source = _random_text(14, words=50).upper() + '\n\n' + passage.replace(' ', '   ')
+
+    sections = detector.find_similar_chunks(text, {'source': source}, min_similarity=0.5)
+
+    assert sections
+    for section in sections:
+        assert _words(detector, text[section['start_pos']:section['end_pos']]) == section['text'].split(' ')
+        assert section['matched_spans']
+        for span in section['matched_spans']:
+            # Spans may start or end inside a word (or at a joining space), so compare the words in between
+            matched = _words(detector, text[span['start']:span['end']])
+            source_matched = _words(detector, source[span['source_start']:span['source_end']])
+            assert len(matched) > 2
+            assert matched[1:-1] == source_matched[1:-1]
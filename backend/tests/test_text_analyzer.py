@@ -0,0 +1,89 @@
+import random
+
+from app.extensions import db
+from app.models.feedback import Feedback
+from app.utils.text_analyzer import text_analyzer
+
+def _essay(seed, paragraphs=6):
+    """Paragraphs of sentences, each ending with sentence-final punctuation"""
+    rng = random.Random(seed)
+    vocabulary = ('the student was analysed quickly and is writing a report but it has been '
+                  'reviewed or not the data were collected carefully by researchers , ;').split()
+    essay = []
+    for _ in range(paragraphs):
+        sentences = []
+        for _ in range(rng.randint(1, 5)):
+            words = [rng.choice(vocabulary) for _ in range(rng.randint(4, 40))]
+            sentences.append(' '.join(words).capitalize() + rng.choice('.?!'))
+        essay.append(' '.join(sentences))
+    return '\n\n'.join(essay)
+
+def _edit_paragraph(text, index, sentence):
+    paragraphs = text.split('\n\n')
+    paragraphs[index] += ' ' + sentence
+    return '\n\n'.join(paragraphs)
+
+def test_unchanged_text_reuses_every_unit(analyzer):
+    text = _essay(1)
+    result, units = analyzer.analyze_revision(text)
+    analyzed = analyzer.units_analyzed
+
+    again, again_units = analyzer.analyze_revision(text, units)
+
+    assert again == result
+    assert again_units == units
+    assert analyzer.units_analyzed == analyzed
+    assert analyzer.units_reused == len(units['units'])
+
+def test_edit_reanalyzes_only_the_changed_unit(analyzer):
+    text = _essay(2)
+    _, units = analyzer.analyze_revision(text)
+    edited = _edit_paragraph(text, 3, 'The report was reviewed by the student.')
+    analyzed = analyzer.units_analyzed
+
+    result, edited_units = analyzer.analyze_revision(edited, units)
+
+    assert analyzer.units_analyzed - analyzed == 1
+    assert analyzer.units_reused == len(units['units']) - 1
+    assert result == analyzer.analyze_revision(edited)[0]
+    assert len(edited_units['units']) == len(units['units'])
+
+def test_units_of_another_version_are_not_reused(analyzer):
+    text = _essay(3)
+    _, units = analyzer.analyze_revision(text)
+    analyzed = analyzer.units_analyzed
+
+    analyzer.analyze_revision(text, dict(units, version='0:outdated'))
+
+    assert analyzer.units_reused == 0
+    assert analyzer.units_analyzed - analyzed == len(units['units'])
+
+def test_copy_of_an_analyzed_file_reuses_its_feedback(app, client, auth_headers, upload, shared_analyzer):
+    text = _essay(4)
+    original = upload(text, title='Original')
+    copy = upload(text, title='Copy')
+
+    first = client.post(f"/api/feedback/analyze/{original['id']}", headers=auth_headers)
+    analyzed = text_analyzer.units_analyzed
+    second = client.post(f"/api/feedback/analyze/{copy['id']}", headers=auth_headers)
+
+    assert first.status_code == second.status_code == 200
+    assert first.json['data']['clarity_score'] is not None
+    assert text_analyzer.units_analyzed == analyzed
+    assert second.json['data']['clarity_score'] == first.json['data']['clarity_score']
+    assert second.json['data']['grammar_issues'] == first.json['data']['grammar_issues']
+
+def test_copy_with_instructor_feedback_only_is_analyzed(app, client, auth_headers, upload, shared_analyzer):
+    text = _essay(5)
+    original = upload(text, title='Original')
+    with app.app_context():
+        db.session.add(Feedback(assignment_id=original['id'], instructor_comments='See me'))
+        db.session.commit()
+    copy = upload(text, title='Copy')
+    analyzed = text_analyzer.units_analyzed
+
+    response = client.post(f"/api/feedback/analyze/{copy['id']}", headers=auth_headers)
+
+    assert response.status_code == 200
+    assert response.json['data']['clarity_score'] is not None
+    assert text_analyzer.units_analyzed > analyzed